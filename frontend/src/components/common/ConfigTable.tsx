@@ -104,6 +104,9 @@ export interface ModelGroupConfig {
   PRESENCE_PENALTY?: number | null
   FREQUENCY_PENALTY?: number | null
   EXTRA_BODY?: string | null
+  RPM_LIMIT?: number
+  TPM_LIMIT?: number
+  MAX_CONCURRENCY?: number
   ENABLE_VISION?: boolean
   ENABLE_COT?: boolean
 }
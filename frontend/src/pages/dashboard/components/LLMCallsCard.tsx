@@ -0,0 +1,137 @@
+import React from 'react'
+import {
+  Card,
+  CardContent,
+  Typography,
+  Box,
+  CircularProgress,
+  FormControl,
+  InputLabel,
+  Select,
+  SelectChangeEvent,
+  MenuItem,
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableRow,
+  TableContainer,
+  useMediaQuery,
+  useTheme,
+} from '@mui/material'
+import { LLMCallGroupBy, LLMCallSummaryResponse } from '../../../services/api/dashboard'
+import { UI_STYLES } from '../../../theme/themeConfig'
+import { CARD_VARIANTS } from '../../../theme/variants'
+
+interface LLMCallsCardProps {
+  title: string
+  data?: LLMCallSummaryResponse
+  loading?: boolean
+  groupBy: LLMCallGroupBy
+  onGroupByChange: (groupBy: LLMCallGroupBy) => void
+}
+
+// 聚合维度选项
+const GROUP_BY_OPTIONS: { value: LLMCallGroupBy; label: string }[] = [
+  { value: 'model_group', label: '模型组' },
+  { value: 'model', label: '模型' },
+  { value: 'source', label: '调用来源' },
+  { value: 'chat_key', label: '会话' },
+  { value: 'call_type', label: '调用类型' },
+]
+
+export const LLMCallsCard: React.FC<LLMCallsCardProps> = ({
+  title,
+  data,
+  loading = false,
+  groupBy,
+  onGroupByChange,
+}) => {
+  const theme = useTheme()
+  const isMobile = useMediaQuery(theme.breakpoints.down('sm'))
+
+  const items = (data?.items || []).slice(0, 20)
+  const groupLabel = GROUP_BY_OPTIONS.find(option => option.value === groupBy)?.label || groupBy
+
+  return (
+    <Card className="w-full h-full" sx={CARD_VARIANTS.default.styles}>
+      <CardContent>
+        <Box className={`flex ${isMobile ? 'flex-col items-start gap-2' : 'justify-between items-center'} mb-2`}>
+          <Typography variant="h6" color="text.primary">
+            {title}
+          </Typography>
+          <FormControl size="small" sx={{ minWidth: isMobile ? '100%' : 140 }}>
+            <InputLabel id="llm-calls-group-by-label">聚合维度</InputLabel>
+            <Select
+              labelId="llm-calls-group-by-label"
+              value={groupBy}
+              label="聚合维度"
+              onChange={(event: SelectChangeEvent) => onGroupByChange(event.target.value as LLMCallGroupBy)}
+            >
+              {GROUP_BY_OPTIONS.map(option => (
+                <MenuItem key={option.value} value={option.value}>
+                  {option.label}
+                </MenuItem>
+              ))}
+            </Select>
+          </FormControl>
+        </Box>
+
+        {loading ? (
+          <Box className="flex justify-center items-center" sx={{ height: UI_STYLES.CARD_LAYOUT.LOADING_HEIGHT }}>
+            <CircularProgress />
+          </Box>
+        ) : items.length === 0 ? (
+          <Box className="flex justify-center items-center" sx={{ height: UI_STYLES.CARD_LAYOUT.LOADING_HEIGHT }}>
+            <Typography variant="body2" color="text.secondary">
+              暂无数据
+            </Typography>
+          </Box>
+        ) : (
+          <TableContainer>
+            <Table size="small">
+              <TableHead>
+                <TableRow>
+                  <TableCell>{groupLabel}</TableCell>
+                  <TableCell align="right">调用次数</TableCell>
+                  <TableCell align="right">错误率</TableCell>
+                  <TableCell align="right">输入 Token</TableCell>
+                  <TableCell align="right">输出 Token</TableCell>
+                  {!isMobile && <TableCell align="right">首 Token P50/P95 (ms)</TableCell>}
+                  {!isMobile && <TableCell align="right">总耗时 P50/P95 (ms)</TableCell>}
+                  {!isMobile && <TableCell align="right">重试 / 备用</TableCell>}
+                </TableRow>
+              </TableHead>
+              <TableBody>
+                {items.map(item => (
+                  <TableRow key={item.key}>
+                    <TableCell>{item.key || '-'}</TableCell>
+                    <TableCell align="right">{item.calls}</TableCell>
+                    <TableCell align="right">{(item.error_rate * 100).toFixed(1)}%</TableCell>
+                    <TableCell align="right">{item.prompt_tokens}</TableCell>
+                    <TableCell align="right">{item.completion_tokens}</TableCell>
+                    {!isMobile && (
+                      <TableCell align="right">
+                        {item.p50_first_token_ms} / {item.p95_first_token_ms}
+                      </TableCell>
+                    )}
+                    {!isMobile && (
+                      <TableCell align="right">
+                        {item.p50_total_ms} / {item.p95_total_ms}
+                      </TableCell>
+                    )}
+                    {!isMobile && (
+                      <TableCell align="right">
+                        {item.retries} / {item.fallbacks}
+                      </TableCell>
+                    )}
+                  </TableRow>
+                ))}
+              </TableBody>
+            </Table>
+          </TableContainer>
+        )}
+      </CardContent>
+    </Card>
+  )
+}
@@ -0,0 +1,118 @@
+import React from 'react'
+import {
+  Card,
+  CardContent,
+  Typography,
+  Box,
+  CircularProgress,
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableRow,
+  TableContainer,
+  useMediaQuery,
+  useTheme,
+} from '@mui/material'
+import { PromptProfileResponse } from '../../../services/api/dashboard'
+import { UI_STYLES } from '../../../theme/themeConfig'
+import { CARD_VARIANTS } from '../../../theme/variants'
+
+interface PromptProfileCardProps {
+  title: string
+  data?: PromptProfileResponse
+  loading?: boolean
+}
+
+// 构建阶段显示名称
+const SECTION_LABELS: Record<string, string> = {
+  system_prompt: '系统提示词',
+  plugin_injections: '插件注入',
+  practice_examples: '对话示例',
+  history_query: '历史查询',
+  history_parse: '历史解析',
+  image_encoding: '图片编码',
+  final_messages: '最终消息',
+}
+
+export const PromptProfileCard: React.FC<PromptProfileCardProps> = ({ title, data, loading = false }) => {
+  const theme = useTheme()
+  const isMobile = useMediaQuery(theme.breakpoints.down('sm'))
+
+  const sections = Object.entries(data?.sections || {})
+  const chats = (data?.chats || []).slice(0, 10)
+
+  return (
+    <Card className="w-full h-full" sx={CARD_VARIANTS.default.styles}>
+      <CardContent>
+        <Typography variant="h6" gutterBottom color="text.primary">
+          {title}
+        </Typography>
+
+        {loading ? (
+          <Box className="flex justify-center items-center" sx={{ height: UI_STYLES.CARD_LAYOUT.LOADING_HEIGHT }}>
+            <CircularProgress />
+          </Box>
+        ) : sections.length === 0 ? (
+          <Box className="flex justify-center items-center" sx={{ height: UI_STYLES.CARD_LAYOUT.LOADING_HEIGHT }}>
+            <Typography variant="body2" color="text.secondary">
+              暂无数据
+            </Typography>
+          </Box>
+        ) : (
+          <Box className="flex flex-col gap-4">
+            <TableContainer>
+              <Table size="small">
+                <TableHead>
+                  <TableRow>
+                    <TableCell>构建阶段</TableCell>
+                    <TableCell align="right">平均耗时 (ms)</TableCell>
+                    {!isMobile && <TableCell align="right">最大耗时 (ms)</TableCell>}
+                    <TableCell align="right">平均 Token</TableCell>
+                    {!isMobile && <TableCell align="right">最大 Token</TableCell>}
+                  </TableRow>
+                </TableHead>
+                <TableBody>
+                  {sections.map(([name, stat]) => (
+                    <TableRow key={name}>
+                      <TableCell>{SECTION_LABELS[name] || name}</TableCell>
+                      <TableCell align="right">{stat.avg_ms}</TableCell>
+                      {!isMobile && <TableCell align="right">{stat.max_ms}</TableCell>}
+                      <TableCell align="right">{stat.avg_tokens}</TableCell>
+                      {!isMobile && <TableCell align="right">{stat.max_tokens}</TableCell>}
+                    </TableRow>
+                  ))}
+                </TableBody>
+              </Table>
+            </TableContainer>
+
+            {chats.length > 0 && (
+              <TableContainer>
+                <Table size="small">
+                  <TableHead>
+                    <TableRow>
+                      <TableCell>会话</TableCell>
+                      <TableCell align="right">样本数</TableCell>
+                      <TableCell align="right">平均构建耗时 (ms)</TableCell>
+                      <TableCell align="right">平均 Token</TableCell>
+                    </TableRow>
+                  </TableHead>
+                  <TableBody>
+                    {chats.map(chat => (
+                      <TableRow key={chat.chat_key}>
+                        <TableCell>{chat.chat_key}</TableCell>
+                        <TableCell align="right">{chat.samples}</TableCell>
+                        <TableCell align="right">{chat.avg_total_ms}</TableCell>
+                        <TableCell align="right">{chat.avg_total_tokens}</TableCell>
+                      </TableRow>
+                    ))}
+                  </TableBody>
+                </Table>
+              </TableContainer>
+            )}
+          </Box>
+        )}
+      </CardContent>
+    </Card>
+  )
+}
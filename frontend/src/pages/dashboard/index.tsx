@@ -7,12 +7,14 @@ import {
   Code as CodeIcon,
   CheckCircle as CheckCircleIcon,
 } from '@mui/icons-material'
-import { dashboardApi, RealTimeDataPoint } from '../../services/api/dashboard'
+import { dashboardApi, LLMCallGroupBy, RealTimeDataPoint } from '../../services/api/dashboard'
 import { StatCard } from './components/StatCard'
 import { TrendsChart } from './components/TrendsChart'
 import { DistributionsCard } from './components/DistributionsCard'
 import { RankingList } from './components/RankingList'
 import { RealTimeStats } from './components/RealTimeStats'
+import { PromptProfileCard } from './components/PromptProfileCard'
+import { LLMCallsCard } from './components/LLMCallsCard'
 import { createEventStream } from '../../services/api/utils/stream'
 import { CARD_VARIANTS } from '../../theme/variants'
 
@@ -25,6 +27,7 @@ const DashboardContent: React.FC = () => {
   const [realTimeData, setRealTimeData] = useState<RealTimeDataPoint[]>([])
   const [granularity, setGranularity] = useState<number>(10) // 默认10分钟粒度
   const [streamCancel, setStreamCancel] = useState<(() => void) | null>(null)
+  const [llmCallGroupBy, setLLMCallGroupBy] = useState<LLMCallGroupBy>('model_group')
 
   const theme = useTheme()
   const isMobile = useMediaQuery(theme.breakpoints.down('md'))
@@ -125,6 +128,26 @@ const DashboardContent: React.FC = () => {
       }),
   })
 
+  // 查询提示词构建分段统计 (仅管理员可用)
+  const { data: promptProfile, isLoading: promptProfileLoading } = useQuery({
+    queryKey: ['dashboard-prompt-profile'],
+    queryFn: () => dashboardApi.getPromptProfile(),
+    retry: false,
+  })
+
+  // 查询 LLM 调用统计 (仅管理员可用)
+  const { data: llmCallSummary, isLoading: llmCallSummaryLoading } = useQuery({
+    queryKey: ['dashboard-llm-calls-summary', timeRange, llmCallGroupBy],
+    queryFn: () => dashboardApi.getLLMCallSummary({ time_range: timeRange, group_by: llmCallGroupBy }),
+    retry: false,
+  })
+
+  const { data: llmCallTrends, isLoading: llmCallTrendsLoading } = useQuery({
+    queryKey: ['dashboard-llm-calls-trends', timeRange],
+    queryFn: () => dashboardApi.getLLMCallTrends({ time_range: timeRange }),
+    retry: false,
+  })
+
   const handleTimeRangeChange = (_: React.SyntheticEvent, newValue: TimeRange) => {
     setTimeRange(newValue)
   }
@@ -325,6 +348,35 @@ const DashboardContent: React.FC = () => {
           <RankingList title="活跃排名" data={activeUsers} loading={usersLoading} type="users" />
         </Grid>
       </Grid>
+
+      {/* LLM 调用统计 */}
+      <Grid container spacing={2}>
+        <Grid item xs={12} lg={8}>
+          <LLMCallsCard
+            title="LLM 调用统计"
+            data={llmCallSummary}
+            loading={llmCallSummaryLoading}
+            groupBy={llmCallGroupBy}
+            onGroupByChange={setLLMCallGroupBy}
+          />
+        </Grid>
+        <Grid item xs={12} lg={4}>
+          <TrendsChart
+            title="Token 用量"
+            data={llmCallTrends}
+            loading={llmCallTrendsLoading}
+            metrics={['prompt_tokens', 'completion_tokens']}
+            timeRange={timeRange}
+          />
+        </Grid>
+      </Grid>
+
+      {/* 提示词构建分段统计 */}
+      <Grid container spacing={2}>
+        <Grid item xs={12}>
+          <PromptProfileCard title="提示词构建分析" data={promptProfile} loading={promptProfileLoading} />
+        </Grid>
+      </Grid>
     </Box>
   )
 }
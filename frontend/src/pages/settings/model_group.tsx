@@ -48,7 +48,7 @@ import {
 } from '@mui/icons-material'
 import { useQuery, useQueryClient } from '@tanstack/react-query'
 import { ModelGroupConfig } from '../../services/api/config'
-import { unifiedConfigApi } from '../../services/api/unified-config'
+import { unifiedConfigApi, ModelGroupHealth } from '../../services/api/unified-config'
 import { UNIFIED_TABLE_STYLES } from '../../theme/variants'
 import { useNotification } from '../../hooks/useNotification'
 
@@ -482,6 +482,51 @@ function EditDialog({
                 rows={3}
                 helperText="额外的请求参数 (JSON 格式)"
               />
+              <TextField
+                label="每分钟请求数上限 (RPM)"
+                type="number"
+                value={config.RPM_LIMIT ?? 0}
+                onChange={e =>
+                  setConfig({
+                    ...config,
+                    RPM_LIMIT: e.target.value ? parseInt(e.target.value) : 0,
+                  })
+                }
+                fullWidth
+                size={isSmall ? 'small' : 'medium'}
+                inputProps={{ step: 1, min: 0 }}
+                helperText="客户端限流，超出后请求排队等待，0 表示不限制"
+              />
+              <TextField
+                label="每分钟 Token 数上限 (TPM)"
+                type="number"
+                value={config.TPM_LIMIT ?? 0}
+                onChange={e =>
+                  setConfig({
+                    ...config,
+                    TPM_LIMIT: e.target.value ? parseInt(e.target.value) : 0,
+                  })
+                }
+                fullWidth
+                size={isSmall ? 'small' : 'medium'}
+                inputProps={{ step: 1, min: 0 }}
+                helperText="按估算 Token 数限流，0 表示不限制"
+              />
+              <TextField
+                label="最大并发请求数"
+                type="number"
+                value={config.MAX_CONCURRENCY ?? 0}
+                onChange={e =>
+                  setConfig({
+                    ...config,
+                    MAX_CONCURRENCY: e.target.value ? parseInt(e.target.value) : 0,
+                  })
+                }
+                fullWidth
+                size={isSmall ? 'small' : 'medium'}
+                inputProps={{ step: 1, min: 0 }}
+                helperText="同时进行中的请求数上限，0 表示不限制"
+              />
             </Stack>
           )}
 
@@ -545,6 +590,38 @@ export default function ModelGroupsPage() {
     queryFn: () => unifiedConfigApi.getModelTypes(),
   })
 
+  // 获取模型组健康状态，定期刷新
+  const { data: modelGroupsHealth = {} } = useQuery({
+    queryKey: ['model-groups-health'],
+    queryFn: () => unifiedConfigApi.getModelGroupsHealth(),
+    refetchInterval: 10000,
+  })
+
+  // 熔断状态显示
+  const getHealthChip = (health?: ModelGroupHealth) => {
+    if (!health || health.state === 'closed') return null
+    const isOpen = health.state === 'open'
+    return (
+      <Tooltip
+        title={`近期错误率 ${(health.error_rate * 100).toFixed(0)}%${health.last_error ? ` | ${health.last_error}` : ''}`}
+      >
+        <Chip
+          label={isOpen ? '熔断中' : '探测中'}
+          size="small"
+          color={isOpen ? 'error' : 'warning'}
+          sx={{
+            mt: 0.5,
+            height: isSmall ? 18 : 20,
+            fontSize: isSmall ? '0.6rem' : '0.7rem',
+            '& .MuiChip-label': {
+              px: isSmall ? 0.5 : 0.75,
+            },
+          }}
+        />
+      </Tooltip>
+    )
+  }
+
   // 获取模型类型的显示名称
   const getModelTypeLabel = (type: string | undefined) => {
     if (!type) return '聊天'
@@ -831,6 +908,7 @@ export default function ModelGroupsPage() {
                     >
                       {name}
                     </Typography>
+                    {getHealthChip(modelGroupsHealth[name])}
                   </TableCell>
                   <TableCell
                     sx={{
@@ -54,6 +54,60 @@ export interface DistributionsResponse {
   message_type: DistributionItem[]
 }
 
+// 提示词构建阶段聚合统计接口
+export interface PromptSectionAggregate {
+  samples: number
+  avg_ms: number
+  max_ms: number
+  avg_chars: number
+  avg_tokens: number
+  max_tokens: number
+}
+
+// 会话提示词统计接口
+export interface PromptProfileChat {
+  chat_key: string
+  samples: number
+  avg_total_ms: number
+  avg_total_tokens: number
+  last_time: number
+}
+
+// 提示词构建分段统计响应接口
+export interface PromptProfileResponse {
+  sections: Record<string, PromptSectionAggregate>
+  chats?: PromptProfileChat[]
+}
+
+// LLM 调用聚合统计项接口
+export interface LLMCallSummaryItem {
+  key: string
+  calls: number
+  success: number
+  errors: number
+  error_rate: number
+  prompt_tokens: number
+  completion_tokens: number
+  p50_first_token_ms: number
+  p95_first_token_ms: number
+  p50_total_ms: number
+  p95_total_ms: number
+  retries: number
+  fallbacks: number
+}
+
+// LLM 调用聚合统计响应接口
+export interface LLMCallSummaryResponse {
+  items: LLMCallSummaryItem[]
+  ledger: {
+    queue_size: number
+    written_count: number
+    dropped_count: number
+  }
+}
+
+export type LLMCallGroupBy = 'model_group' | 'model' | 'chat_key' | 'source' | 'call_type'
+
 // 仪表盘API服务
 export const dashboardApi = {
   // 获取概览数据
@@ -90,6 +144,27 @@ export const dashboardApi = {
     return response.data.data
   },
 
+  // 获取提示词构建分段统计
+  getPromptProfile: async (params: { chat_key?: string } = {}): Promise<PromptProfileResponse> => {
+    const response = await axios.get<ApiResponse<PromptProfileResponse>>('/dashboard/prompt-profile', { params })
+    return response.data.data
+  },
+
+  // 获取 LLM 调用聚合统计
+  getLLMCallSummary: async (params: {
+    time_range: string
+    group_by?: LLMCallGroupBy
+  }): Promise<LLMCallSummaryResponse> => {
+    const response = await axios.get<ApiResponse<LLMCallSummaryResponse>>('/dashboard/llm-calls/summary', { params })
+    return response.data.data
+  },
+
+  // 获取 LLM 调用趋势
+  getLLMCallTrends: async (params: { time_range: string }): Promise<TrendDataPoint[]> => {
+    const response = await axios.get<ApiResponse<TrendDataPoint[]>>('/dashboard/llm-calls/trends', { params })
+    return response.data.data
+  },
+
   // 创建实时统计数据流
   createStatsStream: (onMessage: (data: string) => void, granularity: number = 10) => {
     return createEventStream({
@@ -5,6 +5,16 @@ export interface BatchUpdateConfigRequest {
   configs: Record<string, string>
 }
 
+export interface ModelGroupHealth {
+  name: string
+  state: 'closed' | 'open' | 'half_open'
+  error_rate: number
+  avg_latency_ms: number
+  recent_requests: number
+  opened_at: number | null
+  last_error: string
+}
+
 export interface ConfigInfo {
   config_key: string
   config_class: string
@@ -68,6 +78,14 @@ export const unifiedConfigApi = {
     return response.data.data
   },
 
+  // 获取模型组健康状态
+  getModelGroupsHealth: async (): Promise<Record<string, ModelGroupHealth>> => {
+    const response = await axios.get<{ data: Record<string, ModelGroupHealth> }>(
+      '/config/model-groups/health'
+    )
+    return response.data.data
+  },
+
   // 获取模型类型列表（兼容性API）
   getModelTypes: async (): Promise<ModelTypeOption[]> => {
     const response = await axios.get<{ data: ModelTypeOption[] }>('/config/model-types')
@@ -51,6 +51,12 @@ export const metricColors: Record<string, string> = {
   get success_rate() { 
     return getCurrentExtendedPalette().secondary.main 
   },
+  get prompt_tokens() {
+    return getCurrentExtendedPalette().primary.main
+  },
+  get completion_tokens() {
+    return getCurrentExtendedPalette().warning
+  },
 }
 
 // UI元素样式生成器对象
@@ -432,6 +438,8 @@ export const metricNames = {
   success_calls: '成功调用',
   failed_calls: '失败调用',
   success_rate: '成功率',
+  prompt_tokens: '输入 Token',
+  completion_tokens: '输出 Token',
 }
 
 // 导出兼容旧常量
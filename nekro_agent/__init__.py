@@ -13,9 +13,18 @@ from nekro_agent.core.config import config
 from nekro_agent.core.database import init_db
 from nekro_agent.core.logger import logger
 from nekro_agent.routers import mount_api_routes, mount_middlewares
+from nekro_agent.services.agent.templates.base import env as prompt_env
+from nekro_agent.services.agent.templates.base import precompile_templates
+from nekro_agent.services.chat_lease import chat_lease_manager
+from nekro_agent.services.embedding_service import embedding_service
 from nekro_agent.services.festival_service import festival_service
+from nekro_agent.services.llm_ledger import llm_call_ledger
 from nekro_agent.services.mail.mail_service import send_bot_status_email
+from nekro_agent.services.media_ingestion import media_ingestion
+from nekro_agent.services.message_buffer import message_write_buffer
 from nekro_agent.services.plugin.collector import init_plugins
+from nekro_agent.services.prompt_log_writer import prompt_log_writer
+from nekro_agent.services.summary_service import chat_summary_service
 from nekro_agent.services.timer_service import timer_service
 from nekro_agent.systems.cloud.scheduler import start_telemetry_task
 
@@ -46,6 +55,9 @@ async def on_startup():
     # 启动时不再挂载主路由，它们已在启动前挂载完毕
     app = get_app()
 
+    # 预编译提示词模板
+    logger.info(f"提示词模板预编译完成，共 {precompile_templates(prompt_env)} 个模板")
+
     # 初始化数据库、适配器和插件
     await init_db()
     await init_adapters(app)
@@ -75,6 +87,13 @@ async def on_startup():
     await timer_service.start()
     logger.info("Timer service initialized")
 
+    await message_write_buffer.start()
+    await chat_summary_service.start()
+    await prompt_log_writer.start()
+    await llm_call_ledger.start()
+    await chat_lease_manager.start()
+    await media_ingestion.start()
+
     # 初始化节日提醒
     await festival_service.init_festivals()
     logger.info("Festival service initialized")
@@ -85,7 +104,14 @@ async def on_startup():
 
 @get_driver().on_shutdown
 async def on_shutdown():
+    await message_write_buffer.stop()
     await timer_service.stop()
+    await chat_lease_manager.stop()
+    await media_ingestion.stop()
+    await chat_summary_service.stop()
+    await prompt_log_writer.stop()
+    await llm_call_ledger.stop()
+    await embedding_service.stop()
     await cleanup_adapters(get_app())
 
     try:
@@ -3,7 +3,7 @@ import hashlib
 import re
 from typing import Dict, List, Optional, Type
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment
 from pydantic import Field
 
 from nekro_agent.adapters.bilibili_live.templates.practice import (
@@ -34,7 +34,10 @@ from nekro_agent.schemas.chat_message import (
     ChatMessageSegmentType,
     ChatType,
 )
-from nekro_agent.services.agent.templates.base import PromptTemplate
+from nekro_agent.services.agent.templates.base import (
+    PromptTemplate,
+    create_template_env,
+)
 from nekro_agent.tools.common_util import (
     copy_to_upload_dir,
     download_file,
@@ -42,6 +45,8 @@ from nekro_agent.tools.common_util import (
 
 from .core.client import BilibiliWebSocketClient, Danmaku
 
+_dialog_example_env = create_template_env("nekro_agent/adapters/bilibili_live/templates")
+
 
 class BilibiliLiveConfig(BaseAdapterConfig):
     """Bilibili 适配器配置"""
@@ -133,7 +138,7 @@ class BilibiliLiveAdapter(BaseAdapter[BilibiliLiveConfig]):
 
     async def get_jinja_env(self) -> Optional[Environment]:
         """返回jinja模板"""
-        return Environment(loader=FileSystemLoader("nekro_agent/adapters/bilibili_live/templates"), auto_reload=False)
+        return _dialog_example_env
 
     async def _handle_danmaku_message(self, client: BilibiliWebSocketClient, danmaku: Danmaku) -> None:
         """处理弹幕消息"""
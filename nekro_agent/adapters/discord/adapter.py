@@ -174,10 +174,13 @@ class DiscordAdapter(BaseAdapter[DiscordConfig]):
     async def set_message_reaction(self, message_id: str, status: bool = True) -> bool:
         """为消息添加或移除反应"""
         from nekro_agent.models.db_chat_message import DBChatMessage
+        from nekro_agent.services.message_buffer import message_write_buffer
 
         try:
-            # 1. 通过 message_id 反向查询数据库获取 chat_key
-            db_message = await DBChatMessage.get_or_none(message_id=message_id)
+            # 1. 通过 message_id 反向查询数据库 (或尚未写入的消息缓冲) 获取 chat_key
+            db_message = message_write_buffer.find_by_message_id(message_id) or await DBChatMessage.get_or_none(
+                message_id=message_id,
+            )
             if not db_message:
                 logger.warning(f"Reaction failed: Message with ID {message_id} not found in DB.")
                 return False
@@ -61,6 +61,12 @@ class DiscordClient:
         @self._client.event
         async def on_ready():
             logger.success(f"Discord Bot is ready. Logged in as {self._client.user}")
+            self._adapter.invalidate_self_info()
+
+        @self._client.event
+        async def on_user_update(_before: discord.User, after: discord.User):
+            if self._client.user and after.id == self._client.user.id:
+                self._adapter.invalidate_self_info()
 
         @self._client.event
         async def on_message(message: discord.Message):
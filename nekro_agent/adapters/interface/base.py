@@ -1,3 +1,4 @@
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Dict, Generic, List, Optional, Tuple, Type, TypeVar, cast
@@ -46,6 +47,10 @@ class BaseAdapterConfig(ConfigBase):
     )
 
 
+# 自身信息缓存的有效期 (秒)，机器人账号信息几乎不会变化，缓存过期仅用于兜底资料修改
+SELF_INFO_CACHE_TTL: float = 3600
+
+
 # 定义配置类型变量，约束为 BaseAdapterConfig 子类
 TConfig = TypeVar("TConfig", bound=BaseAdapterConfig)
 T = TypeVar("T", bound="BaseAdapter")
@@ -62,6 +67,7 @@ class BaseAdapter(Generic[TConfig], ABC):
         self._Configs = config_cls
         self._adapter_config_path = Path(OsEnv.DATA_DIR) / "configs" / self.key / "config.yaml"
         self._config = self.get_config(self._Configs)
+        self._self_info_cache: Dict[str, Tuple[float, PlatformUser]] = {}  # 账号标识 -> (过期时间, 自身信息)
 
         # 注册配置到统一配置系统
         from nekro_agent.core.core_utils import ConfigManager
@@ -159,6 +165,34 @@ class BaseAdapter(Generic[TConfig], ABC):
         """获取自身信息"""
         raise NotImplementedError
 
+    def get_self_info_cache_key(self) -> str:
+        """自身信息缓存的账号标识
+
+        适配器连接的机器人账号可能变化时 (如多个客户端、重新登录)，应返回能区分当前账号的标识，账号变化后自动重新获取自身信息
+        """
+        return ""
+
+    async def get_cached_self_info(self) -> PlatformUser:
+        """获取自身信息 (缓存)
+
+        按账号标识缓存 `get_self_info` 的结果，消息收发路径上应使用此方法，避免每条消息都请求协议端
+        """
+        cache_key = self.get_self_info_cache_key()
+        cached = self._self_info_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        self_info = await self.get_self_info()
+        if self_info.user_id:  # 协议端未就绪时返回的空信息不缓存
+            # 只保留当前账号标识的缓存，避免标识 (如客户端 ID) 不断变化时缓存无限增长
+            if cache_key not in self._self_info_cache:
+                self._self_info_cache.clear()
+            self._self_info_cache[cache_key] = (time.monotonic() + SELF_INFO_CACHE_TTL, self_info)
+        return self_info
+
+    def invalidate_self_info(self) -> None:
+        """使自身信息缓存失效，适配器在连接建立、账号资料变更时调用"""
+        self._self_info_cache.clear()
+
     @abstractmethod
     async def get_user_info(self, user_id: str, channel_id: str) -> PlatformUser:
         """获取用户(或者群聊用户)信息"""
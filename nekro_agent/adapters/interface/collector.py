@@ -49,12 +49,11 @@ async def collect_message(
             ),
         )
 
-        if not ret:
-            logger.error(f"注册用户失败: {platform_user.user_name} - {platform_user.user_id}")
-            return
-
+        # 并发注册失败时用户已由其他消息创建，重新查询即可
         user = await DBUser.get_by_union_id(adapter_key=adapter.key, platform_userid=platform_user.user_id)
-        assert user
+        if not user:
+            logger.error(f"注册用户失败: {platform_user.user_name} - {platform_user.user_id} | {ret.msg}")
+            return
 
     if not user.is_active:
         logger.info(f"用户 {platform_user.user_id} 被封禁，封禁结束时间: {user.ban_until}")
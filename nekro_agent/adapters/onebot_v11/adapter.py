@@ -231,6 +231,13 @@ class OnebotV11Adapter(BaseAdapter[OnebotV11Config]):
         logger.debug(f"发送消息成功: {ret}")
         return str(ret.get("message_id", "")) or ""
 
+    def get_self_info_cache_key(self) -> str:
+        """以当前连接的机器人账号区分自身信息缓存"""
+        try:
+            return str(get_bot().self_id)
+        except RuntimeError:
+            return ""
+
     async def get_self_info(self) -> PlatformUser:
         """获取自身信息"""
         bot: Bot = get_bot()
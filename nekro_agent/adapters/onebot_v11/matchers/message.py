@@ -28,6 +28,7 @@ from nekro_agent.adapters.onebot_v11.tools.onebot_util import (
 from nekro_agent.core import config, logger
 from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_user import DBUser
+from nekro_agent.tools.common_util import get_content_matcher
 
 
 def register_matcher(adapter: BaseAdapter):
@@ -72,7 +73,7 @@ def register_matcher(adapter: BaseAdapter):
         )
         content_text, is_tome = await gen_chat_text(event=event, bot=bot, db_chat_channel=db_chat_channel)
 
-        if any(content_text.startswith(prefix) for prefix in config.AI_IGNORED_PREFIXES):
+        if get_content_matcher(config).has_ignored_prefix(content_text):
             logger.info(f"忽略前缀匹配的消息: {content_text[:32]}...")
             return
 
@@ -106,7 +107,7 @@ def register_matcher(adapter: BaseAdapter):
         user: Optional[DBUser] = await DBUser.get_or_none(adapter_key=adapter.key, platform_userid=platform_userid)
 
         if not user:
-            if platform_userid == (await adapter.get_self_info()).user_id:
+            if platform_userid == (await adapter.get_cached_self_info()).user_id:
                 return
             raise ValueError(f"用户 {platform_userid} 尚未注册，请先发送任意消息注册后即可上传文件") from None
 
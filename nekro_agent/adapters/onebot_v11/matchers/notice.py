@@ -6,6 +6,7 @@ from nonebot import on_notice
 from nonebot.adapters.onebot.v11 import Bot, NoticeEvent
 from nonebot.matcher import Matcher
 
+from nekro_agent.adapters.onebot_v11.tools.member_cache import group_member_cache
 from nekro_agent.adapters.onebot_v11.tools.onebot_util import (
     get_chat_info_old,
     get_user_name,
@@ -203,6 +204,9 @@ notice_matcher: Type[Matcher] = on_notice(priority=99999, block=False)
 async def _(_: Matcher, event: NoticeEvent, bot: Bot):
     from nekro_agent.adapters.onebot_v11.adapter import OnebotV11Adapter
 
+    # 群名片变更、成员加入 / 退出时更新群成员名称缓存
+    group_member_cache.handle_notice(dict(event))
+
     # 处理通知事件
     chat_key, chat_type = await get_chat_info_old(event=event)
     db_chat_channel: DBChatChannel = await DBChatChannel.get_channel(chat_key=chat_key)
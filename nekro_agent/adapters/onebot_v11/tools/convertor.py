@@ -114,7 +114,7 @@ async def convert_chat_message(
             if "url" in seg.data:
                 remote_url: str = seg.data["url"]
                 ret_list.append(
-                    await ChatMessageSegmentImage.create_from_url(
+                    await ChatMessageSegmentImage.create_from_url_deferred(
                         url=remote_url,
                         from_chat_key=db_chat_channel.chat_key,
                         use_suffix=suffix,
@@ -138,7 +138,7 @@ async def convert_chat_message(
         elif seg.type == "at":
             assert isinstance(ob_event, GroupMessageEvent)
             at_qq = str(seg.data["qq"])
-            bot_qq = (await adapter.get_self_info()).user_id
+            bot_qq = (await adapter.get_cached_self_info()).user_id
             if at_qq == bot_qq:
                 at_qq = bot_qq
                 is_tome = True
@@ -178,7 +178,7 @@ async def convert_chat_message(
             ChatMessageSegmentAt(
                 type=ChatMessageSegmentType.AT,
                 text="",
-                target_platform_userid=(await adapter.get_self_info()).user_id,
+                target_platform_userid=(await adapter.get_cached_self_info()).user_id,
                 target_nickname=(await db_chat_channel.get_preset()).name,
             ),
         )
@@ -0,0 +1,152 @@
+"""OneBot 群成员名称缓存
+
+按群缓存成员的群名片 / 昵称，避免每个 @ 提及都向 OneBot 实现请求一次群成员信息。
+
+- 首次查询某群成员时通过 `get_group_member_list` 整群加载，同一群并发查询只加载一次，加载结果超过有效期后重新加载，加载失败时稍后重试
+- 群名片变更、成员加入 / 退出通知与消息发送者信息会直接更新缓存
+- 列表中不存在的成员 (如刚入群) 单独查询，查询失败的成员短时间内不再重复查询
+- 所有 OneBot API 请求共享令牌桶限流，超出频率的单个成员查询直接放弃，由调用方回退显示用户 ID
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Union
+
+from nonebot.adapters.onebot.v11 import Bot
+
+from nekro_agent.core.logger import logger
+
+# 整群成员列表的有效期 (秒)
+MEMBER_LIST_TTL: float = 1800
+# 查询失败的成员 / 群在该时长 (秒) 内不再重复查询
+MEMBER_MISS_TTL: float = 60
+# OneBot API 请求频率上限 (次/秒) 与突发上限
+MEMBER_API_RATE: float = 5
+MEMBER_API_BURST: float = 10
+# 整群加载等待限流令牌的最长时间 (秒)
+MEMBER_LIST_WAIT_TIMEOUT: float = 5
+
+
+def _member_name(member_info: Dict[str, Any]) -> str:
+    return member_info.get("card") or member_info.get("nickname") or ""
+
+
+class _GroupMembers:
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.missing: Dict[str, float] = {}  # user_id -> 查询失败时间
+        self.expire_at: float = 0  # 成员列表过期时间，加载失败时为下次重试时间
+        self.loading: Optional["asyncio.Task[None]"] = None
+
+
+class GroupMemberCache:
+    """OneBot 群成员名称缓存"""
+
+    def __init__(self):
+        self._groups: Dict[str, _GroupMembers] = {}
+        self._tokens = MEMBER_API_BURST
+        self._tokens_updated_at = time.monotonic()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(MEMBER_API_BURST, self._tokens + (now - self._tokens_updated_at) * MEMBER_API_RATE)
+        self._tokens_updated_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _wait_token(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._take_token():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(1 / MEMBER_API_RATE)
+        return True
+
+    async def _load_group(self, bot: Bot, group_id: str, group: _GroupMembers) -> None:
+        group.expire_at = time.monotonic() + MEMBER_MISS_TTL
+        if not await self._wait_token(MEMBER_LIST_WAIT_TIMEOUT):
+            logger.warning(f"群成员列表请求过于频繁，暂不加载: {group_id}")
+            return
+        try:
+            member_list = await bot.get_group_member_list(group_id=int(group_id))
+        except Exception as e:
+            logger.warning(f"获取群成员列表失败: {group_id} | {e}")
+            return
+        group.names = {str(member["user_id"]): _member_name(member) for member in member_list}
+        group.missing.clear()
+        group.expire_at = time.monotonic() + MEMBER_LIST_TTL
+        logger.debug(f"已加载群成员列表: {group_id} ({len(group.names)} 人)")
+
+    async def _ensure_loaded(self, bot: Bot, group_id: str) -> _GroupMembers:
+        group = self._groups.setdefault(group_id, _GroupMembers())
+        if time.monotonic() < group.expire_at:
+            return group
+        if group.loading is None or group.loading.done():
+            group.loading = asyncio.create_task(self._load_group(bot, group_id, group))
+        await asyncio.shield(group.loading)
+        return group
+
+    async def get_name(self, bot: Bot, group_id: Union[int, str], user_id: Union[int, str]) -> Optional[str]:
+        """获取群成员的群名片或昵称，获取失败时返回 None"""
+        group_id, user_id = str(group_id), str(user_id)
+        group = await self._ensure_loaded(bot, group_id)
+        name = group.names.get(user_id)
+        if name:
+            return name
+
+        missed_at = group.missing.get(user_id)
+        if missed_at is not None and time.monotonic() - missed_at < MEMBER_MISS_TTL:
+            return None
+        if not self._take_token():
+            return None
+        try:
+            member_info = await bot.get_group_member_info(group_id=int(group_id), user_id=int(user_id), no_cache=False)
+        except Exception as e:
+            logger.warning(f"获取群成员信息失败: {group_id} - {user_id} | {e}")
+            group.missing[user_id] = time.monotonic()
+            return None
+        name = _member_name(member_info)
+        if name:
+            group.names[user_id] = name
+        return name or None
+
+    def update_member(self, group_id: Union[int, str], user_id: Union[int, str], name: str) -> None:
+        """更新已加载群的成员名称"""
+        group = self._groups.get(str(group_id))
+        if group is not None and name:
+            group.names[str(user_id)] = name
+            group.missing.pop(str(user_id), None)
+
+    def remove_member(self, group_id: Union[int, str], user_id: Union[int, str]) -> None:
+        """移除已退出群的成员"""
+        group = self._groups.get(str(group_id))
+        if group is not None:
+            group.names.pop(str(user_id), None)
+
+    def handle_notice(self, event_dict: Dict[str, Any]) -> None:
+        """根据群名片变更、成员加入 / 退出通知更新缓存"""
+        group_id = event_dict.get("group_id")
+        user_id = event_dict.get("user_id")
+        if not group_id or not user_id:
+            return
+        notice_type = event_dict.get("notice_type")
+        if notice_type == "group_card":
+            card_new = event_dict.get("card_new")
+            if card_new:
+                self.update_member(group_id, user_id, card_new)
+            else:
+                # 清空群名片后显示昵称，下次查询时重新获取
+                self.remove_member(group_id, user_id)
+        elif notice_type == "group_increase":
+            # 新成员的名称在首次查询时获取
+            group = self._groups.get(str(group_id))
+            if group is not None:
+                group.missing.pop(str(user_id), None)
+        elif notice_type == "group_decrease":
+            self.remove_member(group_id, user_id)
+
+
+# 全局群成员名称缓存实例
+group_member_cache = GroupMemberCache()
@@ -10,6 +10,7 @@ from nonebot.adapters.onebot.v11 import (
 )
 
 from nekro_agent.adapters.onebot_v11.core.bot import get_bot
+from nekro_agent.adapters.onebot_v11.tools.member_cache import group_member_cache
 from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.schemas.chat_message import ChatType
 
@@ -57,24 +58,22 @@ async def get_user_name(
     db_chat_channel: DBChatChannel,
 ) -> str:
     """获取QQ用户名"""
-    if str(user_id) == (await db_chat_channel.adapter.get_self_info()).user_id:
+    if str(user_id) == (await db_chat_channel.adapter.get_cached_self_info()).user_id:
         return (await db_chat_channel.get_preset()).name
 
     if isinstance(event, GroupMessageEvent) and event.sub_type == "anonymous" and event.anonymous:  # 匿名消息
         return f"[匿名]{event.anonymous.name}"
 
-    if isinstance(event, (GroupMessageEvent, GroupIncreaseNoticeEvent, NoticeEvent)):
+    if isinstance(event, GroupMessageEvent) and str(user_id) == str(event.user_id):
+        # 消息发送者的群名片与昵称随消息下发，无需查询
+        user_name = event.sender.card or event.sender.nickname
+        if user_name:
+            group_member_cache.update_member(event.group_id, user_id, user_name)
+    elif isinstance(event, (GroupMessageEvent, GroupIncreaseNoticeEvent, NoticeEvent)):
         group_id = getattr(event, "group_id", None)
-        if group_id:
-            user_info = await bot.get_group_member_info(
-                group_id=group_id,
-                user_id=user_id,
-                no_cache=False,
-            )
-        else:
+        if not group_id:
             raise ValueError("获取群成员信息失败")
-        user_name = user_info.get("nickname", None)
-        user_name = user_info.get("card", None) or user_name
+        user_name = await group_member_cache.get_name(bot, group_id, user_id) or str(user_id)
     else:
         user_name = (
             event.sender.nickname if not isinstance(event, GroupUploadNoticeEvent) and event.sender else event.get_user_id()
@@ -92,16 +91,11 @@ async def get_user_group_card_name(
     db_chat_channel: DBChatChannel,
 ) -> str:
     """获取用户所在群的群名片"""
-    if str(user_id) == (await db_chat_channel.adapter.get_self_info()).user_id:
+    if str(user_id) == (await db_chat_channel.adapter.get_cached_self_info()).user_id:
         return (await db_chat_channel.get_preset()).name
     if str(user_id) == "all" or str(user_id) == "0":
         return "全体成员"
-    user_info = await get_bot().get_group_member_info(
-        group_id=int(group_id),
-        user_id=int(user_id),
-        no_cache=False,
-    )
-    return user_info.get("card") or user_info.get("nickname", "未知")
+    return await group_member_cache.get_name(get_bot(), group_id, user_id) or "未知"
 
 
 async def get_chat_info(
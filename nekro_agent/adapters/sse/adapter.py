@@ -178,6 +178,10 @@ class SSEAdapter(BaseAdapter[SSEConfig]):
             logger.error(f"发送SSE消息失败: {e}")
             return PlatformSendResponse(success=False, error_message=f"发送SSE消息失败: {e!s}")
 
+    def get_self_info_cache_key(self) -> str:
+        """自身信息由已连接的客户端提供，客户端变化后重新获取"""
+        return ",".join(sorted(self.client_manager.clients))
+
     async def get_self_info(self) -> PlatformUser:
         """获取自身信息"""
         response = await self.service.get_self_info()
@@ -47,6 +47,9 @@ class ModelConfigGroup(ConfigBase):
     PRESENCE_PENALTY: Optional[float] = Field(default=None, title="提示重复惩罚")
     FREQUENCY_PENALTY: Optional[float] = Field(default=None, title="补全重复惩罚")
     EXTRA_BODY: Optional[str] = Field(default=None, title="额外参数 (JSON)")
+    RPM_LIMIT: int = Field(default=0, title="每分钟请求数上限", description="客户端限流，0 表示不限制")
+    TPM_LIMIT: int = Field(default=0, title="每分钟 Token 数上限", description="客户端限流，按估算 Token 数计算，0 表示不限制")
+    MAX_CONCURRENCY: int = Field(default=0, title="最大并发请求数", description="同时进行中的请求数上限，0 表示不限制")
 
 
 class CoreConfig(ConfigBase):
@@ -98,6 +101,21 @@ class CoreConfig(ConfigBase):
         ).model_dump(),
     )
     SAVE_PROMPTS_LOG: bool = Field(default=False, title="保存聊天提示词生成日志")
+    PROMPT_LOG_SEGMENT_MAX_MB: int = Field(
+        default=64,
+        title="提示词日志分段大小上限 (MB)",
+        description="提示词日志以压缩分段文件保存，当前分段超过该大小后创建新分段",
+    )
+    PROMPT_LOG_SEGMENT_MAX_HOURS: float = Field(
+        default=24,
+        title="提示词日志分段时长上限 (小时)",
+        description="当前分段创建超过该时长后创建新分段",
+    )
+    PROMPT_LOG_MAX_SEGMENTS: int = Field(
+        default=100,
+        title="提示词日志保留分段数",
+        description="超出数量的最旧分段将被删除，0 表示不删除",
+    )
     MAX_UPLOAD_SIZE_MB: int = Field(default=10, title="上传文件大小限制 (MB)")
     ENABLE_COMMAND_UNAUTHORIZED_OUTPUT: bool = Field(default=False, title="启用未授权命令反馈")
     DEFAULT_PROXY: str = Field(
@@ -105,6 +123,11 @@ class CoreConfig(ConfigBase):
         title="默认代理",
         json_schema_extra=ExtraField(placeholder="例: http://127.0.0.1:7890").model_dump(),
     )
+    CLUSTER_ENABLED: bool = Field(
+        default=False,
+        title="启用多实例部署",
+        description="多个实例共享同一数据库时启用，会话的 Agent 只在持有该会话租约的实例上执行，实例退出后由其他实例接管",
+    )
 
     """OpenAI API 配置"""
     MODEL_GROUPS: Dict[str, ModelConfigGroup] = Field(
@@ -210,24 +233,129 @@ class CoreConfig(ConfigBase):
         description="执行代码过程出错或者产生 Agent 反馈时，进行迭代调用允许的最大次数，增大该值可能略微增加调试成功概率，过大会造成响应时间增加、Token 消耗增加等",
         json_schema_extra=ExtraField(overridable=True).model_dump(),
     )
+    AI_RETRY_CONTEXT_MAX_BYTES: int = Field(
+        default=4096,
+        title="迭代上下文压缩字节上限",
+        description="代码执行调试 / Agent 迭代时沙盒输出与历史尝试摘要的最大字节数，超出部分会被截断 (保留结尾的错误信息)，更早的失败尝试只保留代码差异与错误摘要；设置为 0 时不压缩",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
     AI_CHAT_LLM_API_MAX_RETRIES: int = Field(
         default=3,
         title="模型 API 调用重试次数",
         description="模型组调用失败后重试次数，重试的最后一次将使用备用模型组",
         json_schema_extra=ExtraField(overridable=True).model_dump(),
     )
+    AI_HEDGE_ENABLED: bool = Field(
+        default=False,
+        title="启用对冲请求",
+        description="主模型组在对冲延迟内未返回首个 Token 时，同时向备用模型组发起相同请求，采用先开始输出的结果并取消另一个请求；建议配合流式请求使用",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_HEDGE_DELAY_PERCENTILE: float = Field(
+        default=95,
+        title="对冲延迟分位数",
+        description="以主模型组近期首 Token 耗时的该分位数作为发起对冲请求前的等待时间",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_HEDGE_MIN_DELAY_SECONDS: float = Field(
+        default=3.0,
+        title="最小对冲延迟 (秒)",
+        description="发起对冲请求前的最小等待时间，近期耗时样本不足时也使用该值",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_HEDGE_BUDGET_RATIO: float = Field(
+        default=0.1,
+        title="对冲请求比例上限",
+        description="近期请求中允许发起对冲的最大比例，避免上游整体变慢时请求量翻倍",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_MODEL_BREAKER_ENABLED: bool = Field(
+        default=True,
+        title="启用模型组熔断",
+        description="模型组近期错误率过高时暂停向其发送请求，直接使用备用模型组，熔断时长结束后放行探测请求检查是否恢复",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_MODEL_BREAKER_ERROR_RATE: float = Field(
+        default=0.5,
+        title="熔断错误率阈值",
+        description="模型组近期请求错误率达到该值时触发熔断",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_MODEL_BREAKER_MIN_REQUESTS: int = Field(
+        default=4,
+        title="熔断最少请求数",
+        description="近期请求数达到该值后才会根据错误率判断是否熔断",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_MODEL_BREAKER_OPEN_SECONDS: float = Field(
+        default=60,
+        title="熔断时长 (秒)",
+        description="模型组熔断后暂停接收请求的时长，结束后放行一个探测请求",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
     AI_DEBOUNCE_WAIT_SECONDS: float = Field(
         default=0.9,
         title="防抖等待时长 (秒)",
         description="收到触发消息时延迟指定时长再开始回复流程，防抖等待时长中继续收到的消息只会触发最后一条",
         json_schema_extra=ExtraField(overridable=True).model_dump(),
     )
+    AI_DEBOUNCE_ADAPTIVE: bool = Field(
+        default=False,
+        title="启用自适应防抖",
+        description="根据会话消息频率与 Agent 执行耗时自动调整防抖等待时长，私聊与低频会话尽快回复，密集群聊延长等待以合并消息",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_DEBOUNCE_MIN_WAIT_SECONDS: float = Field(
+        default=0.3,
+        title="自适应防抖最短等待时长 (秒)",
+        description="私聊与低频会话使用的防抖等待时长",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_DEBOUNCE_MAX_WAIT_SECONDS: float = Field(
+        default=5,
+        title="自适应防抖最长等待时长 (秒)",
+        description="消息密集的会话防抖等待时长上限",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+    )
+    AI_AGENT_MAX_CONCURRENT: int = Field(
+        default=0,
+        title="Agent 最大并发执行数",
+        description="所有会话同时执行的 Agent 数量上限，超出时按优先级排队 (提及 > 关键词触发 > 随机回复)，0 表示不限制",
+    )
+    AI_AGENT_QUEUE_MAX_SIZE: int = Field(
+        default=100,
+        title="Agent 排队数上限",
+        description="达到并发上限后等待执行的 Agent 数量上限，队列已满时优先丢弃优先级最低的请求；随机回复不排队，直接丢弃",
+    )
+    AI_AGENT_QUEUE_TIMEOUT: float = Field(
+        default=120,
+        title="Agent 排队超时时间 (秒)",
+        description="排队超过该时长仍未开始执行的请求将被丢弃，0 表示不限制",
+    )
+    AI_AGENT_QUEUED_NOTICE: str = Field(
+        default="",
+        title="排队提示消息",
+        description="提及或私聊触发的请求需要排队时发送的提示消息，留空则不提示",
+        json_schema_extra=ExtraField(placeholder="例: 当前请求较多，正在排队处理中~").model_dump(),
+    )
+    AI_AGENT_SHED_NOTICE: str = Field(
+        default="",
+        title="过载丢弃提示消息",
+        description="提及或私聊触发的请求因过载被丢弃时发送的提示消息，留空则不提示",
+        json_schema_extra=ExtraField(placeholder="例: 当前请求过多，请稍后再试~").model_dump(),
+    )
     AI_GENERATE_TIMEOUT: int = Field(
         default=180,
         title="AI 对话内容生成超时时间 (秒)",
         json_schema_extra=ExtraField(overridable=True).model_dump(),
         description="AI 大模型生成响应结果的最大等待时间，超过该时间会自动停止生成并报错",
     )
+    AI_PLUGIN_PROMPT_RENDER_TIMEOUT: float = Field(
+        default=5.0,
+        title="插件提示注入渲染超时时间 (秒)",
+        json_schema_extra=ExtraField(overridable=True).model_dump(),
+        description="单个插件渲染注入提示词的最大等待时间，超时的插件本次回复将省略其注入内容",
+    )
     AI_IGNORED_PREFIXES: List[str] = Field(
         default=["#", "＃", "[Debug]", "[Opt Output]"],
         title="忽略的消息前缀",
@@ -302,6 +430,34 @@ class CoreConfig(ConfigBase):
         description="启用后 AI 会以流式请求方式返回响应，再合并解析，这可能解决某些 LLM 请求异常的问题，但是会丢失准确的 Token 统计信息",
     )
 
+    """会话摘要配置"""
+    AI_SUMMARY_ENABLED: bool = Field(
+        default=False,
+        title="启用会话滚动摘要",
+        description="启用后会在后台为活跃会话维护滚动摘要，并以精简摘要替代超出上下文窗口的更早历史记录，可配合更小的 `聊天上下文最大条数` 使用",
+    )
+    AI_SUMMARY_MODEL_GROUP: str = Field(
+        default="default",
+        title="会话摘要模型组",
+        json_schema_extra=ExtraField(ref_model_groups=True, model_type="chat").model_dump(),
+        description="用于生成会话摘要的模型组，建议使用响应快、价格低的模型",
+    )
+    AI_SUMMARY_TRIGGER_MESSAGES: int = Field(
+        default=50,
+        title="会话摘要触发消息条数",
+        description="会话自上次摘要后新增消息达到该条数时触发后台摘要",
+    )
+    AI_SUMMARY_TRIGGER_TOKENS: int = Field(
+        default=6000,
+        title="会话摘要触发 Token 数",
+        description="会话自上次摘要后新增消息估算 Token 数达到该值时触发后台摘要",
+    )
+    AI_SUMMARY_MAX_LENGTH: int = Field(
+        default=800,
+        title="会话摘要最大长度 (字符)",
+        description="生成的会话摘要最大长度，超出部分会被截断",
+    )
+
     """会话设置"""
     SESSION_GROUP_ACTIVE_DEFAULT: bool = Field(default=True, title="新群聊默认启用聊天")
     SESSION_PRIVATE_ACTIVE_DEFAULT: bool = Field(default=True, title="新私聊默认启用聊天")
@@ -1,3 +1,4 @@
+import itertools
 import json
 import os
 import re
@@ -154,6 +155,9 @@ class ConfigManager:
 
 T_ConfigBase = TypeVar("T_ConfigBase", bound="ConfigBase")
 
+# 全局递增的配置版本号，不同实例的版本号互不相同
+_config_version_counter = itertools.count(1)
+
 
 class ConfigBase(BaseModel):
     # 类变量用于存储配置元数据
@@ -162,6 +166,21 @@ class ConfigBase(BaseModel):
 
     # 实例变量，用于动态配置
     _config_file_path: Optional[Path] = PrivateAttr(default=None)
+    _config_version: int = PrivateAttr(default_factory=lambda: next(_config_version_counter))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self.__class__.model_fields:
+            self.bump_version()
+
+    @property
+    def config_version(self) -> int:
+        """配置版本号，字段被修改或配置被保存时变化，可用于缓存依赖该配置的计算结果"""
+        return self._config_version
+
+    def bump_version(self) -> None:
+        """更新配置版本号，原地修改可变字段 (如字典、列表) 后需手动调用"""
+        self._config_version = next(_config_version_counter)
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -304,6 +323,8 @@ class ConfigBase(BaseModel):
                 f"配置文件路径未设置，请调用 {self.__class__.__name__}.set_config_file_path() 或提供 file_path 参数",
             )
 
+        # 保存前可能原地修改过可变字段，保存时总是更新版本号
+        self.bump_version()
         target_path.parent.mkdir(parents=True, exist_ok=True)
 
         if target_path.suffix == ".json":
@@ -1,3 +1,5 @@
+from typing import List, Tuple
+
 from tortoise import Tortoise
 from tzlocal import get_localzone
 
@@ -48,10 +50,32 @@ async def init_db():
         await Tortoise.generate_schemas()
     except Exception:
         logger.error("初始化数据表失败，如果应用行为异常，请使用 `/nekro_db_reset -y` 重建数据表")
+    await migrate_indexes()
     DB_INITED = True
     logger.success("Nekro Agent 数据库初始化成功 =^_^=")
 
 
+# 新增到已有数据表上的唯一约束: (表名, 字段列表)
+# `generate_schemas` 只会创建不存在的数据表，已有数据表上的约束需要单独补充
+UNIQUE_INDEX_MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("user", ["adapter_key", "platform_userid"]),
+]
+
+
+async def migrate_indexes():
+    """为已有数据表补充模型新增的唯一约束"""
+    conn = Tortoise.get_connection("default")
+    schema_generator = conn.schema_generator(conn)
+    for table_name, field_names in UNIQUE_INDEX_MIGRATIONS:
+        # 使用与模型约束相同的索引名，新建的数据表已有该索引时跳过
+        index_name = schema_generator._generate_index_name("uid", table_name, field_names)  # noqa: SLF001
+        fields_sql = ", ".join(f'"{field_name}"' for field_name in field_names)
+        try:
+            await conn.execute_script(f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({fields_sql})')
+        except Exception as e:
+            logger.warning(f"创建数据表 {table_name} 的唯一索引 ({fields_sql}) 失败，请检查并清理重复记录: {e}")
+
+
 async def reset_db(table_name: str = ""):
     """重置数据库
     Args:
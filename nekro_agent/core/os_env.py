@@ -74,6 +74,7 @@ NAPCAT_TEMPFILE_DIR: str = OsEnv.DATA_DIR + "/napcat_data/QQ/NapCat/temp"
 NAPCAT_ONEBOT_ADAPTER_DIR: str = OsEnv.DATA_DIR + "/napcat_data/napcat"
 EXT_WORKDIR: str = OsEnv.DATA_DIR + "/ext_workdir"
 WALLPAPER_DIR: str = OsEnv.DATA_DIR + "/wallpapers"
+JINJA_BYTECODE_CACHE_DIR: str = OsEnv.DATA_DIR + "/.cache/jinja"
 ONEBOT_ACCESS_TOKEN: str = os.getenv("ONEBOT_ACCESS_TOKEN", "")
 
 
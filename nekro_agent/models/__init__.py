@@ -1,6 +1,10 @@
 from .db_chat_channel import DBChatChannel
+from .db_chat_lease import DBChatLease
 from .db_chat_message import DBChatMessage
+from .db_chat_summary import DBChatSummary
+from .db_embedding_cache import DBEmbeddingCache
 from .db_exec_code import DBExecCode
+from .db_llm_call import DBLLMCall
 from .db_plugin_data import DBPluginData
 from .db_preset import DBPreset
 from .db_user import DBUser
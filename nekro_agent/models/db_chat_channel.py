@@ -1,9 +1,11 @@
 import json
+from collections.abc import Iterable
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional, Union
 
 from pydantic import BaseModel
 from tortoise import fields
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.models import Model
 
 from nekro_agent.adapters.utils import adapter_utils
@@ -11,6 +13,7 @@ from nekro_agent.core import config
 from nekro_agent.core.logger import logger
 from nekro_agent.models.db_preset import DBPreset
 from nekro_agent.schemas.chat_message import ChatType
+from nekro_agent.services.channel_cache import channel_cache
 from nekro_agent.services.config_resolver import config_resolver
 from nekro_agent.services.plugin.collector import plugin_collector
 
@@ -45,11 +48,25 @@ class DBChatChannel(Model):
     create_time = fields.DatetimeField(auto_now_add=True, description="创建时间")
     update_time = fields.DatetimeField(auto_now=True, description="更新时间")
 
-    _effective_config: Optional["CoreConfig"] = None
-
     class Meta:  # type: ignore
         table = "chat_channel"
 
+    async def save(
+        self,
+        using_db: Optional[BaseDBAsyncClient] = None,
+        update_fields: Optional[Iterable[str]] = None,
+        force_create: bool = False,
+        force_update: bool = False,
+    ) -> None:
+        await super().save(using_db=using_db, update_fields=update_fields, force_create=force_create, force_update=force_update)
+        # 以保存后的实例替换缓存，后续读取方不会拿到旧的频道记录
+        channel_cache.invalidate_channel(self.chat_key)
+        channel_cache.channels.set(self.chat_key, self)
+
+    async def delete(self, using_db: Optional[BaseDBAsyncClient] = None) -> None:
+        await super().delete(using_db=using_db)
+        channel_cache.invalidate_channel(self.chat_key)
+
     @classmethod
     async def get_or_create(
         cls,
@@ -59,7 +76,13 @@ class DBChatChannel(Model):
         channel_name: str = "",
     ) -> "DBChatChannel":
         """获取或创建聊天频道"""
-        channel = await cls.get_or_none(adapter_key=adapter_key, channel_id=channel_id)
+        chat_key = f"{adapter_key}-{channel_id}"
+        channel = channel_cache.channels.get(chat_key)
+        if not channel:
+            version = channel_cache.channels.version
+            channel = await cls.get_or_none(adapter_key=adapter_key, channel_id=channel_id)
+            if channel:
+                channel_cache.channels.set(chat_key, channel, version)
         if not channel:
             is_active = (channel_type == ChatType.GROUP and config.SESSION_GROUP_ACTIVE_DEFAULT) or (
                 channel_type == ChatType.PRIVATE and config.SESSION_PRIVATE_ACTIVE_DEFAULT
@@ -69,7 +92,7 @@ class DBChatChannel(Model):
                 channel_id=channel_id,
                 channel_type=channel_type.value,
                 channel_name=channel_name,
-                chat_key=f"{adapter_key}-{channel_id}",
+                chat_key=chat_key,
                 is_active=is_active,
                 data=json.dumps({}),
             )
@@ -88,9 +111,14 @@ class DBChatChannel(Model):
     async def get_channel(cls, chat_key: str) -> "DBChatChannel":
         """获取聊天频道"""
         assert chat_key, "获取聊天频道失败，chat_key 为空"
+        channel = channel_cache.channels.get(chat_key)
+        if channel:
+            return channel
+        version = channel_cache.channels.version
         channel = await cls.get_or_none(chat_key=chat_key)
         if not channel:
             raise ValueError(f"聊天频道不存在: {chat_key}")
+        channel_cache.channels.set(chat_key, channel, version)
         return channel
 
     async def sync_channel_name(self):
@@ -111,9 +139,13 @@ class DBChatChannel(Model):
     async def reset_channel(self):
         """重置聊天频道"""
         from nekro_agent.schemas.agent_ctx import AgentCtx
+        from nekro_agent.services.message_buffer import message_write_buffer
+        from nekro_agent.services.summary_service import chat_summary_service
 
+        await message_write_buffer.flush()  # 确保缓冲中的消息已写入，避免重置后被清理遗漏
         self.conversation_start_time = datetime.now()  # 重置对话起始时间
         await self.save()
+        await chat_summary_service.reset_channel(self.chat_key)
 
         # 执行重置回调
         await plugin_collector.chat_channel_on_reset(await AgentCtx.create_by_chat_key(chat_key=self.chat_key))
@@ -134,7 +166,14 @@ class DBChatChannel(Model):
 
     async def get_preset(self) -> Union[DBPreset, DefaultPreset]:
         """获取人设"""
-        preset = await DBPreset.get_or_none(id=self.preset_id)
+        preset = None
+        if self.preset_id is not None:
+            preset = channel_cache.presets.get(self.preset_id)
+            if not preset:
+                version = channel_cache.presets.version
+                preset = await DBPreset.get_or_none(id=self.preset_id)
+                if preset:
+                    channel_cache.presets.set(self.preset_id, preset, version)
         if not preset:
             return DefaultPreset(name=config.AI_CHAT_PRESET_NAME, content=config.AI_CHAT_PRESET_SETTING)
         return preset
@@ -145,6 +184,4 @@ class DBChatChannel(Model):
         return adapter_utils.get_adapter(self.adapter_key)
 
     async def get_effective_config(self) -> "CoreConfig":
-        if self._effective_config is None:
-            self._effective_config = await config_resolver.get_effective_config(self.chat_key)
-        return self._effective_config
+        return await config_resolver.get_effective_config(self.chat_key)
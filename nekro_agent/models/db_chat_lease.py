@@ -0,0 +1,17 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DBChatLease(Model):
+    """数据库会话归属租约模型"""
+
+    id = fields.IntField(pk=True, generated=True, description="ID")
+    chat_key = fields.CharField(max_length=64, unique=True, description="会话唯一标识")
+    owner_id = fields.CharField(max_length=128, index=True, description="持有租约的实例标识")
+    expire_time = fields.DatetimeField(description="租约过期时间")
+    trigger_pending = fields.BooleanField(default=False, description="是否有其他实例转交的待执行触发")
+
+    update_time = fields.DatetimeField(auto_now=True, description="更新时间")
+
+    class Meta:  # type: ignore
+        table = "chat_lease"
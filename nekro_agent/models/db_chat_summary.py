@@ -0,0 +1,20 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DBChatSummary(Model):
+    """数据库会话滚动摘要模型"""
+
+    id = fields.IntField(pk=True, generated=True, description="ID")
+    chat_key = fields.CharField(max_length=64, unique=True, description="会话唯一标识")
+    summary = fields.TextField(description="摘要内容")
+
+    last_message_db_id = fields.IntField(default=0, description="已摘要的最后一条消息数据库 ID")
+    last_message_timestamp = fields.IntField(default=0, description="已摘要的最后一条消息发送时间戳")
+    summarized_count = fields.IntField(default=0, description="累计摘要消息条数")
+
+    create_time = fields.DatetimeField(auto_now_add=True, description="创建时间")
+    update_time = fields.DatetimeField(auto_now=True, description="更新时间")
+
+    class Meta:  # type: ignore
+        table = "chat_summary"
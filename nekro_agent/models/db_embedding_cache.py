@@ -0,0 +1,18 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DBEmbeddingCache(Model):
+    """数据库文本向量缓存模型"""
+
+    id = fields.IntField(pk=True, generated=True, description="ID")
+    model = fields.CharField(max_length=128, description="向量模型名称")
+    dimensions = fields.IntField(description="向量维度")
+    text_hash = fields.CharField(max_length=64, description="文本 SHA-256 摘要")
+    vector = fields.BinaryField(description="向量数据 (float32)")
+
+    create_time = fields.DatetimeField(auto_now_add=True, description="创建时间")
+
+    class Meta:  # type: ignore
+        table = "embedding_cache"
+        unique_together = (("model", "dimensions", "text_hash"),)
@@ -0,0 +1,31 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class DBLLMCall(Model):
+    """数据库 LLM 调用记录模型"""
+
+    id = fields.IntField(pk=True, generated=True, description="ID")
+    call_type = fields.CharField(max_length=16, default="chat", description="调用类型 (chat / embedding)")
+    source = fields.CharField(max_length=64, default="", index=True, description="调用来源")
+    model_group = fields.CharField(max_length=128, default="", index=True, description="模型组")
+    model = fields.CharField(max_length=128, default="", description="模型名称")
+    chat_key = fields.CharField(max_length=64, default="", index=True, description="会话唯一标识")
+
+    prompt_tokens = fields.IntField(default=0, description="输入 Token 数")
+    completion_tokens = fields.IntField(default=0, description="输出 Token 数")
+    first_token_ms = fields.IntField(default=0, description="首 Token 耗时(毫秒)")
+    total_ms = fields.IntField(default=0, description="总耗时(毫秒)")
+    queue_ms = fields.IntField(default=0, description="限流排队耗时(毫秒)")
+
+    retry_index = fields.IntField(default=0, description="重试序号")
+    is_fallback = fields.BooleanField(default=False, description="是否使用备用模型组")
+    is_hedge = fields.BooleanField(default=False, description="是否为对冲请求")
+    stream_mode = fields.BooleanField(default=False, description="是否为流式请求")
+    outcome = fields.CharField(max_length=16, default="success", description="调用结果")
+    error_type = fields.CharField(max_length=128, default="", description="错误类型")
+
+    create_time = fields.DatetimeField(auto_now_add=True, index=True, description="创建时间")
+
+    class Meta:  # type: ignore
+        table = "llm_call"
@@ -1,8 +1,13 @@
+from collections.abc import Iterable
 from enum import IntEnum
+from typing import Optional
 
 from tortoise import fields
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.models import Model
 
+from nekro_agent.services.channel_cache import channel_cache
+
 
 class DBPreset(Model):
     """数据库预设模型"""
@@ -26,3 +31,17 @@ class DBPreset(Model):
 
     class Meta:
         table = "presets"
+
+    async def save(
+        self,
+        using_db: Optional[BaseDBAsyncClient] = None,
+        update_fields: Optional[Iterable[str]] = None,
+        force_create: bool = False,
+        force_update: bool = False,
+    ) -> None:
+        await super().save(using_db=using_db, update_fields=update_fields, force_create=force_create, force_update=force_update)
+        channel_cache.invalidate_preset(self.id)
+
+    async def delete(self, using_db: Optional[BaseDBAsyncClient] = None) -> None:
+        await super().delete(using_db=using_db)
+        channel_cache.invalidate_preset(self.id)
@@ -1,10 +1,14 @@
+from collections.abc import Iterable
 from datetime import datetime
 from typing import Optional
 from zoneinfo import ZoneInfo
 
 from tortoise import fields
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.models import Model
 
+from nekro_agent.services.channel_cache import channel_cache
+
 
 class DBUser(Model):
     """数据库用户模型"""
@@ -59,8 +63,33 @@ class DBUser(Model):
 
     class Meta:  # type: ignore
         table = "user"
+        unique_together = (("adapter_key", "platform_userid"),)
+
+    async def save(
+        self,
+        using_db: Optional[BaseDBAsyncClient] = None,
+        update_fields: Optional[Iterable[str]] = None,
+        force_create: bool = False,
+        force_update: bool = False,
+    ) -> None:
+        await super().save(using_db=using_db, update_fields=update_fields, force_create=force_create, force_update=force_update)
+        # 封禁、权限等修改后以保存后的实例替换缓存，消息处理路径立即读取到新状态
+        channel_cache.invalidate_user(self.adapter_key, self.platform_userid)
+        channel_cache.users.set((self.adapter_key, self.platform_userid), self)
+
+    async def delete(self, using_db: Optional[BaseDBAsyncClient] = None) -> None:
+        await super().delete(using_db=using_db)
+        channel_cache.invalidate_user(self.adapter_key, self.platform_userid)
 
     @classmethod
     async def get_by_union_id(cls, adapter_key: str, platform_userid: str) -> Optional["DBUser"]:
         """根据适配器ID和平台用户ID获取用户"""
-        return await cls.get_or_none(adapter_key=adapter_key, platform_userid=platform_userid)
+        key = (adapter_key, platform_userid)
+        user = channel_cache.users.get(key)
+        if user:
+            return user
+        version = channel_cache.users.version
+        user = await cls.get_or_none(adapter_key=adapter_key, platform_userid=platform_userid)
+        if user:
+            channel_cache.users.set(key, user, version)
+        return user
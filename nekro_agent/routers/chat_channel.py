@@ -10,6 +10,7 @@ from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_chat_message import DBChatMessage
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.message_buffer import message_write_buffer
 from nekro_agent.services.user.deps import get_current_active_user
 from nekro_agent.services.user.perm import Role, require_role
 
@@ -52,6 +53,7 @@ async def get_chat_channel_list(
     channels = await query.all()
 
     # 获取每个频道的统计信息
+    await message_write_buffer.ensure_flushed()
     channel_info_list = []
     for channel in channels:
         # 1. 计算重置后的消息数量（从conversation_start_time开始）
@@ -134,6 +136,7 @@ async def get_chat_channel_detail(chat_key: str, _current_user: DBUser = Depends
         return Ret.fail(msg="会话不存在")
 
     # 获取会话数据
+    await message_write_buffer.ensure_flushed()
     message_count = await DBChatMessage.filter(chat_key=chat_key, create_time__gte=channel.conversation_start_time).count()
 
     # 获取最近一条消息的时间
@@ -207,6 +210,7 @@ async def get_chat_channel_messages(
         return Ret.fail(msg="会话不存在")
 
     # 查询消息，只返回conversation_start_time之后的消息
+    await message_write_buffer.ensure_flushed()
     query = DBChatMessage.filter(chat_key=chat_key, create_time__gte=channel.conversation_start_time)
     if before_id:
         query = query.filter(id__lt=before_id)
@@ -7,6 +7,8 @@ from nekro_agent.core import logger
 from nekro_agent.core.config import ModelConfigGroup, config, save_config
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.agent.model_health import model_health_tracker
+from nekro_agent.services.agent.rate_limiter import llm_rate_limiter
 from nekro_agent.services.config_service import UnifiedConfigService
 from nekro_agent.services.user.deps import get_current_active_user
 from nekro_agent.services.user.perm import Role, require_role
@@ -188,6 +190,20 @@ async def get_model_groups(_current_user: DBUser = Depends(get_current_active_us
     return Ret.success(msg="获取成功", data=config.MODEL_GROUPS)
 
 
+@router.get("/model-groups/health", summary="获取模型组健康状态")
+@require_role(Role.Admin)
+async def get_model_groups_health(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取各模型组近期错误率、耗时与熔断状态"""
+    return Ret.success(msg="获取成功", data=model_health_tracker.get_stats())
+
+
+@router.get("/model-groups/rate-limits", summary="获取模型请求限流统计")
+@require_role(Role.Admin)
+async def get_model_groups_rate_limits(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取各模型的限额、进行中与排队请求数以及排队耗时统计"""
+    return Ret.success(msg="获取成功", data=llm_rate_limiter.get_stats())
+
+
 @router.post("/model-groups/{group_name}", summary="更新模型组")
 @require_role(Role.Admin)
 async def update_model_group(
@@ -200,6 +216,7 @@ async def update_model_group(
         # 直接使用整个model_config对象
         config.MODEL_GROUPS[group_name] = model_config
         save_config()
+        model_health_tracker.reset(group_name)
         return Ret.success(msg="更新成功")
     except Exception as e:
         return Ret.fail(msg=f"更新失败: {e!s}")
@@ -219,6 +236,7 @@ async def delete_model_group(
             return Ret.fail(msg="默认模型组不能删除")
         del config.MODEL_GROUPS[group_name]
         save_config()
+        model_health_tracker.reset(group_name)
         return Ret.success(msg="删除成功")
     except Exception as e:
         return Ret.fail(msg=f"删除失败: {e!s}")
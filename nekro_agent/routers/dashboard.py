@@ -1,4 +1,5 @@
 import asyncio
+import calendar
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union
@@ -14,7 +15,17 @@ from nekro_agent.models.db_exec_code import DBExecCode, ExecStopType
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.chat_message import ChatType
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.agent.admission import agent_admission
+from nekro_agent.services.agent.prompt_profiler import prompt_profiler
+from nekro_agent.services.channel_cache import channel_cache
+from nekro_agent.services.chat_lease import chat_lease_manager
+from nekro_agent.services.config_resolver import config_resolver
+from nekro_agent.services.debounce_policy import debounce_policy
+from nekro_agent.services.llm_ledger import LEDGER_GROUP_FIELDS, llm_call_ledger
+from nekro_agent.services.media_ingestion import media_ingestion
+from nekro_agent.services.message_buffer import message_write_buffer
 from nekro_agent.services.user.deps import get_current_active_user
+from nekro_agent.services.user.perm import Role, require_role
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -38,6 +49,7 @@ async def get_dashboard_overview(
 ) -> Ret:
     start_time = await get_time_range(time_range)
 
+    await message_write_buffer.ensure_flushed()
     total_messages = await DBChatMessage.filter(create_time__gte=start_time).count()
     active_sessions = len(
         await DBChatMessage.filter(
@@ -110,6 +122,8 @@ async def get_trends(
     metrics_list = metrics.split(",")
 
     # 准备结果数据
+    if "messages" in metrics_list:
+        await message_write_buffer.ensure_flushed()
     result = []
     current_time = start_time
 
@@ -203,6 +217,7 @@ async def get_stats_stream(
     async def generate():
         try:
             # 初始化计数器
+            await message_write_buffer.ensure_flushed()
             last_message_count = await DBChatMessage.all().count()
             last_sandbox_count = await DBExecCode.all().count()
             last_success_count = await DBExecCode.filter(success=True).all().count()
@@ -278,6 +293,7 @@ async def get_stats_stream(
                     await asyncio.sleep(wait_seconds)
 
                 # 查询从上次发送到现在的数据
+                await message_write_buffer.ensure_flushed()
                 current_message_count = await DBChatMessage.all().count()
                 current_sandbox_count = await DBExecCode.all().count()
                 current_success_count = await DBExecCode.filter(success=True).all().count()
@@ -342,6 +358,7 @@ async def get_distributions(
                     },
                 )
 
+    await message_write_buffer.ensure_flushed()
     total_messages = await DBChatMessage.filter(create_time__gte=start_time).count()
     message_type_data = []
 
@@ -375,3 +392,85 @@ async def get_distributions(
             "message_type": message_type_data,
         },
     )
+
+
+@router.get("/prompt-profile", summary="获取提示词构建分段统计")
+@require_role(Role.Admin)
+async def get_prompt_profile(
+    chat_key: Optional[str] = None,
+    _current_user: DBUser = Depends(get_current_active_user),
+) -> Ret:
+    """获取提示词各构建阶段的耗时与估算 Token 滚动统计，指定会话时返回该会话的统计"""
+    return Ret.success(msg="获取成功", data=prompt_profiler.get_stats(chat_key))
+
+
+@router.get("/channel-cache", summary="获取会话数据缓存命中统计")
+@require_role(Role.Admin)
+async def get_channel_cache_stats(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取频道记录、生效配置、人设与用户记录缓存的命中率统计"""
+    return Ret.success(msg="获取成功", data={**channel_cache.get_stats(), "effective_config": config_resolver.get_stats()})
+
+
+@router.get("/debounce", summary="获取消息防抖统计")
+@require_role(Role.Admin)
+async def get_debounce_stats(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取防抖窗口数、合并消息数 (节省的 Agent 执行次数) 与相对固定防抖时长的等待时长变化"""
+    return Ret.success(msg="获取成功", data=debounce_policy.get_stats())
+
+
+@router.get("/agent-admission", summary="获取 Agent 执行准入统计")
+@require_role(Role.Admin)
+async def get_agent_admission_stats(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取 Agent 并发执行数、排队数、排队耗时与按原因 / 优先级统计的丢弃数"""
+    return Ret.success(msg="获取成功", data=agent_admission.get_stats())
+
+
+@router.get("/chat-leases", summary="获取多实例会话租约统计")
+@require_role(Role.Admin)
+async def get_chat_lease_stats(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取本实例标识、持有的会话租约数与租约冲突 / 转交统计"""
+    return Ret.success(msg="获取成功", data=chat_lease_manager.get_stats())
+
+
+@router.get("/media-ingestion", summary="获取入站媒体后台下载统计")
+@require_role(Role.Admin)
+async def get_media_ingestion_stats(_current_user: DBUser = Depends(get_current_active_user)) -> Ret:
+    """获取媒体下载队列长度、完成 / 去重 / 失败数与平均下载耗时"""
+    return Ret.success(msg="获取成功", data=media_ingestion.get_stats())
+
+
+@router.get("/llm-calls/summary", summary="获取 LLM 调用聚合统计")
+@require_role(Role.Admin)
+async def get_llm_calls_summary(
+    time_range: str = "day",
+    group_by: str = "model_group",
+    _current_user: DBUser = Depends(get_current_active_user),
+) -> Ret:
+    """按模型组 / 模型 / 会话 / 调用来源聚合 LLM 调用次数、错误率、Token 用量与耗时分位数"""
+    if group_by not in LEDGER_GROUP_FIELDS:
+        return Ret.fail(msg=f"不支持的聚合维度: {group_by}")
+    start_time = await get_time_range(time_range)
+    return Ret.success(
+        msg="获取成功",
+        data={
+            "items": await llm_call_ledger.get_summary(start_time, group_by),
+            "ledger": llm_call_ledger.get_stats(),
+        },
+    )
+
+
+@router.get("/llm-calls/trends", summary="获取 LLM 调用趋势")
+@require_role(Role.Admin)
+async def get_llm_calls_trends(
+    time_range: str = "day",
+    _current_user: DBUser = Depends(get_current_active_user),
+) -> Ret:
+    """按小时 (当天) 或按天 (本周 / 本月) 统计 LLM 调用次数、Token 用量与耗时"""
+    start_time = await get_time_range(time_range)
+    if time_range == "week":
+        delta, intervals = timedelta(days=1), 7
+    elif time_range == "month":
+        delta, intervals = timedelta(days=1), calendar.monthrange(start_time.year, start_time.month)[1]
+    else:
+        delta, intervals = timedelta(hours=1), 24
+    return Ret.success(msg="获取成功", data=await llm_call_ledger.get_trends(start_time, delta, intervals))
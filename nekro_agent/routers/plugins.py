@@ -9,6 +9,7 @@ from nekro_agent.core import logger
 from nekro_agent.models.db_plugin_data import DBPluginData
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.agent.templates.plugin import get_plugin_render_stats
 from nekro_agent.services.plugin.collector import plugin_collector
 from nekro_agent.services.plugin.manager import (
     disable_plugin,
@@ -241,6 +242,15 @@ async def get_plugin_router_info(
         return Ret.error(msg=f"获取失败: {e!s}")
 
 
+@router.get("/render-stats", summary="获取插件提示注入渲染耗时统计")
+@require_role(Role.Admin)
+async def get_plugin_prompt_render_stats(
+    _current_user: DBUser = Depends(get_current_active_user),
+) -> Ret:
+    """获取各插件提示注入渲染次数、超时次数与耗时统计"""
+    return Ret.success(msg="获取成功", data=get_plugin_render_stats())
+
+
 @router.post("/refresh-routes", summary="刷新插件路由")
 @require_role(Role.Admin)
 async def refresh_plugin_routes(
@@ -12,6 +12,7 @@ from nekro_agent.core.logger import logger
 from nekro_agent.models.db_preset import DBPreset
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.channel_cache import channel_cache
 from nekro_agent.services.user.deps import get_current_active_user
 from nekro_agent.services.user.perm import Role, require_role
 from nekro_agent.systems.cloud.api.preset import create_preset as cloud_create_preset
@@ -444,6 +445,7 @@ async def refresh_shared_status(
         if not response.data or not response.data.items:
             # 没有云端人设，将所有本地人设的共享状态设置为false
             await DBPreset.filter(on_shared=True).update(on_shared=False)
+            channel_cache.invalidate_preset()
             return Ret.success(msg="刷新成功，您在云端没有共享的人设")
 
         # 获取云端人设的ID列表
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from pathlib import Path
 from typing import Optional
@@ -9,6 +10,7 @@ from nekro_agent.core.os_env import PROMPT_LOG_DIR
 from nekro_agent.models.db_exec_code import DBExecCode, ExecStopType
 from nekro_agent.models.db_user import DBUser
 from nekro_agent.schemas.message import Ret
+from nekro_agent.services.prompt_log_writer import prompt_log_writer
 from nekro_agent.services.user.deps import get_current_active_user
 from nekro_agent.services.user.perm import Role, require_role
 
@@ -70,6 +72,13 @@ async def get_sandbox_log_content(
     _current_user: DBUser = Depends(get_current_active_user),
 ) -> JSONResponse:
     """根据路径获取沙盒执行日志的详细内容"""
+    # 批量写入的日志记录
+    if prompt_log_writer.is_ref(log_path):
+        record = await asyncio.to_thread(prompt_log_writer.read_record, log_path)
+        if record is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Log record not found.")
+        return JSONResponse(content=record)
+
     # 安全性检查：确保文件路径在允许的日志目录内
     allowed_dir = Path(PROMPT_LOG_DIR).parent.resolve()
     target_path = Path(log_path).resolve()
@@ -72,6 +72,28 @@ class ChatMessageSegmentFile(ChatMessageSegment):
             remote_url=url,
         )
 
+    @classmethod
+    async def create_from_url_deferred(cls, url: str, from_chat_key: str, use_suffix: str = ""):
+        """从 URL 创建文件消息段，文件由媒体下载队列在后台下载
+
+        消息段可以立即入库，读取文件前需通过 `media_ingestion.wait_for` 等待下载完成；
+        无法预先确定文件后缀或下载队列不可用时退化为同步下载
+        """
+        from nekro_agent.services.media_ingestion import media_ingestion
+
+        ingested = None if url.startswith("data:") or not use_suffix else media_ingestion.submit(url, from_chat_key, use_suffix)
+        if ingested is None:
+            return await cls.create_from_url(url, from_chat_key, use_suffix=use_suffix)
+
+        local_path, file_name = ingested
+        return cls(
+            type=cls.get_segment_type(),
+            text=f"[{cls.get_segment_type().value.capitalize()}: {file_name}]",
+            file_name=file_name,
+            local_path=local_path,
+            remote_url=url,
+        )
+
     @classmethod
     async def create_form_local_path(cls, local_path: str, from_chat_key: str, file_name: str = "", use_suffix: str = ""):
         """从本地路径创建文件消息段"""
@@ -0,0 +1,151 @@
+"""Agent 执行准入控制
+
+限制所有会话同时执行的 Agent 数量 (`AI_AGENT_MAX_CONCURRENT`)，超出时按优先级排队，负载过高时按优先级丢弃请求：
+随机回复在没有空闲名额时直接丢弃；队列已满时丢弃队列中优先级最低的请求，新请求优先级不高于它们时丢弃新请求；
+排队超过 `AI_AGENT_QUEUE_TIMEOUT` 的请求同样丢弃。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Tuple
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config as core_config
+
+
+class AgentRunPriority(IntEnum):
+    """Agent 执行优先级，数值越小越先执行、越晚丢弃"""
+
+    DIRECT = 0  # 提及、私聊与显式触发
+    NORMAL = 1  # 关键词触发、定时器与系统消息
+    RANDOM = 2  # 随机回复
+
+
+# 用于计算排队耗时分位数的最近样本数
+ADMISSION_WAIT_SAMPLE_SIZE: int = 500
+
+
+class AgentAdmissionController:
+    """Agent 执行准入控制器"""
+
+    def __init__(self):
+        self._active = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[bool]"]] = []
+        self._counter = itertools.count()
+        self._wait_ms_samples: Deque[float] = deque(maxlen=ADMISSION_WAIT_SAMPLE_SIZE)
+        # 统计
+        self.admitted_count = 0
+        self.queued_count = 0
+        self.shed_count: Dict[str, int] = {"random": 0, "queue_full": 0, "evicted": 0, "timeout": 0}
+        self.shed_by_priority: Dict[str, int] = {priority.name.lower(): 0 for priority in AgentRunPriority}
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _has_capacity(self) -> bool:
+        max_concurrent = core_config.AI_AGENT_MAX_CONCURRENT
+        return max_concurrent <= 0 or self._active < max_concurrent
+
+    def try_acquire(self) -> bool:
+        """有空闲名额且无排队请求时立即获取执行许可"""
+        if self._has_capacity() and not self.waiting:
+            self._active += 1
+            self.admitted_count += 1
+            return True
+        return False
+
+    async def acquire(self, chat_key: str, priority: AgentRunPriority) -> bool:
+        """获取执行许可，必要时排队
+
+        Args:
+            chat_key (str): 会话标识
+            priority (AgentRunPriority): 执行优先级
+
+        Returns:
+            bool: 是否获得许可，未获得许可 (被丢弃) 时不需要释放
+        """
+        if self.try_acquire():
+            return True
+        if priority == AgentRunPriority.RANDOM:
+            self._record_shed(chat_key, priority, "random")
+            return False
+
+        if self.waiting >= core_config.AI_AGENT_QUEUE_MAX_SIZE:
+            victim = max(
+                (waiter for waiter in self._waiters if not waiter[2].done()),
+                key=lambda waiter: (waiter[0], waiter[1]),
+                default=None,
+            )
+            if victim is None or victim[0] <= priority:
+                self._record_shed(chat_key, priority, "queue_full")
+                return False
+            victim[2].set_result(False)
+
+        start_time = time.monotonic()
+        self.queued_count += 1
+        future: "asyncio.Future[bool]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        timeout = core_config.AI_AGENT_QUEUE_TIMEOUT
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if future.done() and future.result():
+                self.release()
+            else:
+                future.cancel()
+            raise
+
+        # 超时与获得许可同时发生时以许可为准
+        if not future.done():
+            future.cancel()
+            self._record_shed(chat_key, priority, "timeout")
+            return False
+        if not future.result():
+            self._record_shed(chat_key, priority, "evicted")
+            return False
+        wait_ms = (time.monotonic() - start_time) * 1000
+        self._wait_ms_samples.append(wait_ms)
+        logger.info(f"Agent 执行排队 {wait_ms:.0f}ms | {chat_key}")
+        return True
+
+    def release(self) -> None:
+        """释放执行许可，并按优先级唤醒排队请求"""
+        self._active = max(0, self._active - 1)
+        while self._waiters and self._has_capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._active += 1
+            self.admitted_count += 1
+            future.set_result(True)
+
+    def _record_shed(self, chat_key: str, priority: AgentRunPriority, reason: str) -> None:
+        self.shed_count[reason] += 1
+        self.shed_by_priority[priority.name.lower()] += 1
+        logger.warning(f"Agent 执行负载过高，丢弃请求 ({reason}, {priority.name.lower()}) | {chat_key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取准入统计"""
+        samples = sorted(self._wait_ms_samples)
+        return {
+            "max_concurrent": core_config.AI_AGENT_MAX_CONCURRENT,
+            "queue_max_size": core_config.AI_AGENT_QUEUE_MAX_SIZE,
+            "active": self._active,
+            "waiting": self.waiting,
+            "admitted_count": self.admitted_count,
+            "queued_count": self.queued_count,
+            "shed_count": dict(self.shed_count),
+            "shed_by_priority": dict(self.shed_by_priority),
+            "wait_ms_p50": round(samples[len(samples) // 2], 1) if samples else 0,
+            "wait_ms_p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1) if samples else 0,
+        }
+
+
+agent_admission = AgentAdmissionController()
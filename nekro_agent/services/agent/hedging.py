@@ -0,0 +1,174 @@
+"""LLM 对冲请求
+
+主模型组在对冲延迟内未开始输出时，向备用模型组发起相同请求，采用先开始输出的一方并取消另一方，
+用于降低单个上游服务异常变慢时的尾延迟。对冲延迟取主模型组近期首 Token 耗时的分位数，并限制对冲请求所占比例。
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple, TypeVar
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import ModelConfigGroup
+
+T = TypeVar("T")
+
+# 接收首 Token 回调并发起请求的函数
+_HedgeCall = Callable[[Callable[[], None]], Awaitable[T]]
+
+# 计算分位数所需的最少样本数
+_MIN_LATENCY_SAMPLES = 10
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    sorted_values = sorted(values)
+    index = min(len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * percentile / 100) - 1))
+    return sorted_values[index]
+
+
+async def run_hedged_request(
+    primary: _HedgeCall[T],
+    hedge: _HedgeCall[T],
+    delay: float,
+    should_hedge: Callable[[], bool],
+) -> Tuple[T, bool]:
+    """执行对冲请求
+
+    Args:
+        primary: 主请求
+        hedge: 对冲请求
+        delay (float): 主请求未开始输出时发起对冲请求前的等待时间 (秒)
+        should_hedge: 到达对冲延迟时判断是否允许发起对冲请求
+
+    Returns:
+        Tuple[T, bool]: 请求结果，以及结果是否来自对冲请求
+    """
+    first_token: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+
+    def notify(index: int) -> None:
+        if not first_token.done():
+            first_token.set_result(index)
+
+    def on_done(index: int, task: "asyncio.Task[T]") -> None:
+        # 非流式请求完成即视为开始输出；失败的请求不参与竞争
+        if not task.cancelled() and task.exception() is None:
+            notify(index)
+
+    def start(index: int, call: _HedgeCall[T]) -> "asyncio.Task[T]":
+        task = asyncio.create_task(call(lambda: notify(index)))
+        task.add_done_callback(lambda t: on_done(index, t))
+        return task
+
+    tasks: List["asyncio.Task[T]"] = [start(0, primary)]
+    try:
+        await asyncio.wait([tasks[0], first_token], timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        if first_token.done() or tasks[0].done() or not should_hedge():
+            return await tasks[0], False
+
+        tasks.append(start(1, hedge))
+        while not first_token.done():
+            pending = [task for task in tasks if not task.done()]
+            if not pending:
+                break
+            await asyncio.wait([first_token, *pending], return_when=asyncio.FIRST_COMPLETED)
+
+        if not first_token.done():
+            # 两个请求均失败，抛出主请求的异常
+            return await tasks[0], False
+
+        winner = first_token.result()
+        for index, task in enumerate(tasks):
+            if index != winner:
+                task.cancel()
+        return await tasks[winner], winner == 1
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+class LLMHedgePolicy:
+    """对冲请求策略，记录各模型组首 Token 耗时并控制对冲比例"""
+
+    def __init__(self, latency_window: int = 200, budget_window: int = 100):
+        self.latency_window = latency_window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._decisions: Deque[bool] = deque(maxlen=budget_window)
+        self.hedged_count: int = 0
+        self.hedge_win_count: int = 0
+
+    @staticmethod
+    def model_key(model_group: ModelConfigGroup) -> str:
+        return f"{model_group.BASE_URL}|{model_group.CHAT_MODEL}"
+
+    def record_latency(self, model_group: ModelConfigGroup, latency_ms: float) -> None:
+        """记录模型组的首 Token 耗时"""
+        if latency_ms <= 0:
+            return
+        key = self.model_key(model_group)
+        self._latencies.setdefault(key, deque(maxlen=self.latency_window)).append(latency_ms)
+
+    def get_delay(self, model_group: ModelConfigGroup, percentile: float, min_delay: float) -> float:
+        """计算对冲延迟 (秒)，样本不足时返回最小延迟"""
+        latencies = self._latencies.get(self.model_key(model_group))
+        if not latencies or len(latencies) < _MIN_LATENCY_SAMPLES:
+            return min_delay
+        return max(min_delay, _percentile(list(latencies), percentile) / 1000)
+
+    def _within_budget(self, budget_ratio: float) -> bool:
+        hedged = sum(self._decisions)
+        return (hedged + 1) / (len(self._decisions) + 1) <= budget_ratio
+
+    async def request(
+        self,
+        primary_group: ModelConfigGroup,
+        primary: _HedgeCall[T],
+        hedge: _HedgeCall[T],
+        percentile: float,
+        min_delay: float,
+        budget_ratio: float,
+    ) -> Tuple[T, bool]:
+        """按策略执行对冲请求
+
+        Returns:
+            Tuple[T, bool]: 请求结果，以及结果是否来自对冲请求
+        """
+        delay = self.get_delay(primary_group, percentile, min_delay)
+        hedged = False
+
+        def should_hedge() -> bool:
+            nonlocal hedged
+            hedged = self._within_budget(budget_ratio)
+            if hedged:
+                logger.info(f"主模型组 {primary_group.CHAT_MODEL} 超过 {delay:.2f}s 未开始输出，发起对冲请求")
+            else:
+                logger.debug(f"对冲请求比例已达上限 ({budget_ratio:.0%})，继续等待主模型组")
+            return hedged
+
+        try:
+            result, hedge_won = await run_hedged_request(primary, hedge, delay, should_hedge)
+        finally:
+            self._decisions.append(hedged)
+            if hedged:
+                self.hedged_count += 1
+        if hedge_won:
+            self.hedge_win_count += 1
+            logger.info("对冲请求先于主模型组开始输出，已采用对冲结果")
+        return result, hedge_won
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对冲统计"""
+        return {
+            "hedged_count": self.hedged_count,
+            "hedge_win_count": self.hedge_win_count,
+            "recent_hedge_ratio": round(sum(self._decisions) / len(self._decisions), 4) if self._decisions else 0,
+            "models": {
+                key: {"samples": len(values), "p50_ms": _percentile(list(values), 50), "p95_ms": _percentile(list(values), 95)}
+                for key, values in self._latencies.items()
+                if values
+            },
+        }
+
+
+llm_hedge_policy = LLMHedgePolicy()
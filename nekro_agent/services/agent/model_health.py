@@ -0,0 +1,153 @@
+"""模型组健康状态与熔断
+
+按模型组统计近期请求的错误率与耗时，错误率过高时熔断 (open)，熔断期间请求直接路由到其他健康的模型组；
+熔断时长结束后进入半开状态 (half-open) 放行一个探测请求，成功则恢复 (closed)，失败则重新熔断。
+"""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from nekro_agent.core import logger
+
+# 统计窗口内保留的最近请求数与时间范围 (秒)
+HEALTH_WINDOW_SIZE: int = 20
+HEALTH_WINDOW_SECONDS: float = 300
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ModelGroupHealth:
+    """单个模型组的健康状态"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state: BreakerState = BreakerState.CLOSED
+        self.records: Deque[Tuple[float, bool, float]] = deque(maxlen=HEALTH_WINDOW_SIZE)  # (时间, 是否成功, 耗时 ms)
+        self.opened_at: float = 0  # 熔断开始时间 (monotonic)
+        self.opened_at_timestamp: float = 0  # 熔断开始时间 (时间戳)
+        self.probe_started_at: float = 0  # 半开状态下探测请求开始时间 (monotonic)
+        self.last_error: str = ""
+
+    def recent_records(self) -> List[Tuple[float, bool, float]]:
+        expire_time = time.monotonic() - HEALTH_WINDOW_SECONDS
+        return [record for record in self.records if record[0] >= expire_time]
+
+    @property
+    def error_rate(self) -> float:
+        records = self.recent_records()
+        return sum(1 for _, success, _ in records if not success) / len(records) if records else 0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        latencies = [latency for _, success, latency in self.recent_records() if success]
+        return sum(latencies) / len(latencies) if latencies else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "error_rate": round(self.error_rate, 4),
+            "avg_latency_ms": round(self.avg_latency_ms, 2),
+            "recent_requests": len(self.recent_records()),
+            "opened_at": self.opened_at_timestamp if self.state != BreakerState.CLOSED else None,
+            "last_error": self.last_error,
+        }
+
+
+class ModelHealthTracker:
+    """模型组健康状态追踪与熔断路由"""
+
+    def __init__(self):
+        self.groups: Dict[str, ModelGroupHealth] = {}
+
+    def _get(self, name: str) -> ModelGroupHealth:
+        if name not in self.groups:
+            self.groups[name] = ModelGroupHealth(name)
+        return self.groups[name]
+
+    def _open(self, health: ModelGroupHealth) -> None:
+        health.state = BreakerState.OPEN
+        health.opened_at = time.monotonic()
+        health.opened_at_timestamp = time.time()
+        logger.warning(f"模型组 {health.name} 已熔断 | 近期错误率 {health.error_rate:.0%} | 最近错误: {health.last_error}")
+
+    def allow_request(self, name: str, open_seconds: float) -> bool:
+        """判断模型组当前是否可以接收请求，半开状态下同一时间只放行一个探测请求"""
+        health = self._get(name)
+        now = time.monotonic()
+        if health.state == BreakerState.CLOSED:
+            return True
+        if health.state == BreakerState.OPEN:
+            if now - health.opened_at < open_seconds:
+                return False
+            health.state = BreakerState.HALF_OPEN
+            health.probe_started_at = 0
+            logger.info(f"模型组 {name} 熔断时长已到，进入半开状态")
+        # 探测请求长时间未返回 (例如被取消) 时允许再次探测
+        if health.probe_started_at and now - health.probe_started_at < open_seconds:
+            return False
+        health.probe_started_at = now
+        return True
+
+    def record_success(self, name: str, latency_ms: float) -> None:
+        """记录请求成功"""
+        health = self._get(name)
+        health.records.append((time.monotonic(), True, latency_ms))
+        if health.state != BreakerState.CLOSED:
+            health.state = BreakerState.CLOSED
+            health.probe_started_at = 0
+            logger.info(f"模型组 {name} 探测请求成功，已恢复")
+
+    def record_failure(self, name: str, error: str, error_rate_threshold: float, min_requests: int) -> None:
+        """记录请求失败，错误率达到阈值或半开探测失败时熔断"""
+        health = self._get(name)
+        health.records.append((time.monotonic(), False, 0))
+        health.last_error = error[:200]
+        if health.state == BreakerState.HALF_OPEN or (
+            health.state == BreakerState.CLOSED
+            and len(health.recent_records()) >= min_requests
+            and health.error_rate >= error_rate_threshold
+        ):
+            self._open(health)
+
+    def route(self, preferred: str, candidates: List[str], open_seconds: float) -> str:
+        """选择实际使用的模型组
+
+        Args:
+            preferred (str): 首选模型组
+            candidates (List[str]): 按优先级排列的备选模型组
+            open_seconds (float): 熔断时长 (秒)
+
+        Returns:
+            str: 首个可用的模型组，均不可用时返回首选模型组
+        """
+        for name in [preferred, *candidates]:
+            if self.allow_request(name, open_seconds):
+                if name != preferred:
+                    logger.info(f"模型组 {preferred} 熔断中，请求路由到 {name}")
+                return name
+        return preferred
+
+    def get_state(self, name: str) -> Optional[BreakerState]:
+        health = self.groups.get(name)
+        return health.state if health else None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有模型组健康状态"""
+        return {name: health.to_dict() for name, health in self.groups.items()}
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """重置模型组健康状态"""
+        if name:
+            self.groups.pop(name, None)
+        else:
+            self.groups.clear()
+
+
+model_health_tracker = ModelHealthTracker()
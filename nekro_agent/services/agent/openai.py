@@ -1,3 +1,4 @@
+import contextlib
 import json
 import time
 from datetime import datetime
@@ -16,13 +17,17 @@ from typing import (
 
 import aiofiles
 import httpx
-from openai import AsyncOpenAI, AsyncStream
+from openai import AsyncOpenAI, AsyncStream, RateLimitError
 from openai.types.chat import ChatCompletion, ChatCompletionChunk
 from pydantic import BaseModel
 
 from nekro_agent.core import logger
+from nekro_agent.services.llm_ledger import LLMCallInfo, llm_call_ledger
+from nekro_agent.services.prompt_log_writer import prompt_log_writer
+from nekro_agent.tools.common_util import estimate_token_count
 
 from .creator import OpenAIChatMessage
+from .rate_limiter import DEFAULT_RETRY_AFTER_SECONDS, RequestPriority, llm_rate_limiter
 
 _OPENAI_BASE_URL = "https://api.openai.com/v1"
 
@@ -200,6 +205,22 @@ class OpenAIResponse(BaseModel):
         if not log_path:
             return False
 
+        # 批量日志记录由后台写入服务写入压缩分段文件
+        if prompt_log_writer.is_ref(log_path):
+            return prompt_log_writer.enqueue(
+                str(log_path),
+                self._generate_json_log(
+                    messages,
+                    message_cnt,
+                    temperature,
+                    frequency_penalty,
+                    presence_penalty,
+                    top_p,
+                    max_tokens,
+                    stop_words,
+                ),
+            )
+
         path: Path = Path(log_path)
         path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -283,6 +304,26 @@ class OpenAIStreamChunk(BaseModel):
 _AsyncFunc = Callable[..., Coroutine[Any, Any, OpenAIStreamChunk]]
 
 
+def _estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """估算请求消息的 Token 数 (仅计算文本内容)"""
+    total = 0
+    for msg in messages:
+        content = msg.get("content", "")
+        if isinstance(content, str):
+            total += estimate_token_count(content)
+        elif isinstance(content, list):
+            total += sum(estimate_token_count(item.get("text", "")) for item in content if item.get("type") == "text")
+    return total
+
+
+def _get_retry_after_seconds(e: RateLimitError) -> float:
+    """从 429 响应中获取建议的重试等待时间"""
+    try:
+        return float(e.response.headers.get("retry-after", DEFAULT_RETRY_AFTER_SECONDS))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
 async def gen_openai_chat_response(
     model: str,
     messages: Any,
@@ -300,13 +341,19 @@ async def gen_openai_chat_response(
     max_wait_time: Optional[int] = None,
     thought_chain_field_name: str = "reasoning_content",
     chunk_callback: Optional[_AsyncFunc] = None,
+    first_token_callback: Optional[Callable[[], None]] = None,
     log_path: Optional[Union[str, Path]] = None,
     error_log_path: Optional[Union[str, Path]] = None,
     log_style: Literal["json", "text", "auto"] = "auto",
+    priority: int = RequestPriority.NORMAL,
+    call_info: Optional[LLMCallInfo] = None,
 ) -> OpenAIResponse:
-    """生成聊天回复内容"""
+    """生成聊天回复内容
 
-    _start_time: float = time.time()
+    流式模式下收到首个数据块时会调用 `first_token_callback`；
+    请求受所属模型组的 RPM / TPM / 并发数限额约束，排队时按 `priority` 优先级分发；
+    每次调用的用量、耗时与结果连同 `call_info` 一起写入 LLM 调用记录
+    """
 
     gen_kwargs = {
         "temperature": temperature,
@@ -330,6 +377,15 @@ async def gen_openai_chat_response(
     token_input: int = 0
     token_output: int = 0
     first_token_time: Optional[float] = None
+    outcome: str = "cancelled"
+    error: Optional[BaseException] = None
+
+    # 客户端限流
+    rate_limiter = llm_rate_limiter.get(model, base_url, api_key)
+    estimated_tokens: int = _estimate_messages_tokens(messages) + (max_tokens or 0)
+    queue_ms: float = await rate_limiter.acquire(estimated_tokens, priority, timeout=max_wait_time)
+    # 耗时从获得限流许可后开始计算，排队耗时单独记录在 queue_ms 中
+    _start_time: float = time.time()
 
     # 使用async with语法创建和管理httpx客户端
     try:
@@ -353,6 +409,8 @@ async def gen_openai_chat_response(
                 async for chunk in res_stream:
                     if not first_token_time:
                         first_token_time = time.time()
+                        if first_token_callback:
+                            first_token_callback()
                     chunk_text: Optional[str] = chunk.choices[0].delta.content
                     if chunk_text:
                         output += f"{chunk_text}"
@@ -399,8 +457,13 @@ async def gen_openai_chat_response(
                 token_consumption: int = res.usage.total_tokens if res.usage else 0
                 token_input: int = res.usage.prompt_tokens if res.usage else 0
                 token_output: int = res.usage.completion_tokens if res.usage else 0
+        outcome = "success"
 
     except Exception as e:
+        outcome, error = "error", e
+        if isinstance(e, RateLimitError):
+            outcome = "rate_limited"
+            rate_limiter.pause(_get_retry_after_seconds(e))
         logger.exception(f"OpenAI请求失败: {e}")
         response = OpenAIErrResponse.create_from_exception(
             e,
@@ -417,6 +480,28 @@ async def gen_openai_chat_response(
                 message_cnt=len(messages) + 1,
             )
         raise
+    finally:
+        rate_limiter.release(token_consumption - estimated_tokens if token_consumption else 0)
+        _total_ms = int((time.time() - _start_time) * 1000)
+        _first_ms = 0
+        if first_token_time:
+            _first_ms = int((first_token_time - _start_time) * 1000)
+        elif outcome == "success":
+            _first_ms = _total_ms  # 非流式请求以收到完整响应的时间作为首 Token 耗时
+        llm_call_ledger.record(
+            call_info=call_info,
+            call_type="chat",
+            model=model,
+            base_url=base_url,
+            outcome=outcome,
+            prompt_tokens=token_input,
+            completion_tokens=token_output,
+            first_token_ms=_first_ms,
+            total_ms=_total_ms,
+            queue_ms=queue_ms,
+            stream_mode=stream_mode,
+            error=error,
+        )
 
     # 时间统计
     _end_time: float = time.time()
@@ -459,6 +544,67 @@ async def gen_openai_chat_response(
     return response
 
 
+async def _request_embeddings(
+    model: str,
+    input: Union[str, List[Any]],  # noqa: A002
+    dimensions: int,
+    api_key: str,
+    base_url: str,
+    proxy_url: Optional[str] = None,
+    endpoint: str = "/embeddings",
+    call_info: Optional[LLMCallInfo] = None,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> List[Dict[str, Any]]:
+    """请求向量接口，返回按输入顺序排列的 `data` 列表"""
+    _start_time: float = time.time()
+    outcome: str = "cancelled"
+    error: Optional[BaseException] = None
+    prompt_tokens: int = 0
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            client = http_client or await stack.enter_async_context(
+                httpx.AsyncClient(
+                    timeout=httpx.Timeout(connect=10, read=3600, write=3600, pool=10),
+                    proxies={"http://": proxy_url, "https://": proxy_url} if proxy_url else None,
+                ),
+            )
+            # 手动序列化JSON，并设置ensure_ascii=False
+            data = json.dumps(
+                {"model": model, "input": input, "dimensions": dimensions},
+                ensure_ascii=False,
+            )
+
+            res = await client.post(
+                f"{base_url}{endpoint}",
+                headers={
+                    "Content-Type": "application/json; charset=utf-8",
+                    "Authorization": f"Bearer {api_key.strip()}",
+                },
+                content=data.encode("utf-8"),
+            )
+            res.raise_for_status()
+            res_data = res.json()
+            prompt_tokens = (res_data.get("usage") or {}).get("prompt_tokens") or 0
+            outcome = "success"
+            return sorted(res_data["data"], key=lambda item: item.get("index", 0))
+    except Exception as e:
+        outcome, error = "error", e
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+            outcome = "rate_limited"
+        raise
+    finally:
+        llm_call_ledger.record(
+            call_info=call_info,
+            call_type="embedding",
+            model=model,
+            base_url=base_url,
+            outcome=outcome,
+            prompt_tokens=prompt_tokens,
+            total_ms=int((time.time() - _start_time) * 1000),
+            error=error,
+        )
+
+
 async def gen_openai_embeddings(
     model: str,
     input: Union[str, List[Dict[str, Any]]],  # noqa: A002
@@ -467,29 +613,42 @@ async def gen_openai_embeddings(
     base_url: str,
     proxy_url: Optional[str] = None,
     endpoint: str = "/embeddings",
+    call_info: Optional[LLMCallInfo] = None,
 ) -> List[float]:
     """生成文本的向量表示"""
-    async with httpx.AsyncClient(
-        timeout=httpx.Timeout(connect=10, read=3600, write=3600, pool=10),
-        proxies={"http://": proxy_url, "https://": proxy_url} if proxy_url else None,
-    ) as client:
-        # 手动序列化JSON，并设置ensure_ascii=False
-        data = json.dumps(
-            {"model": model, "input": input, "dimensions": dimensions},
-            ensure_ascii=False,
-        )
+    res_data = await _request_embeddings(model, input, dimensions, api_key, base_url, proxy_url, endpoint, call_info)
+    return res_data[0]["embedding"]
 
-        res = await client.post(
-            f"{base_url}{endpoint}",
-            headers={
-                "Content-Type": "application/json; charset=utf-8",
-                "Authorization": f"Bearer {api_key.strip()}",
-            },
-            content=data.encode("utf-8"),
-        )
-        res.raise_for_status()
 
-        return res.json()["data"][0]["embedding"]
+async def gen_openai_embeddings_batch(
+    model: str,
+    inputs: List[str],
+    dimensions: int,
+    api_key: str,
+    base_url: str,
+    proxy_url: Optional[str] = None,
+    endpoint: str = "/embeddings",
+    call_info: Optional[LLMCallInfo] = None,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> List[List[float]]:
+    """在一次请求中生成多段文本的向量表示，返回顺序与输入一致
+
+    传入 `http_client` 时复用该客户端连接
+    """
+    res_data = await _request_embeddings(
+        model,
+        inputs,
+        dimensions,
+        api_key,
+        base_url,
+        proxy_url,
+        endpoint,
+        call_info,
+        http_client,
+    )
+    if len(res_data) != len(inputs):
+        raise ValueError(f"向量接口返回数量不匹配: 请求 {len(inputs)} 条，返回 {len(res_data)} 条")
+    return [item["embedding"] for item in res_data]
 
 
 async def gen_openai_chat_stream(
@@ -0,0 +1,73 @@
+"""提示词前缀缓存诊断
+
+上游 OpenAI 兼容服务通常会对请求的公共前缀进行缓存 (更低的计费与更快的首 token 响应)，
+该模块记录同一会话上一次请求的序列化内容，统计本次请求与其相同的前缀字节数，用于确认提示词布局能否命中前缀缓存。
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Union
+
+from nekro_agent.core import logger
+
+from .creator import OpenAIChatMessage
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    """二分查找两段字节序列的公共前缀长度"""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class PromptPrefixTracker:
+    """记录每个会话最近一次请求的提示词，诊断前缀复用情况"""
+
+    def __init__(self, max_chats: int = 256):
+        self.max_chats = max_chats
+        self._last_prompts: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @staticmethod
+    def serialize(messages: List[Union[OpenAIChatMessage, Dict[str, Any]]]) -> bytes:
+        """按请求体的序列化方式生成提示词字节序列"""
+        return json.dumps(
+            [msg.to_dict() if isinstance(msg, OpenAIChatMessage) else msg for msg in messages],
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+    def observe(self, chat_key: str, messages: List[Union[OpenAIChatMessage, Dict[str, Any]]]) -> int:
+        """记录本次请求并返回与上一次请求相同的前缀字节数
+
+        Args:
+            chat_key (str): 会话标识
+            messages (List[Union[OpenAIChatMessage, Dict[str, Any]]]): 本次请求的消息列表
+
+        Returns:
+            int: 相同前缀字节数，没有历史请求时返回 0
+        """
+        current = self.serialize(messages)
+        previous = self._last_prompts.pop(chat_key, None)
+        self._last_prompts[chat_key] = current
+        while len(self._last_prompts) > self.max_chats:
+            self._last_prompts.popitem(last=False)
+
+        if previous is None:
+            return 0
+
+        matched = _common_prefix_length(previous, current)
+        logger.debug(
+            f"提示词前缀复用: {chat_key} | 相同前缀 {matched}/{len(current)} 字节 ({matched / max(len(current), 1):.1%})",
+        )
+        return matched
+
+    def forget(self, chat_key: str) -> None:
+        """清除会话记录"""
+        self._last_prompts.pop(chat_key, None)
+
+
+prompt_prefix_tracker = PromptPrefixTracker()
@@ -0,0 +1,170 @@
+"""提示词构建分段性能分析
+
+记录每次 Agent 请求中各构建阶段 (系统提示词、插件注入、对话示例、历史记录查询与解析、图片编码、最终消息列表) 的耗时与大小，
+并按会话维护滚动聚合统计，用于定位延迟与 Token 消耗的来源。
+"""
+
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from nekro_agent.tools.common_util import estimate_token_count
+
+from .creator import OpenAIChatMessage
+
+# 各构建阶段名称，按提示词组装顺序排列
+PROMPT_SECTIONS = (
+    "system_prompt",
+    "plugin_injections",
+    "practice_examples",
+    "history_query",
+    "history_parse",
+    "image_encoding",
+    "final_messages",
+)
+
+
+class PromptSectionStat(BaseModel):
+    """单个构建阶段的耗时与大小"""
+
+    cost_ms: float = 0
+    chars: int = 0
+    tokens: int = 0
+    items: int = 0
+
+
+class PromptBuildProfile:
+    """单次提示词构建的分段记录"""
+
+    def __init__(self, chat_key: str):
+        self.chat_key = chat_key
+        self.create_time = time.time()
+        self.sections: Dict[str, PromptSectionStat] = {}
+
+    def _get_section(self, name: str) -> PromptSectionStat:
+        return self.sections.setdefault(name, PromptSectionStat())
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """统计代码块耗时，同一阶段多次进入时累加"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._get_section(name).cost_ms += (time.perf_counter() - start_time) * 1000
+
+    def add_text(self, name: str, text: str) -> None:
+        """累加阶段的文本大小与估算 Token 数"""
+        section = self._get_section(name)
+        section.chars += len(text)
+        section.tokens += estimate_token_count(text)
+        section.items += 1
+
+    def add_messages(self, name: str, messages: List[OpenAIChatMessage]) -> None:
+        """累加消息列表的文本大小与估算 Token 数，非文本片段 (图片) 仅计入数量"""
+        section = self._get_section(name)
+        for message in messages:
+            for segment in message.content:
+                if segment["type"] == "text":
+                    section.chars += len(segment["text"])
+                    section.tokens += estimate_token_count(segment["text"])
+            section.items += 1
+
+    def add_image(self, name: str, segment: Dict[str, Any]) -> None:
+        """累加图片片段的编码大小"""
+        section = self._get_section(name)
+        section.chars += len(segment.get("image_url", {}).get("url", ""))
+        section.items += 1
+
+
+class PromptProfileAggregate(BaseModel):
+    """构建阶段的滚动聚合统计"""
+
+    samples: int = 0
+    avg_ms: float = 0
+    max_ms: float = 0
+    avg_chars: float = 0
+    avg_tokens: float = 0
+    max_tokens: int = 0
+
+
+def _aggregate(profiles: List[PromptBuildProfile]) -> Dict[str, Dict[str, Any]]:
+    result: Dict[str, Dict[str, Any]] = {}
+    for name in PROMPT_SECTIONS:
+        stats = [profile.sections[name] for profile in profiles if name in profile.sections]
+        if not stats:
+            continue
+        result[name] = PromptProfileAggregate(
+            samples=len(stats),
+            avg_ms=round(sum(s.cost_ms for s in stats) / len(stats), 2),
+            max_ms=round(max(s.cost_ms for s in stats), 2),
+            avg_chars=round(sum(s.chars for s in stats) / len(stats), 1),
+            avg_tokens=round(sum(s.tokens for s in stats) / len(stats), 1),
+            max_tokens=max(s.tokens for s in stats),
+        ).model_dump()
+    return result
+
+
+class PromptProfiler:
+    """按会话保存最近的构建记录并提供聚合统计"""
+
+    def __init__(self, max_chats: int = 256, window_size: int = 50):
+        self.max_chats = max_chats
+        self.window_size = window_size
+        self._chat_profiles: "OrderedDict[str, Deque[PromptBuildProfile]]" = OrderedDict()
+
+    def record(self, profile: PromptBuildProfile) -> None:
+        """保存一次构建记录"""
+        profiles = self._chat_profiles.pop(profile.chat_key, None) or deque(maxlen=self.window_size)
+        profiles.append(profile)
+        self._chat_profiles[profile.chat_key] = profiles
+        while len(self._chat_profiles) > self.max_chats:
+            self._chat_profiles.popitem(last=False)
+
+    def get_stats(self, chat_key: Optional[str] = None) -> Dict[str, Any]:
+        """获取聚合统计
+
+        Args:
+            chat_key (Optional[str]): 会话标识，为空时返回全部会话的汇总与各会话统计
+
+        Returns:
+            Dict[str, Any]: 分段聚合统计
+        """
+        if chat_key:
+            profiles = list(self._chat_profiles.get(chat_key, []))
+            return {"chat_key": chat_key, "sections": _aggregate(profiles), "last": self._last_sections(profiles)}
+
+        all_profiles = [profile for profiles in self._chat_profiles.values() for profile in profiles]
+        chats = [
+            {
+                "chat_key": key,
+                "samples": len(profiles),
+                "avg_total_ms": round(sum(self._total_ms(p) for p in profiles) / len(profiles), 2),
+                "avg_total_tokens": round(sum(p.sections.get("final_messages", PromptSectionStat()).tokens for p in profiles) / len(profiles), 1),
+                "last_time": profiles[-1].create_time,
+            }
+            for key, profiles in self._chat_profiles.items()
+            if profiles
+        ]
+        chats.sort(key=lambda chat: chat["avg_total_tokens"], reverse=True)
+        return {"sections": _aggregate(all_profiles), "chats": chats}
+
+    def clear(self) -> None:
+        """清空统计"""
+        self._chat_profiles.clear()
+
+    @staticmethod
+    def _total_ms(profile: PromptBuildProfile) -> float:
+        return sum(section.cost_ms for section in profile.sections.values())
+
+    @staticmethod
+    def _last_sections(profiles: List[PromptBuildProfile]) -> Dict[str, Dict[str, Any]]:
+        if not profiles:
+            return {}
+        return {name: section.model_dump() for name, section in profiles[-1].sections.items()}
+
+
+prompt_profiler = PromptProfiler()
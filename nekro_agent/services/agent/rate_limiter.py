@@ -0,0 +1,254 @@
+"""LLM 请求客户端限流
+
+按 (API 地址, API 密钥, 模型) 维度限制每分钟请求数 (RPM)、每分钟 Token 数 (TPM) 与最大并发请求数，
+限额取自使用相同 API 地址、密钥与模型的模型组配置 (多个模型组时取最严格的值)。
+等待中的请求按优先级排队，收到 429 响应时按 Retry-After 暂停该维度的请求分发。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config as core_config
+
+
+class RequestPriority(IntEnum):
+    """请求优先级，数值越小越先分发"""
+
+    HIGH = 0  # 实时回复
+    NORMAL = 1
+    LOW = 2  # 后台任务
+
+
+# 429 响应未携带 Retry-After 时的默认暂停时长 (秒)
+DEFAULT_RETRY_AFTER_SECONDS: float = 5
+
+
+class LLMQueueTimeoutError(Exception):
+    """请求在客户端限流队列中等待超时，请求未发送到上游"""
+
+
+class TokenBucket:
+    """令牌桶，容量为每分钟限额，按秒匀速补充"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """获取取出指定数量令牌前需要等待的时间 (秒)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) * 60 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        """取出令牌，允许欠账 (实际消耗超出预估时)"""
+        self._refill()
+        self.tokens -= amount
+
+
+class ModelRateLimiter:
+    """单个 API 密钥与模型的限流器"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.rpm_limit = 0
+        self.tpm_limit = 0
+        self.max_concurrency = 0
+        self._rpm_bucket: Optional[TokenBucket] = None
+        self._tpm_bucket: Optional[TokenBucket] = None
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]", int]] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 统计
+        self.total_requests = 0
+        self.queued_requests = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+        self.rate_limited_count = 0
+        self.queue_timeout_count = 0
+
+    def update_limits(self, rpm_limit: int, tpm_limit: int, max_concurrency: int) -> None:
+        """更新限额，限额变化时重建令牌桶"""
+        if rpm_limit != self.rpm_limit:
+            self._rpm_bucket = TokenBucket(rpm_limit) if rpm_limit > 0 else None
+        if tpm_limit != self.tpm_limit:
+            self._tpm_bucket = TokenBucket(tpm_limit) if tpm_limit > 0 else None
+        self.rpm_limit, self.tpm_limit, self.max_concurrency = rpm_limit, tpm_limit, max_concurrency
+
+    def _wait_time(self, tokens: int) -> float:
+        wait_time = max(0.0, self._paused_until - time.monotonic())
+        if self._rpm_bucket:
+            wait_time = max(wait_time, self._rpm_bucket.wait_time(1))
+        if self._tpm_bucket:
+            wait_time = max(wait_time, self._tpm_bucket.wait_time(tokens))
+        return wait_time
+
+    def _dispatch(self) -> None:
+        """按优先级分发等待中的请求，队首请求受限时等待其可用后再次分发"""
+        self._timer = None
+        while self._waiters:
+            _, _, future, tokens = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.max_concurrency > 0 and self._in_flight >= self.max_concurrency:
+                return  # 等待请求完成后再分发
+            wait_time = self._wait_time(tokens)
+            if wait_time > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait_time, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._grant(tokens)
+            future.set_result(None)
+
+    def _grant(self, tokens: int) -> None:
+        if self._rpm_bucket:
+            self._rpm_bucket.consume(1)
+        if self._tpm_bucket:
+            self._tpm_bucket.consume(tokens)
+        self._in_flight += 1
+
+    async def acquire(self, tokens: int, priority: int = RequestPriority.NORMAL, timeout: Optional[float] = None) -> float:
+        """获取请求许可
+
+        Args:
+            tokens (int): 预估 Token 数
+            priority (int): 请求优先级
+            timeout (Optional[float]): 最长排队时间 (秒)，为空时不限制
+
+        Returns:
+            float: 排队耗时 (毫秒)
+
+        Raises:
+            LLMQueueTimeoutError: 排队超时
+        """
+        start_time = time.monotonic()
+        self.total_requests += 1
+        if not self._waiters and self._wait_time(tokens) <= 0 and (
+            self.max_concurrency <= 0 or self._in_flight < self.max_concurrency
+        ):
+            self._grant(tokens)
+            return 0
+
+        self.queued_requests += 1
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future, tokens))
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            # 超时的请求已从队列中取消，重新分发以免队首的已取消请求阻塞后续请求
+            self.queue_timeout_count += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            self._dispatch()
+            raise LLMQueueTimeoutError(f"LLM 请求限流排队超时 ({timeout:g}s) | {self.label}") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+        queue_ms = (time.monotonic() - start_time) * 1000
+        self.total_queue_ms += queue_ms
+        self.max_queue_ms = max(self.max_queue_ms, queue_ms)
+        if queue_ms > 1000:
+            logger.info(f"LLM 请求限流排队 {queue_ms:.0f}ms | {self.label}")
+        return queue_ms
+
+    def release(self, token_delta: int = 0) -> None:
+        """释放请求许可
+
+        Args:
+            token_delta (int): 实际 Token 消耗与预估值的差额，计入 TPM 令牌桶
+        """
+        self._in_flight = max(0, self._in_flight - 1)
+        if self._tpm_bucket and token_delta:
+            self._tpm_bucket.consume(token_delta)
+        if self._timer is None:
+            self._dispatch()
+
+    def pause(self, seconds: float) -> None:
+        """收到 429 响应时暂停分发"""
+        self.rate_limited_count += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"LLM 请求触发上游限流，暂停 {seconds:.1f}s | {self.label}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for _, _, future, _ in self._waiters if not future.done()),
+            "total_requests": self.total_requests,
+            "queued_requests": self.queued_requests,
+            "avg_queue_ms": round(self.total_queue_ms / self.queued_requests, 2) if self.queued_requests else 0,
+            "max_queue_ms": round(self.max_queue_ms, 2),
+            "rate_limited_count": self.rate_limited_count,
+            "queue_timeout_count": self.queue_timeout_count,
+        }
+
+
+class LLMRateLimiterRegistry:
+    """限流器注册表"""
+
+    def __init__(self):
+        self._limiters: Dict[Tuple[str, str, str], ModelRateLimiter] = {}
+
+    @staticmethod
+    def _resolve_limits(model: str, base_url: str, api_key: str) -> Tuple[int, int, int, List[str]]:
+        """从模型组配置中获取限额，多个模型组匹配时取最严格的非零值"""
+
+        def strictest(values: List[int]) -> int:
+            positive = [v for v in values if v > 0]
+            return min(positive) if positive else 0
+
+        groups = [
+            (name, group)
+            for name, group in core_config.MODEL_GROUPS.items()
+            if model == group.CHAT_MODEL and base_url == group.BASE_URL and api_key == group.API_KEY.strip()
+        ]
+        return (
+            strictest([group.RPM_LIMIT for _, group in groups]),
+            strictest([group.TPM_LIMIT for _, group in groups]),
+            strictest([group.MAX_CONCURRENCY for _, group in groups]),
+            [name for name, _ in groups],
+        )
+
+    def get(self, model: str, base_url: Optional[str], api_key: Optional[str]) -> ModelRateLimiter:
+        """获取限流器并同步最新的限额配置"""
+        base_url, api_key = base_url or "", (api_key or "").strip()
+        rpm_limit, tpm_limit, max_concurrency, group_names = self._resolve_limits(model, base_url, api_key)
+        key = (base_url, api_key, model)
+        if key not in self._limiters:
+            host = urlparse(base_url).netloc or base_url or "default"
+            groups_label = f" [{', '.join(group_names)}]" if group_names else ""
+            self._limiters[key] = ModelRateLimiter(f"{model}@{host}{groups_label}")
+        limiter = self._limiters[key]
+        limiter.update_limits(rpm_limit, tpm_limit, max_concurrency)
+        return limiter
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """获取所有限流器统计 (不包含 API 密钥)"""
+        return [limiter.get_stats() for limiter in self._limiters.values()]
+
+
+llm_rate_limiter = LLMRateLimiterRegistry()
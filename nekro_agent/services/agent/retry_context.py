@@ -0,0 +1,124 @@
+import difflib
+from typing import List
+
+from nekro_agent.models.db_exec_code import ExecStopType
+
+from .creator import OpenAIChatMessage
+
+# 携带后续所需信息的迭代类型，压缩时保留完整的回复与反馈
+_INFORMATIVE_STOP_TYPES = (ExecStopType.AGENT, ExecStopType.MULTIMODAL_AGENT)
+
+# 被折叠的历史尝试中保留的错误尾部长度 (字节)
+_SUMMARY_ERROR_TAIL_BYTES = 256
+
+
+def truncate_text_bytes(text: str, max_bytes: int, keep_head_ratio: float = 0.25) -> str:
+    """按字节数截断文本，保留开头与结尾部分 (错误堆栈信息通常位于结尾)
+
+    Args:
+        text (str): 原始文本
+        max_bytes (int): 最大字节数，小于等于 0 时不截断
+        keep_head_ratio (float): 保留开头部分所占比例
+    """
+    encoded = text.encode("utf-8")
+    if max_bytes <= 0 or len(encoded) <= max_bytes:
+        return text
+    head_bytes = int(max_bytes * keep_head_ratio)
+    tail_bytes = max_bytes - head_bytes
+    head = encoded[:head_bytes].decode("utf-8", errors="ignore")
+    tail = encoded[-tail_bytes:].decode("utf-8", errors="ignore") if tail_bytes > 0 else ""
+    return f"{head}\n...({len(encoded) - max_bytes} bytes omitted)...\n{tail}"
+
+
+def summarize_code_diff(prev_code: str, code: str) -> str:
+    """生成两次尝试代码变更的简短摘要"""
+    added = removed = 0
+    for line in difflib.unified_diff(prev_code.splitlines(), code.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    if not prev_code:
+        return f"{len(code.splitlines())} lines of code"
+    return f"{len(code.splitlines())} lines of code, +{added}/-{removed} lines changed from the previous attempt"
+
+
+class RetryAttempt:
+    """Agent 单次迭代记录"""
+
+    def __init__(
+        self,
+        response_content: str,
+        code_content: str,
+        stop_type: ExecStopType,
+        sandbox_output: str,
+        feedback: OpenAIChatMessage,
+        history: OpenAIChatMessage,
+        instruction: str,
+    ):
+        self.response_content = response_content
+        self.code_content = code_content
+        self.stop_type = stop_type
+        self.sandbox_output = sandbox_output
+        self.feedback = feedback
+        self.history = history
+        self.instruction = instruction
+
+    def summarize(self, index: int, prev_code: str) -> str:
+        """生成该次尝试的简短摘要"""
+        error_lines = [line for line in self.sandbox_output.strip().splitlines() if line.strip()]
+        error_tail = truncate_text_bytes("\n".join(error_lines[-3:]), _SUMMARY_ERROR_TAIL_BYTES, keep_head_ratio=0)
+        return (
+            f"- Attempt {index} ({self.stop_type.name.lower()}): {summarize_code_diff(prev_code, self.code_content)}"
+            + (f"\n  Error tail: {error_tail}" if error_tail else "")
+        )
+
+    def to_messages(self) -> List[OpenAIChatMessage]:
+        """转换为完整的迭代上下文消息"""
+        return [
+            OpenAIChatMessage.from_text("assistant", self.response_content),
+            self.feedback.extend(self.history).extend(OpenAIChatMessage.from_text("user", self.instruction)).tidy(),
+        ]
+
+
+def build_retry_messages(attempts: List[RetryAttempt], max_bytes: int) -> List[OpenAIChatMessage]:
+    """构造迭代上下文消息
+
+    保留最近一次尝试的完整回复与反馈，以及 Agent 类型的迭代结果；
+    更早的失败尝试折叠为代码差异与错误尾部摘要，并将其间的新消息记录合并到下一条反馈中。
+
+    Args:
+        attempts (List[RetryAttempt]): 按时间顺序排列的迭代记录
+        max_bytes (int): 摘要部分的最大字节数，小于等于 0 时不压缩
+    """
+    if max_bytes <= 0:
+        return [msg for attempt in attempts for msg in attempt.to_messages()]
+
+    messages: List[OpenAIChatMessage] = []
+    summaries: List[str] = []
+    carried_history: List[OpenAIChatMessage] = []
+    prev_code = ""
+    for i, attempt in enumerate(attempts):
+        is_latest = i == len(attempts) - 1
+        if not is_latest and attempt.stop_type not in _INFORMATIVE_STOP_TYPES:
+            summaries.append(attempt.summarize(i + 1, prev_code))
+            carried_history.append(attempt.history)
+            prev_code = attempt.code_content
+            continue
+
+        feedback = OpenAIChatMessage.create_empty("user")
+        if summaries:
+            summary_text = truncate_text_bytes("\n".join(summaries), max_bytes, keep_head_ratio=0)
+            feedback = feedback.extend(
+                OpenAIChatMessage.from_text("user", f"[Earlier Failed Attempts (code omitted)]\n{summary_text}\n---\n"),
+            )
+        for history in carried_history:
+            feedback = feedback.extend(history)
+        feedback = feedback.extend(attempt.feedback).extend(attempt.history)
+        feedback = feedback.extend(OpenAIChatMessage.from_text("user", attempt.instruction))
+
+        messages.append(OpenAIChatMessage.from_text("assistant", attempt.response_content))
+        messages.append(feedback.tidy())
+        summaries, carried_history = [], []
+        prev_code = attempt.code_content
+    return messages
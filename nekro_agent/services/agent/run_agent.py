@@ -4,7 +4,7 @@ import os
 import time
 from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import weave
 from jinja2 import Environment
@@ -17,17 +17,26 @@ from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_exec_code import ExecStopType
 from nekro_agent.schemas.agent_ctx import AgentCtx
 from nekro_agent.schemas.chat_message import ChatMessage
+from nekro_agent.services.llm_ledger import LLMCallInfo
 from nekro_agent.services.plugin.collector import plugin_collector
+from nekro_agent.services.prompt_log_writer import prompt_log_writer
 from nekro_agent.services.sandbox.runner import limited_run_code
 
 from ..config_resolver import config_resolver
 from .creator import OpenAIChatMessage
+from .hedging import llm_hedge_policy
+from .model_health import BreakerState, model_health_tracker
 from .openai import OpenAIResponse, gen_openai_chat_response
+from .prompt_prefix import prompt_prefix_tracker
+from .prompt_profiler import PromptBuildProfile, prompt_profiler
+from .rate_limiter import LLMQueueTimeoutError, RequestPriority
 from .resolver import ParsedCodeRunData, parse_chat_response
+from .retry_context import RetryAttempt, build_retry_messages, truncate_text_bytes
 from .templates.base import env as default_env
 from .templates.history import HistoryFirstStart, render_history_data
-from .templates.plugin import render_plugins_prompt
+from .templates.plugin import render_plugins_inject_prompt, render_plugins_prompt
 from .templates.practice import (
+    PRACTICE_ONE_TIME_CODE,
     BasePracticePrompt_question,
     BasePracticePrompt_response,
     PracticePrompt_question_1,
@@ -48,95 +57,122 @@ async def run_agent(
 ):
     # 获取当前会话的有效配置
     one_time_code = os.urandom(4).hex()
-    db_chat_channel: DBChatChannel = await DBChatChannel.get(chat_key=chat_key)
+    db_chat_channel: DBChatChannel = await DBChatChannel.get_channel(chat_key=chat_key)
     config = await db_chat_channel.get_effective_config()
     preset = await db_chat_channel.get_preset()
     ctx: AgentCtx = AgentCtx.create_by_db_chat_channel(db_chat_channel=db_chat_channel)
     adapter_dialog_examples = await ctx.adapter.set_dialog_example()
     adapter_jinja_env = await ctx.adapter.get_jinja_env()
-    self_info = await ctx.adapter.get_self_info()
+    self_info = await ctx.adapter.get_cached_self_info()
 
     # 获取当前使用的模型组
     used_model_group: ModelConfigGroup = config.MODEL_GROUPS[config.USE_MODEL_GROUP]
 
-    messages = [
-        OpenAIChatMessage.from_template(
-            "system",
-            SystemPrompt(
-                one_time_code=one_time_code,
-                platform_name=self_info.platform_name,
-                bot_platform_id=self_info.user_id,
-                chat_preset=preset.content,
-                chat_key=chat_key,
-                plugins_prompt=await render_plugins_prompt(plugin_collector.get_all_active_plugins(), ctx),
-                admin_chat_key=config.ADMIN_CHAT_KEY,
-                enable_cot=used_model_group.ENABLE_COT,
-                chat_key_rules="\n".join([f"- {r}" for r in [db_chat_channel.adapter.chat_key_rules]]),
-                enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+    # 记录各构建阶段的耗时与大小
+    profile = PromptBuildProfile(chat_key)
+
+    # 提示词按 稳定内容 -> 易变内容 的顺序组装，使同一会话的多次请求共享尽可能长的前缀以命中上游前缀缓存
+    # 稳定内容: 基础指令、插件方法文档、对话示例；易变内容: 一次性代码、插件注入提示、时间、历史记录
+    active_plugins = plugin_collector.get_all_active_plugins()
+    with profile.measure("system_prompt"):
+        messages = [
+            OpenAIChatMessage.from_template(
+                "system",
+                SystemPrompt(
+                    platform_name=self_info.platform_name,
+                    bot_platform_id=self_info.user_id,
+                    chat_preset=preset.content,
+                    chat_key=chat_key,
+                    plugins_prompt=await render_plugins_prompt(active_plugins, ctx),
+                    admin_chat_key=config.ADMIN_CHAT_KEY,
+                    enable_cot=used_model_group.ENABLE_COT,
+                    chat_key_rules="\n".join([f"- {r}" for r in [db_chat_channel.adapter.chat_key_rules]]),
+                    enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+                ),
+                default_env,
             ),
-            default_env,
-        ),
-    ]
-
-    if adapter_dialog_examples and adapter_jinja_env:
-        for prompt_template in adapter_dialog_examples:
-            role = None
-            if isinstance(prompt_template, BasePracticePrompt_question):
-                role = "user"
-                prompt_template.one_time_code = one_time_code
-            elif isinstance(prompt_template, BasePracticePrompt_response):
-                role = "assistant"
-                prompt_template.one_time_code = one_time_code
-                prompt_template.enable_cot = used_model_group.ENABLE_COT
-                prompt_template.enable_at = db_chat_channel.adapter.config.SESSION_ENABLE_AT
-            else:
-                raise TypeError(f"未知消息类型模板: {prompt_template}")
-            messages.append(OpenAIChatMessage.from_template(role, prompt_template, adapter_jinja_env))
-    else:
-        # 使用默认对话示例
-        messages.extend(
-            [
-                OpenAIChatMessage.from_template("user", PracticePrompt_question_1(one_time_code=one_time_code), default_env),
-                OpenAIChatMessage.from_template(
-                    "assistant",
-                    PracticePrompt_response_1(
-                        one_time_code=one_time_code,
-                        enable_cot=used_model_group.ENABLE_COT,
-                        enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+        ]
+    profile.add_messages("system_prompt", messages)
+
+    with profile.measure("practice_examples"):
+        if adapter_dialog_examples and adapter_jinja_env:
+            for prompt_template in adapter_dialog_examples:
+                role = None
+                if isinstance(prompt_template, BasePracticePrompt_question):
+                    role = "user"
+                    prompt_template.one_time_code = PRACTICE_ONE_TIME_CODE
+                elif isinstance(prompt_template, BasePracticePrompt_response):
+                    role = "assistant"
+                    prompt_template.one_time_code = PRACTICE_ONE_TIME_CODE
+                    prompt_template.enable_cot = used_model_group.ENABLE_COT
+                    prompt_template.enable_at = db_chat_channel.adapter.config.SESSION_ENABLE_AT
+                else:
+                    raise TypeError(f"未知消息类型模板: {prompt_template}")
+                messages.append(OpenAIChatMessage.from_template(role, prompt_template, adapter_jinja_env))
+        else:
+            # 使用默认对话示例
+            messages.extend(
+                [
+                    OpenAIChatMessage.from_template("user", PracticePrompt_question_1(one_time_code=PRACTICE_ONE_TIME_CODE), default_env),
+                    OpenAIChatMessage.from_template(
+                        "assistant",
+                        PracticePrompt_response_1(
+                            one_time_code=PRACTICE_ONE_TIME_CODE,
+                            enable_cot=used_model_group.ENABLE_COT,
+                            enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+                        ),
+                        default_env,
                     ),
-                    default_env,
-                ),
-                OpenAIChatMessage.from_template("user", PracticePrompt_question_2(one_time_code=one_time_code), default_env),
-                OpenAIChatMessage.from_template(
-                    "assistant",
-                    PracticePrompt_response_2(
-                        one_time_code=one_time_code,
-                        enable_cot=used_model_group.ENABLE_COT,
-                        enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+                    OpenAIChatMessage.from_template("user", PracticePrompt_question_2(one_time_code=PRACTICE_ONE_TIME_CODE), default_env),
+                    OpenAIChatMessage.from_template(
+                        "assistant",
+                        PracticePrompt_response_2(
+                            one_time_code=PRACTICE_ONE_TIME_CODE,
+                            enable_cot=used_model_group.ENABLE_COT,
+                            enable_at=db_chat_channel.adapter.config.SESSION_ENABLE_AT,
+                        ),
+                        default_env,
                     ),
-                    default_env,
-                ),
-            ],
+                ],
+            )
+    profile.add_messages("practice_examples", messages[1:])
+
+    with profile.measure("plugin_injections"):
+        plugin_injected_prompt = await render_plugins_inject_prompt(
+            active_plugins,
+            ctx,
+            timeout=config.AI_PLUGIN_PROMPT_RENDER_TIMEOUT,
         )
+    profile.add_text("plugin_injections", plugin_injected_prompt)
 
-    messages.append(
-        OpenAIChatMessage.from_template("user", HistoryFirstStart(enable_cot=used_model_group.ENABLE_COT), default_env).extend(
-            await render_history_data(
-                chat_key=chat_key,
-                db_chat_channel=db_chat_channel,
-                one_time_code=one_time_code,
-                model_group=used_model_group,
-                config=config,
-            ),
-        ),
+    history_message = await render_history_data(
+        chat_key=chat_key,
+        db_chat_channel=db_chat_channel,
+        one_time_code=one_time_code,
+        model_group=used_model_group,
+        config=config,
+        plugin_injected_prompt=plugin_injected_prompt,
+        profile=profile,
     )
+    with profile.measure("final_messages"):
+        messages.append(
+            OpenAIChatMessage.from_template(
+                "user",
+                HistoryFirstStart(one_time_code=one_time_code, enable_cot=used_model_group.ENABLE_COT),
+                default_env,
+            ).extend(history_message),
+        )
+    profile.add_messages("final_messages", messages)
+    prompt_profiler.record(profile)
 
     history_render_until_time = time.time()
     llm_response, used_model_group = await send_agent_request(messages=messages, config=config, chat_key=chat_key)
     parsed_code_data: ParsedCodeRunData = parse_chat_response(llm_response.response_content)
 
+    base_messages_count = len(messages)
+    retry_attempts: List[RetryAttempt] = []  # 迭代记录，每次请求前压缩为迭代上下文
+
     for i in range(config.AI_SCRIPT_MAX_RETRY_TIMES):
-        addition_prompt_message: List[OpenAIChatMessage] = []
         sandbox_output = ""
         raw_output = ""
         if one_time_code in parsed_code_data.code_content:
@@ -154,9 +190,6 @@ async def run_agent(
         if stop_type == ExecStopType.NORMAL:
             return
 
-        # 添加 AI 回复的原始内容到上下文
-        addition_prompt_message.append(OpenAIChatMessage.from_text("assistant", llm_response.response_content))
-
         msg: OpenAIChatMessage = OpenAIChatMessage.create_empty("user")  # 待添加到迭代上下文的用户消息
 
         # Agent 类型的迭代对话
@@ -181,6 +214,9 @@ async def run_agent(
                 raise ValueError(f"Multimodal agent result is not a list or string: {multimodal_agent_result}")
             msg = msg.extend(OpenAIChatMessage.from_text("user", "Attention: the code AFTER THE AGENT METHOD is NOT EXECUTED!"))
 
+        # Agent 方法的返回结果完整保留，仅作为错误反馈的沙盒输出按字节上限截断，保留结尾的错误信息
+        sandbox_output = truncate_text_bytes(sandbox_output, config.AI_RETRY_CONTEXT_MAX_BYTES)
+
         # 异常类型的迭代对话
         exception_reason_map: Dict[ExecStopType, str] = {
             ExecStopType.TIMEOUT: "Sandbox exited due to timeout",
@@ -206,32 +242,33 @@ async def run_agent(
                 ),
             )
 
-        # 为所有迭代对话添加新记录背景
-        msg = msg.extend(
-            await render_history_data(
-                chat_key=chat_key,
-                db_chat_channel=db_chat_channel,
-                one_time_code=one_time_code,
-                record_sta_timestamp=history_render_until_time,
-                model_group=used_model_group,
-                config=config,
-            ),
-        )
-        msg = msg.extend(
-            OpenAIChatMessage.from_text(
-                "user",
-                "\nplease DO NOT give any extra explanation or apology and keep the response format for retry."
+        # 记录本次迭代，为所有迭代对话添加新记录背景
+        retry_attempts.append(
+            RetryAttempt(
+                response_content=llm_response.response_content,
+                code_content=parsed_code_data.code_content,
+                stop_type=stop_type,
+                sandbox_output=sandbox_output,
+                feedback=msg,
+                history=await render_history_data(
+                    chat_key=chat_key,
+                    db_chat_channel=db_chat_channel,
+                    one_time_code=one_time_code,
+                    record_sta_timestamp=history_render_until_time,
+                    model_group=used_model_group,
+                    config=config,
+                ),
+                instruction="\nplease DO NOT give any extra explanation or apology and keep the response format for retry."
                 + (
                     f" This is the last retry. Describe the reason if you can't finish the task. (Iteration times: {i + 1}/{config.AI_SCRIPT_MAX_RETRY_TIMES})"
                     if i == config.AI_SCRIPT_MAX_RETRY_TIMES - 1
-                    else "(Iteration times: {i + 1}/{config.AI_SCRIPT_MAX_RETRY_TIMES})"
+                    else f"(Iteration times: {i + 1}/{config.AI_SCRIPT_MAX_RETRY_TIMES})"
                 ),
             ),
         )
 
-        # 将迭代对话添加到上下文
-        addition_prompt_message.append(msg.tidy())
-        messages.extend(addition_prompt_message)
+        # 将压缩后的迭代对话添加到上下文：保留最新代码与错误尾部，更早的失败尝试折叠为差异摘要
+        messages = messages[:base_messages_count] + build_retry_messages(retry_attempts, config.AI_RETRY_CONTEXT_MAX_BYTES)
 
         history_render_until_time = time.time()
         llm_response, used_model_group = await send_agent_request(
@@ -249,41 +286,93 @@ async def send_agent_request(
     is_debug_iteration: bool = False,
     chat_key: str = "",
 ) -> Tuple[OpenAIResponse, ModelConfigGroup]:
-    model_group: ModelConfigGroup = (
-        config.MODEL_GROUPS[config.DEBUG_MIGRATION_MODEL_GROUP]
+    model_group_name: str = (
+        config.DEBUG_MIGRATION_MODEL_GROUP
         if is_debug_iteration and config.DEBUG_MIGRATION_MODEL_GROUP
-        else config.MODEL_GROUPS[config.USE_MODEL_GROUP]
-    )
-    fallback_model_group: ModelConfigGroup = (
-        config.MODEL_GROUPS[config.FALLBACK_MODEL_GROUP] if config.FALLBACK_MODEL_GROUP else model_group
+        else config.USE_MODEL_GROUP
     )
+    fallback_model_group_name: str = config.FALLBACK_MODEL_GROUP or model_group_name
+    model_group: ModelConfigGroup = config.MODEL_GROUPS[model_group_name]
+    fallback_model_group: ModelConfigGroup = config.MODEL_GROUPS[fallback_model_group_name]
 
-    if config.SAVE_PROMPTS_LOG:
-        log_path = f"{PROMPT_LOG_DIR}/chat_log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
-    else:
-        log_path = None
+    log_path = prompt_log_writer.new_ref() if config.SAVE_PROMPTS_LOG else None
     err_log_path = (
         f"{PROMPT_ERROR_LOG_DIR}/chat_err_{model_group.CHAT_MODEL}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
     )
 
     used_model_group: ModelConfigGroup = model_group  # 记录实际使用的模型组
 
+    if chat_key:
+        prompt_prefix_tracker.observe(chat_key, messages)
+
+    def _request(
+        request_model_group_name: str,
+        retry_index: int,
+        first_token_callback: Optional[Callable[[], None]] = None,
+        is_hedge: bool = False,
+    ):
+        request_model_group: ModelConfigGroup = config.MODEL_GROUPS[request_model_group_name]
+        return gen_openai_chat_response(
+            model=request_model_group.CHAT_MODEL,
+            messages=messages,
+            base_url=request_model_group.BASE_URL,
+            api_key=request_model_group.API_KEY,
+            stream_mode=config.AI_REQUEST_STREAM_MODE,
+            proxy_url=request_model_group.CHAT_PROXY,
+            max_wait_time=config.AI_GENERATE_TIMEOUT,
+            first_token_callback=first_token_callback,
+            log_path=log_path,
+            error_log_path=err_log_path,
+            priority=RequestPriority.HIGH,
+            call_info=LLMCallInfo(
+                source="agent",
+                model_group=request_model_group_name,
+                chat_key=chat_key,
+                retry_index=retry_index,
+                is_fallback=request_model_group_name != model_group_name,
+                is_hedge=is_hedge,
+            ),
+        )
+
     for i in range(config.AI_CHAT_LLM_API_MAX_RETRIES):
-        use_model_group: ModelConfigGroup = model_group if i < config.AI_CHAT_LLM_API_MAX_RETRIES - 1 else fallback_model_group
+        use_model_group_name = model_group_name if i < config.AI_CHAT_LLM_API_MAX_RETRIES - 1 else fallback_model_group_name
+        # 首选模型组熔断时直接路由到可用的模型组
+        if config.AI_MODEL_BREAKER_ENABLED:
+            use_model_group_name = model_health_tracker.route(
+                use_model_group_name,
+                [fallback_model_group_name, model_group_name],
+                config.AI_MODEL_BREAKER_OPEN_SECONDS,
+            )
+        use_model_group: ModelConfigGroup = config.MODEL_GROUPS[use_model_group_name]
 
         try:
-            llm_response: OpenAIResponse = await gen_openai_chat_response(
-                model=use_model_group.CHAT_MODEL,
-                messages=messages,
-                base_url=use_model_group.BASE_URL,
-                api_key=use_model_group.API_KEY,
-                stream_mode=config.AI_REQUEST_STREAM_MODE,
-                proxy_url=use_model_group.CHAT_PROXY,
-                max_wait_time=config.AI_GENERATE_TIMEOUT,
-                log_path=log_path,
-                error_log_path=err_log_path,
-            )
+            # 主模型组迟迟未开始输出时向备用模型组发起对冲请求
+            if (
+                config.AI_HEDGE_ENABLED
+                and llm_hedge_policy.model_key(use_model_group) != llm_hedge_policy.model_key(fallback_model_group)
+                and model_health_tracker.get_state(fallback_model_group_name) != BreakerState.OPEN
+            ):
+                llm_response, hedge_won = await llm_hedge_policy.request(
+                    primary_group=use_model_group,
+                    primary=lambda callback, group=use_model_group_name, attempt=i: _request(group, attempt, callback),
+                    hedge=lambda callback, attempt=i: _request(fallback_model_group_name, attempt, callback, is_hedge=True),
+                    percentile=config.AI_HEDGE_DELAY_PERCENTILE,
+                    min_delay=config.AI_HEDGE_MIN_DELAY_SECONDS,
+                    budget_ratio=config.AI_HEDGE_BUDGET_RATIO,
+                )
+                if hedge_won:
+                    use_model_group_name, use_model_group = fallback_model_group_name, fallback_model_group
+            else:
+                llm_response = await _request(use_model_group_name, i)
         except Exception as e:
+            # 客户端限流排队超时时请求未发送到上游，不计入模型组健康状态
+            if not isinstance(e, LLMQueueTimeoutError):
+                model_health_tracker.record_failure(
+                    use_model_group_name,
+                    str(e),
+                    config.AI_MODEL_BREAKER_ERROR_RATE,
+                    config.AI_MODEL_BREAKER_MIN_REQUESTS,
+                )
             logger.error(
                 f"LLM 请求失败: {e} ｜ 使用模型: {use_model_group.CHAT_MODEL} {'(fallback)' if i == config.AI_CHAT_LLM_API_MAX_RETRIES - 1 else ''}",
             )
@@ -294,6 +383,9 @@ async def send_agent_request(
             continue
         else:
             used_model_group = use_model_group  # 记录成功使用的模型组
+            first_token_cost_ms = llm_response.first_token_cost_ms or llm_response.generation_time_ms
+            llm_hedge_policy.record_latency(used_model_group, first_token_cost_ms)
+            model_health_tracker.record_success(use_model_group_name, first_token_cost_ms)
             break
     else:
         err_log = Path(f"{PROMPT_LOG_DIR}/chat_err_log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.log")
@@ -1,20 +1,66 @@
-from functools import wraps
-from typing import Any, Callable, Optional, Type, TypeVar
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type, TypeVar
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from pydantic import BaseModel, PrivateAttr
 
-env = Environment(loader=FileSystemLoader("nekro_agent/services/agent/templates/j2"), auto_reload=False)
+from nekro_agent.core.os_env import JINJA_BYTECODE_CACHE_DIR
+
+# 模板渲染结果缓存容量 (每个 Jinja 环境独立计算)
+RENDER_CACHE_MAX_SIZE: int = 512
+
+
+def create_template_env(template_dir: str) -> Environment:
+    """创建启用字节码缓存的模板环境
+
+    Args:
+        template_dir: 模板目录
+    """
+    Path(JINJA_BYTECODE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        auto_reload=False,
+        bytecode_cache=FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR),
+    )
+
+
+def precompile_templates(target_env: Environment) -> int:
+    """预编译模板环境中的所有模板
+
+    Args:
+        target_env: 模板环境
+
+    Returns:
+        int: 预编译的模板数量
+    """
+    template_names = target_env.list_templates()
+    for template_name in template_names:
+        target_env.get_template(template_name)
+    return len(template_names)
+
+
+env = create_template_env("nekro_agent/services/agent/templates/j2")
 
 T = TypeVar("T", bound="PromptTemplate")
 
+# 模板环境 -> (渲染缓存键 -> 渲染结果)
+_render_caches: "weakref.WeakKeyDictionary[Environment, OrderedDict[Tuple[Hashable, ...], str]]" = weakref.WeakKeyDictionary()
+_render_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
 
-def register_template(template_name: str, macro_name: Optional[str] = None) -> Callable[[Type[T]], Type[T]]:
+def register_template(
+    template_name: str,
+    macro_name: Optional[str] = None,
+    cacheable: bool = True,
+) -> Callable[[Type[T]], Type[T]]:
     """注册模板装饰器
 
     Args:
         template_name: 模板文件路径
         macro_name: 宏名称，可选
+        cacheable: 是否缓存渲染结果，输入包含时间等每次都不同的内容时应关闭
     """
 
     def decorator(cls: Type[T]) -> Type[T]:
@@ -24,19 +70,59 @@ def register_template(template_name: str, macro_name: Optional[str] = None) -> C
         # 同时存储原始值为类属性，便于访问
         cls._template_name_str = template_name  # type: ignore
         cls._macro_name_str = macro_name  # type: ignore
+        cls._render_cacheable = cacheable  # type: ignore
         return cls
 
     return decorator
 
 
+def get_render_cache_stats() -> Dict[str, int]:
+    """获取模板渲染缓存命中统计"""
+    return {**_render_cache_stats, "size": sum(len(cache) for cache in _render_caches.values())}
+
+
+def clear_render_cache() -> None:
+    """清空模板渲染缓存"""
+    _render_caches.clear()
+
+
 class PromptTemplate(BaseModel):
     """提示模板基类"""
 
     _template_name: str = PrivateAttr()
     _macro_name: Optional[str] = PrivateAttr()
 
+    def _render_cache_key(self) -> Optional[Tuple[Hashable, ...]]:
+        """根据模板输入生成缓存键，输入不可哈希时返回 None"""
+        values: Tuple[Any, ...] = tuple(getattr(self, field_name) for field_name in self.__class__.model_fields)
+        key = (self.__class__, values)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
     def render(self, env) -> str:
         """渲染模板"""
+        cache_key = self._render_cache_key() if getattr(self.__class__, "_render_cacheable", True) else None
+        if cache_key is not None:
+            cache = _render_caches.setdefault(env, OrderedDict())
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cache.move_to_end(cache_key)
+                _render_cache_stats["hits"] += 1
+                return cached
+            _render_cache_stats["misses"] += 1
+
+        rendered = self._render(env)
+
+        if cache_key is not None:
+            cache[cache_key] = rendered
+            while len(cache) > RENDER_CACHE_MAX_SIZE:
+                cache.popitem(last=False)
+        return rendered
+
+    def _render(self, env) -> str:
         # 使用类属性访问模板名和宏名
         template = env.get_template(self.__class__._template_name_str)  # type: ignore # noqa: SLF001
         data = {k: v for k, v in self.model_dump().items() if not k.startswith("_")}
@@ -6,12 +6,18 @@ from lunar_python import Lunar
 
 from nekro_agent.core import logger
 from nekro_agent.core.config import CoreConfig, ModelConfigGroup
+from nekro_agent.core.config import config as core_config
 from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_chat_message import DBChatMessage
 from nekro_agent.schemas.chat_message import (
     ChatMessageSegmentImage,
     ChatMessageSegmentType,
 )
+from nekro_agent.services.media_ingestion import (
+    MEDIA_INGEST_WAIT_TIMEOUT,
+    media_ingestion,
+)
+from nekro_agent.services.message_buffer import message_write_buffer
 from nekro_agent.tools.common_util import compress_image
 from nekro_agent.tools.path_convertor import (
     convert_filename_to_access_path,
@@ -19,21 +25,24 @@ from nekro_agent.tools.path_convertor import (
 )
 
 from ..creator import ContentSegment, OpenAIChatMessage
+from ..prompt_profiler import PromptBuildProfile
 from .base import PromptTemplate, env, register_template
+from .summary import HistorySummaryPrompt
 
 
-@register_template("history.j2", "history_first_start")
+@register_template("history.j2", "history_first_start", cacheable=False)
 class HistoryFirstStart(PromptTemplate):
+    one_time_code: str
     enable_cot: bool
 
 
-@register_template("history.j2", "history_debug_prompt")
+@register_template("history.j2", "history_debug_prompt", cacheable=False)
 class HistoryDebugPrompt(PromptTemplate):
     runout_reason: str
     code_output: str
 
 
-@register_template("history.j2", "history_data")
+@register_template("history.j2", "history_data", cacheable=False)
 class HistoryPrompt(PromptTemplate):
     plugin_injected_prompt: str
     chat_key: str
@@ -41,6 +50,11 @@ class HistoryPrompt(PromptTemplate):
     lunar_time: str
 
 
+def _message_key(msg: DBChatMessage) -> Tuple[str, int, str, str]:
+    """消息去重键，缓冲中的消息与写入后查询到的同一条消息键相同"""
+    return (msg.message_id, msg.send_timestamp, str(msg.sender_id), msg.content_text)
+
+
 async def render_history_data(
     chat_key: str,
     db_chat_channel: DBChatChannel,
@@ -48,7 +62,11 @@ async def render_history_data(
     config: CoreConfig,
     record_sta_timestamp: Optional[float] = None,
     model_group: Optional[ModelConfigGroup] = None,
+    plugin_injected_prompt: str = "",
+    profile: Optional[PromptBuildProfile] = None,
 ) -> OpenAIChatMessage:
+    profile = profile or PromptBuildProfile(chat_key)
+    is_first_render = record_sta_timestamp is None
     if record_sta_timestamp is None:
         record_sta_timestamp = int(time.time() - config.AI_CHAT_CONTEXT_EXPIRE_SECONDS)
 
@@ -56,29 +74,43 @@ async def render_history_data(
     if model_group is None:
         model_group = config.MODEL_GROUPS[config.USE_MODEL_GROUP]
 
-    recent_chat_messages: List[DBChatMessage] = await (
-        DBChatMessage.filter(
-            send_timestamp__gte=max(record_sta_timestamp, db_chat_channel.conversation_start_time.timestamp()),
-            chat_key=chat_key,
+    with profile.measure("history_query"):
+        history_sta_timestamp = max(record_sta_timestamp, db_chat_channel.conversation_start_time.timestamp())
+        # 查询前获取写入缓冲快照，查询期间写入完成并移出缓冲的消息仍能从快照或查询结果中看到
+        pending_messages = message_write_buffer.get_pending(chat_key, history_sta_timestamp)
+        recent_chat_messages: List[DBChatMessage] = await (
+            DBChatMessage.filter(
+                send_timestamp__gte=history_sta_timestamp,
+                chat_key=chat_key,
+            )
+            .order_by("-send_timestamp")
+            .limit(config.AI_CHAT_CONTEXT_MAX_LENGTH * 3)
         )
-        .order_by("-send_timestamp")
-        .limit(config.AI_CHAT_CONTEXT_MAX_LENGTH * 3)
-    )
-    # 过滤掉较早的 System 消息，只保留最近 10 条消息中的前 3 条
-    _to_remove_msgs: List[DBChatMessage] = []
-    keep_system_msg_count = config.AI_SYSTEM_NOTIFY_WINDOW_SIZE
-    for i, msg in enumerate(recent_chat_messages):
-        if msg.is_system:
-            if keep_system_msg_count > 0 and i < config.AI_SYSTEM_NOTIFY_LIMIT:
-                keep_system_msg_count -= 1
-            else:
-                _to_remove_msgs.append(msg)
-    recent_chat_messages = [msg for msg in recent_chat_messages if msg not in _to_remove_msgs]
-    # 反转列表顺序并确保不超过最大长度
-    recent_chat_messages = recent_chat_messages[::-1][-config.AI_CHAT_CONTEXT_MAX_LENGTH :]
+        # 合并尚在写入缓冲中的最新消息，跳过查询期间已写入数据库的消息
+        if pending_messages:
+            stored_keys = {_message_key(msg) for msg in recent_chat_messages}
+            pending_messages = [msg for msg in pending_messages if _message_key(msg) not in stored_keys]
+            recent_chat_messages = sorted(
+                pending_messages[::-1] + recent_chat_messages,
+                key=lambda msg: msg.send_timestamp,
+                reverse=True,
+            )[: config.AI_CHAT_CONTEXT_MAX_LENGTH * 3]
+        # 过滤掉较早的 System 消息，只保留最近 10 条消息中的前 3 条
+        # 缓冲中的消息尚无主键，模型的相等比较按主键进行，因此按对象标识过滤
+        _to_remove_msg_ids: Set[int] = set()
+        keep_system_msg_count = config.AI_SYSTEM_NOTIFY_WINDOW_SIZE
+        for i, msg in enumerate(recent_chat_messages):
+            if msg.is_system:
+                if keep_system_msg_count > 0 and i < config.AI_SYSTEM_NOTIFY_LIMIT:
+                    keep_system_msg_count -= 1
+                else:
+                    _to_remove_msg_ids.add(id(msg))
+        recent_chat_messages = [msg for msg in recent_chat_messages if id(msg) not in _to_remove_msg_ids]
+        # 反转列表顺序并确保不超过最大长度
+        recent_chat_messages = recent_chat_messages[::-1][-config.AI_CHAT_CONTEXT_MAX_LENGTH :]
 
     if not recent_chat_messages:
-        return OpenAIChatMessage.from_text("user", "[Not new message revived yet]")
+        return OpenAIChatMessage.from_text("user", f"{plugin_injected_prompt}\n[Not new message revived yet]".lstrip())
 
     # 提取并构造图片片段
     image_segments: List[ChatMessageSegmentImage] = []
@@ -89,57 +121,63 @@ async def render_history_data(
 
     img_seg_pairs: List[Tuple[str, Dict[str, Any]]] = []
     img_seg_set: Set[str] = set()
-    if image_segments and model_group.ENABLE_VISION:
-        for seg in image_segments[::-1]:
-            if len(img_seg_set) >= config.AI_VISION_IMAGE_LIMIT:
-                break
-            if seg.local_path:
-                if seg.file_name in img_seg_set:
-                    continue
-                access_path = convert_filename_to_access_path(seg.file_name, chat_key)
-                if not access_path.exists():
-                    logger.warning(f"图片不存在: {access_path}")
-                    continue
-                img_seg_set.add(seg.file_name)
-                # 检查图片大小
-                if access_path.stat().st_size > config.AI_VISION_IMAGE_SIZE_LIMIT_KB * 1024:
-                    # 压缩图片
-                    try:
-                        compressed_path = compress_image(access_path, config.AI_VISION_IMAGE_SIZE_LIMIT_KB)
-                    except Exception as e:
-                        logger.error(f"压缩图片时发生错误: {e} | 图片路径: {access_path} 跳过处理...")
+    with profile.measure("image_encoding"):
+        if image_segments and model_group.ENABLE_VISION:
+            # 附带的图片可能仍在后台下载，所有图片共用一个等待时限
+            wait_deadline = time.monotonic() + MEDIA_INGEST_WAIT_TIMEOUT
+            for seg in image_segments[::-1]:
+                if len(img_seg_set) >= config.AI_VISION_IMAGE_LIMIT:
+                    break
+                if seg.local_path:
+                    if seg.file_name in img_seg_set:
+                        continue
+                    access_path = convert_filename_to_access_path(seg.file_name, chat_key)
+                    await media_ingestion.wait_for(access_path, wait_deadline - time.monotonic())
+                    if not access_path.exists():
+                        logger.warning(f"图片不存在: {access_path}")
+                        continue
+                    img_seg_set.add(seg.file_name)
+                    # 检查图片大小
+                    if access_path.stat().st_size > config.AI_VISION_IMAGE_SIZE_LIMIT_KB * 1024:
+                        # 压缩图片
+                        try:
+                            compressed_path = compress_image(access_path, config.AI_VISION_IMAGE_SIZE_LIMIT_KB)
+                        except Exception as e:
+                            logger.error(f"压缩图片时发生错误: {e} | 图片路径: {access_path} 跳过处理...")
+                            continue
+                        img_seg_pairs.append(
+                            (
+                                f"<{one_time_code} | Image:{convert_filename_to_sandbox_upload_path(seg.file_name)}>",
+                                ContentSegment.image_content_from_path(str(compressed_path)),
+                            ),
+                        )
+                        logger.info(f"压缩图片: {access_path.name} -> {compressed_path.stat().st_size / 1024}KB")
+                    else:
+                        img_seg_pairs.append(
+                            (
+                                f"<{one_time_code} | Image:{convert_filename_to_sandbox_upload_path(seg.file_name)}>",
+                                ContentSegment.image_content_from_path(str(access_path)),
+                            ),
+                        )
+                elif seg.remote_url:
+                    if seg.remote_url in img_seg_set:
                         continue
+                    img_seg_set.add(seg.remote_url)
                     img_seg_pairs.append(
                         (
-                            f"<{one_time_code} | Image:{convert_filename_to_sandbox_upload_path(seg.file_name)}>",
-                            ContentSegment.image_content_from_path(str(compressed_path)),
+                            f"<{one_time_code} | Image:{seg.remote_url}>",
+                            ContentSegment.image_content(seg.remote_url),
                         ),
                     )
-                    logger.info(f"压缩图片: {access_path.name} -> {compressed_path.stat().st_size / 1024}KB")
                 else:
-                    img_seg_pairs.append(
-                        (
-                            f"<{one_time_code} | Image:{convert_filename_to_sandbox_upload_path(seg.file_name)}>",
-                            ContentSegment.image_content_from_path(str(access_path)),
-                        ),
-                    )
-            elif seg.remote_url:
-                if seg.remote_url in img_seg_set:
-                    continue
-                img_seg_set.add(seg.remote_url)
-                img_seg_pairs.append(
-                    (
-                        f"<{one_time_code} | Image:{seg.remote_url}>",
-                        ContentSegment.image_content(seg.remote_url),
-                    ),
-                )
-            else:
-                logger.warning(f"图片路径无效: {seg}")
+                    logger.warning(f"图片路径无效: {seg}")
+    for _, img_seg_content in img_seg_pairs:
+        profile.add_image("image_encoding", img_seg_content)
 
     openai_chat_message: OpenAIChatMessage = OpenAIChatMessage.from_template(
         "user",
         HistoryPrompt(
-            plugin_injected_prompt="",
+            plugin_injected_prompt=plugin_injected_prompt,
             chat_key=chat_key,
             current_time=time.strftime("%Y-%m-%d %H:%M:%S %Z %A", time.localtime()),
             lunar_time=Lunar.fromDate(datetime.datetime.now()).toString(),
@@ -159,40 +197,51 @@ async def render_history_data(
         openai_chat_message.add(ContentSegment.text_content(img_seg_prompt))
         openai_chat_message.add(img_seg_content)
 
+    # 首次渲染时以滚动摘要替代超出上下文窗口的更早历史记录
+    if is_first_render and core_config.AI_SUMMARY_ENABLED:
+        from nekro_agent.services.summary_service import chat_summary_service
+
+        summary = await chat_summary_service.get_summary(db_chat_channel)
+        if summary:
+            openai_chat_message.add(ContentSegment.text_content(HistorySummaryPrompt(summary=summary).render(env)))
+
     openai_chat_message.add(
         ContentSegment.text_content(
             "Recent Messages:\n",
         ),
     )
 
-    ref_msg_set: Set[str] = set()
-    for db_message in recent_chat_messages:
-        if db_message.ext_data_obj.ref_msg_id:
-            ref_msg_set.add(db_message.message_id)
-            ref_msg_set.add(db_message.ext_data_obj.ref_msg_id)
+    with profile.measure("history_parse"):
+        ref_msg_set: Set[str] = set()
+        for db_message in recent_chat_messages:
+            if db_message.ext_data_obj.ref_msg_id:
+                ref_msg_set.add(db_message.message_id)
+                ref_msg_set.add(db_message.ext_data_obj.ref_msg_id)
+
+        chat_history_prompts: List[str] = []
+        for db_message in recent_chat_messages:
+            chat_history_prompts.append(
+                db_message.parse_chat_history_prompt(
+                    one_time_code,
+                    config,
+                    ref_mode=config.AI_ALWAYS_INCLUDE_MSG_ID or db_message.message_id in ref_msg_set,
+                ),
+            )
+
+        # 确保总记录长度不超过最大字符长度
+        start_idx = 0
+        for i, prompt in enumerate(chat_history_prompts[::-1]):
+            if i + 1 >= len(chat_history_prompts):
+                break
+            if len(prompt) + len(chat_history_prompts[i + 1]) > config.AI_CHAT_CONTEXT_MAX_LENGTH:
+                start_idx = i + 1
+                break
+        chat_history_prompts = chat_history_prompts[start_idx:]
 
-    chat_history_prompts: List[str] = []
-    for db_message in recent_chat_messages:
-        chat_history_prompts.append(
-            db_message.parse_chat_history_prompt(
-                one_time_code,
-                config,
-                ref_mode=config.AI_ALWAYS_INCLUDE_MSG_ID or db_message.message_id in ref_msg_set,
-            ),
-        )
+        chat_history_prompt = f"\n<{one_time_code} | message separator>\n".join(chat_history_prompts)
+        chat_history_prompt += f"\n<{one_time_code} | message separator>\n"
 
-    # 确保总记录长度不超过最大字符长度
-    start_idx = 0
-    for i, prompt in enumerate(chat_history_prompts[::-1]):
-        if i + 1 >= len(chat_history_prompts):
-            break
-        if len(prompt) + len(chat_history_prompts[i + 1]) > config.AI_CHAT_CONTEXT_MAX_LENGTH:
-            start_idx = i + 1
-            break
-    chat_history_prompts = chat_history_prompts[start_idx:]
-
-    chat_history_prompt = f"\n<{one_time_code} | message separator>\n".join(chat_history_prompts)
-    chat_history_prompt += f"\n<{one_time_code} | message separator>\n"
+    profile.add_text("history_parse", chat_history_prompt)
     openai_chat_message.add(ContentSegment.text_content(chat_history_prompt))
 
     logger.info(f"加载最近 {len(recent_chat_messages)} 条对话记录 ({len(ref_msg_set)} 条引用相关消息)")
@@ -1,7 +1,13 @@
-from typing import List
+import asyncio
+import time
+from typing import Dict, List, Optional
 
+from pydantic import BaseModel
+
+from nekro_agent.core import logger
 from nekro_agent.schemas.agent_ctx import AgentCtx
 from nekro_agent.services.plugin.base import NekroPlugin
+from nekro_agent.tools.common_util import estimate_token_count
 
 from .base import PromptTemplate, env, register_template
 
@@ -13,19 +19,101 @@ class PluginPrompt(PromptTemplate):
     plugin_method_prompt: str
 
 
+@register_template("plugin.j2", "plugin_inject_prompt")
+class PluginInjectPrompt(PromptTemplate):
+    plugin_name: str
+    plugin_injected_prompt: str
+
+
+class PluginRenderStat(BaseModel):
+    """插件提示注入渲染耗时与估算 Token 统计"""
+
+    plugin_key: str
+    render_count: int = 0
+    timeout_count: int = 0
+    error_count: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+    last_ms: float = 0
+    last_tokens: int = 0
+    total_tokens: int = 0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.render_count if self.render_count else 0
+
+    def record(self, cost_ms: float) -> None:
+        self.render_count += 1
+        self.total_ms += cost_ms
+        self.last_ms = cost_ms
+        self.max_ms = max(self.max_ms, cost_ms)
+
+
+_plugin_render_stats: Dict[str, PluginRenderStat] = {}
+
+
+def get_plugin_render_stats() -> List[Dict]:
+    """获取各插件提示注入渲染耗时统计"""
+    return [
+        {**stat.model_dump(), "avg_ms": round(stat.avg_ms, 2)}
+        for stat in sorted(_plugin_render_stats.values(), key=lambda s: s.total_ms, reverse=True)
+    ]
+
+
+def _filter_plugins(plugins: List[NekroPlugin], ctx: AgentCtx) -> List[NekroPlugin]:
+    """筛选支持当前适配器的插件，并按插件 key 排序以保证提示词顺序稳定"""
+    return sorted(
+        [plugin for plugin in plugins if len(plugin.support_adapter) == 0 or ctx.adapter_key in plugin.support_adapter],
+        key=lambda plugin: plugin.key,
+    )
+
+
 async def _render_plugin_prompt(plugin: NekroPlugin, ctx: AgentCtx) -> str:
     return PluginPrompt(
         plugin_name=plugin.name,
-        plugin_injected_prompt=await plugin.render_inject_prompt(ctx),
+        plugin_injected_prompt="",
         plugin_method_prompt=await plugin.render_sandbox_methods_prompt(ctx),
     ).render(env)
 
 
 async def render_plugins_prompt(plugins: List[NekroPlugin], ctx: AgentCtx) -> str:
-    return "\n\n".join(
-        [
-            await _render_plugin_prompt(plugin, ctx)
-            for plugin in plugins
-            if len(plugin.support_adapter) == 0 or ctx.adapter_key in plugin.support_adapter
-        ],
+    """渲染插件方法文档 (稳定内容，位于系统提示词中)"""
+    return "\n\n".join(await asyncio.gather(*[_render_plugin_prompt(plugin, ctx) for plugin in _filter_plugins(plugins, ctx)]))
+
+
+async def _render_plugin_inject_prompt(plugin: NekroPlugin, ctx: AgentCtx, timeout: Optional[float]) -> str:
+    """渲染单个插件的注入提示词，超时或出错时返回空字符串以省略该段"""
+    stat = _plugin_render_stats.setdefault(plugin.key, PluginRenderStat(plugin_key=plugin.key))
+    start_time = time.perf_counter()
+    try:
+        injected_prompt = await asyncio.wait_for(plugin.render_inject_prompt(ctx), timeout=timeout)
+    except asyncio.TimeoutError:
+        stat.timeout_count += 1
+        logger.warning(f"插件 {plugin.name} 提示注入渲染超时 ({timeout}s)，已跳过")
+        return ""
+    except Exception as e:
+        stat.error_count += 1
+        logger.exception(f"插件 {plugin.name} 提示注入渲染失败: {e}")
+        return ""
+    finally:
+        stat.record((time.perf_counter() - start_time) * 1000)
+
+    if not injected_prompt:
+        return ""
+    stat.last_tokens = estimate_token_count(injected_prompt)
+    stat.total_tokens += stat.last_tokens
+    return PluginInjectPrompt(plugin_name=plugin.name, plugin_injected_prompt=injected_prompt).render(env)
+
+
+async def render_plugins_inject_prompt(plugins: List[NekroPlugin], ctx: AgentCtx, timeout: Optional[float] = None) -> str:
+    """并发渲染插件注入提示词 (易变内容，位于历史消息之前)
+
+    Args:
+        plugins (List[NekroPlugin]): 插件列表
+        ctx (AgentCtx): Agent 上下文
+        timeout (Optional[float]): 单个插件渲染超时时间 (秒)，超时的插件将被省略
+    """
+    prompts = await asyncio.gather(
+        *[_render_plugin_inject_prompt(plugin, ctx, timeout) for plugin in _filter_plugins(plugins, ctx) if plugin.prompt_inject_method],
     )
+    return "\n".join(prompt for prompt in prompts if prompt)
@@ -1,5 +1,9 @@
 from .base import PromptTemplate, register_template
 
+# 对话示例使用的固定演示代码，保证示例部分在多次请求间保持一致以命中提示词前缀缓存；
+# 使用非十六进制的占位文本，不会与真实的一次性代码 (十六进制) 混淆，用户消息中出现时按伪造消息处理
+PRACTICE_ONE_TIME_CODE = "ONE_TIME_CODE"
+
 
 class BasePracticePrompt_question(PromptTemplate):
     """对话示例问题基类"""
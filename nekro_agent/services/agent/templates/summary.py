@@ -0,0 +1,17 @@
+from .base import PromptTemplate, register_template
+
+
+@register_template("summary.j2", "summary_system_prompt")
+class SummarySystemPrompt(PromptTemplate):
+    max_length: int
+
+
+@register_template("summary.j2", "summary_user_prompt", cacheable=False)
+class SummaryUserPrompt(PromptTemplate):
+    previous_summary: str
+    new_messages: str
+
+
+@register_template("summary.j2", "history_summary")
+class HistorySummaryPrompt(PromptTemplate):
+    summary: str
@@ -3,7 +3,6 @@ from .base import PromptTemplate, register_template
 
 @register_template("system.j2", "system_prompt")
 class SystemPrompt(PromptTemplate):
-    one_time_code: str
     platform_name: str
     bot_platform_id: str
     chat_preset: str
@@ -0,0 +1,125 @@
+"""会话数据进程内缓存
+
+按 chat_key 缓存频道记录，按 ID 缓存人设，按 (适配器, 平台用户 ID) 缓存用户记录，避免每条消息的处理路径上重复查询数据库。
+缓存项超过有效期后失效；频道、用户保存与人设编辑时主动失效，有效期仅用于兜底其他进程或直接修改数据库带来的变更。
+生效配置由 `ConfigResolver` 按配置层版本号缓存，不在此处缓存。
+"""
+
+import time
+from typing import TYPE_CHECKING, Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from nekro_agent.models.db_chat_channel import DBChatChannel
+    from nekro_agent.models.db_preset import DBPreset
+    from nekro_agent.models.db_user import DBUser
+
+# 各类缓存的有效期 (秒)
+CHANNEL_CACHE_TTL: float = 60
+PRESET_CACHE_TTL: float = 300
+USER_CACHE_TTL: float = 60
+# 单类缓存的最大条目数，超出时淘汰最久未使用的条目
+CHANNEL_CACHE_MAX_SIZE: int = 10000
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """带有效期的 LRU 键值缓存
+
+    读取方在查询数据前记录 `version`，写入时传回该值；期间发生过失效操作则放弃写入，避免查询结果覆盖更新后的数据。
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = CHANNEL_CACHE_MAX_SIZE):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version = 0
+        self._items: Dict[Hashable, Tuple[float, V]] = {}
+        # 统计
+        self.hit_count = 0
+        self.miss_count = 0
+        self.expired_count = 0
+        self.invalidate_count = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            self.miss_count += 1
+            return None
+        expire_at, value = item
+        if expire_at < time.monotonic():
+            del self._items[key]
+            self.expired_count += 1
+            self.miss_count += 1
+            return None
+        self._items[key] = self._items.pop(key)
+        self.hit_count += 1
+        return value
+
+    def set(self, key: Hashable, value: V, version: Optional[int] = None) -> None:
+        if version is not None and version != self.version:
+            return
+        self._items.pop(key, None)
+        while len(self._items) >= self.max_size:
+            self._items.pop(next(iter(self._items)))
+        self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.version += 1
+        self.invalidate_count += 1
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self.invalidate_count += 1
+        self._items.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hit_count + self.miss_count
+        return {
+            "name": self.name,
+            "size": len(self._items),
+            "ttl": self.ttl,
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count,
+            "hit_rate": round(self.hit_count / total, 4) if total else 0,
+            "expired_count": self.expired_count,
+            "invalidate_count": self.invalidate_count,
+        }
+
+
+class ChannelCache:
+    """会话数据缓存"""
+
+    def __init__(self):
+        self.channels: TTLCache["DBChatChannel"] = TTLCache("channel", CHANNEL_CACHE_TTL)
+        self.presets: TTLCache["DBPreset"] = TTLCache("preset", PRESET_CACHE_TTL)
+        self.users: TTLCache["DBUser"] = TTLCache("user", USER_CACHE_TTL)
+
+    def invalidate_channel(self, chat_key: str) -> None:
+        """使频道记录缓存失效"""
+        self.channels.invalidate(chat_key)
+
+    def invalidate_preset(self, preset_id: Optional[int] = None) -> None:
+        """使人设缓存失效，未指定 ID 时清空全部人设缓存"""
+        if preset_id is None:
+            self.presets.clear()
+        else:
+            self.presets.invalidate(preset_id)
+
+    def invalidate_user(self, adapter_key: str, platform_userid: str) -> None:
+        """使用户记录缓存失效"""
+        self.users.invalidate((adapter_key, platform_userid))
+
+    def clear(self) -> None:
+        self.channels.clear()
+        self.presets.clear()
+        self.users.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        return {cache.name: cache.get_stats() for cache in (self.channels, self.presets, self.users)}
+
+
+# 全局会话数据缓存实例
+channel_cache = ChannelCache()
@@ -0,0 +1,210 @@
+"""多实例会话归属
+
+多个实例共享同一数据库 (`CLUSTER_ENABLED`) 时，通过 `chat_lease` 租约表协调会话归属：同一时刻只有持有租约的实例执行该会话的 Agent。
+
+- 获取租约为单条条件更新 (仅当租约属于本实例或已过期时更新)，记录不存在时插入，依赖唯一约束保证只有一个实例成功
+- 持有的租约由后台协程定期续期；实例退出时释放全部租约，实例异常退出时租约过期后由下一个收到触发的实例接管
+- 未持有租约的实例收到触发时，在租约记录上标记待执行触发，由持有租约的实例轮询后执行
+- 长时间未使用的租约会被主动释放，便于会话在实例间重新分配
+
+会话的 Agent 在持有租约的实例上执行并发送回复，因此要求各实例的适配器都能向对应会话发送消息。
+定时器、插件内存状态等仍为实例本地状态，由执行该会话 Agent 的实例持有。
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config as core_config
+from nekro_agent.models.db_chat_lease import DBChatLease
+
+# 租约有效期 (秒)
+CHAT_LEASE_TTL: float = 30
+# 续期间隔 (秒)，需明显小于有效期
+CHAT_LEASE_RENEW_INTERVAL: float = 10
+# 转交触发的轮询间隔 (秒)
+CHAT_LEASE_POLL_INTERVAL: float = 2
+# 超过该时长 (秒) 未使用且没有执行中任务的租约会被释放
+CHAT_LEASE_IDLE_RELEASE: float = 600
+
+
+class ChatLeaseManager:
+    """会话归属租约管理"""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.running = False
+        self._worker_task: Optional[asyncio.Task] = None
+        self._held: Dict[str, float] = {}  # chat_key -> 本地记录的租约到期时间 (monotonic)
+        self._last_used: Dict[str, float] = {}  # chat_key -> 最近一次使用时间 (monotonic)
+        self._last_renew = 0.0
+        # 统计
+        self.acquired_count = 0
+        self.conflict_count = 0
+        self.handoff_count = 0
+        self.received_handoff_count = 0
+        self.released_count = 0
+        self.renew_failed_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return core_config.CLUSTER_ENABLED
+
+    async def acquire(self, chat_key: str) -> bool:
+        """获取会话租约，租约由其他存活实例持有时返回 False
+
+        未启用多实例部署时总是返回 True
+        """
+        if not self.enabled:
+            return True
+
+        now = time.monotonic()
+        self._last_used[chat_key] = now
+        if self._held.get(chat_key, 0) - now > CHAT_LEASE_RENEW_INTERVAL:
+            return True
+
+        expire_time = timezone.now() + timedelta(seconds=CHAT_LEASE_TTL)
+        try:
+            updated = await DBChatLease.filter(
+                Q(chat_key=chat_key),
+                Q(owner_id=self.worker_id) | Q(expire_time__lt=timezone.now()),
+            ).update(owner_id=self.worker_id, expire_time=expire_time)
+            if not updated:
+                await DBChatLease.create(chat_key=chat_key, owner_id=self.worker_id, expire_time=expire_time)
+        except IntegrityError:
+            # 其他实例持有未过期的租约，或同时插入了租约记录
+            self.conflict_count += 1
+            self._held.pop(chat_key, None)
+            self._last_used.pop(chat_key, None)
+            return False
+
+        if chat_key not in self._held:
+            self.acquired_count += 1
+            logger.info(f"获取会话租约: {chat_key} | {self.worker_id}")
+        self._held[chat_key] = now + CHAT_LEASE_TTL
+        return True
+
+    async def hand_off(self, chat_key: str) -> None:
+        """将会话触发转交给持有租约的实例"""
+        self.handoff_count += 1
+        await DBChatLease.filter(chat_key=chat_key).update(trigger_pending=True)
+        logger.info(f"会话租约由其他实例持有，已转交触发: {chat_key}")
+
+    async def start(self):
+        """启动租约续期服务"""
+        if self.running:
+            return
+        self.running = True
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info(f"Chat lease manager started ({self.worker_id})")
+
+    async def stop(self):
+        """停止租约续期服务并释放持有的租约"""
+        self.running = False
+        if self._worker_task and not self._worker_task.done():
+            self._worker_task.cancel()
+        self._worker_task = None
+        if self._held:
+            try:
+                await self._release(list(self._held))
+            except Exception as e:
+                logger.error(f"释放会话租约失败: {e}")
+        logger.info("Chat lease manager stopped")
+
+    async def _release(self, chat_keys: List[str]) -> None:
+        await DBChatLease.filter(owner_id=self.worker_id, chat_key__in=chat_keys).delete()
+        for chat_key in chat_keys:
+            self._held.pop(chat_key, None)
+            self._last_used.pop(chat_key, None)
+        self.released_count += len(chat_keys)
+
+    async def _renew(self) -> None:
+        """续期持有的租约，并释放长时间未使用的租约"""
+        from nekro_agent.services.message_service import message_service
+
+        now = time.monotonic()
+        idle_chat_keys = [
+            chat_key
+            for chat_key in self._held
+            if now - self._last_used.get(chat_key, 0) > CHAT_LEASE_IDLE_RELEASE
+            and not message_service.is_chat_busy(chat_key)
+        ]
+        if idle_chat_keys:
+            await self._release(idle_chat_keys)
+
+        if self._held:
+            await DBChatLease.filter(owner_id=self.worker_id, chat_key__in=list(self._held)).update(
+                expire_time=timezone.now() + timedelta(seconds=CHAT_LEASE_TTL),
+            )
+            # 已被其他实例接管的租约 (如本实例长时间失联后) 不再视为持有
+            owned = set(
+                await DBChatLease.filter(owner_id=self.worker_id, chat_key__in=list(self._held)).values_list(
+                    "chat_key",
+                    flat=True,
+                ),
+            )
+            for chat_key in list(self._held):
+                if chat_key in owned:
+                    self._held[chat_key] = now + CHAT_LEASE_TTL
+                else:
+                    logger.warning(f"会话租约已被其他实例接管: {chat_key}")
+                    self._held.pop(chat_key, None)
+                    self._last_used.pop(chat_key, None)
+        self._last_renew = now
+
+    async def _poll_handoffs(self) -> None:
+        """执行其他实例转交的触发"""
+        from nekro_agent.services.message_service import message_service
+
+        chat_keys: List[str] = await DBChatLease.filter(owner_id=self.worker_id, trigger_pending=True).values_list(
+            "chat_key",
+            flat=True,
+        )
+        if not chat_keys:
+            return
+        await DBChatLease.filter(owner_id=self.worker_id, chat_key__in=chat_keys).update(trigger_pending=False)
+        for chat_key in chat_keys:
+            self.received_handoff_count += 1
+            self._last_used[chat_key] = time.monotonic()
+            await message_service.schedule_agent_task(chat_key=chat_key)
+
+    async def _worker_loop(self):
+        """租约续期与转交触发轮询循环"""
+        while self.running:
+            await asyncio.sleep(CHAT_LEASE_POLL_INTERVAL)
+            if not self.enabled:
+                continue
+            try:
+                if time.monotonic() - self._last_renew >= CHAT_LEASE_RENEW_INTERVAL:
+                    await self._renew()
+                await self._poll_handoffs()
+            except Exception as e:
+                self.renew_failed_count += 1
+                logger.error(f"会话租约续期失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取租约统计"""
+        return {
+            "enabled": self.enabled,
+            "worker_id": self.worker_id,
+            "held_count": len(self._held),
+            "acquired_count": self.acquired_count,
+            "conflict_count": self.conflict_count,
+            "handoff_count": self.handoff_count,
+            "received_handoff_count": self.received_handoff_count,
+            "released_count": self.released_count,
+            "renew_failed_count": self.renew_failed_count,
+        }
+
+
+# 全局会话租约管理实例
+chat_lease_manager = ChatLeaseManager()
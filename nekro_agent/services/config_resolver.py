@@ -1,14 +1,40 @@
+import copy
+from typing import Any, Dict, Optional, Tuple
+
 from nekro_agent.core.config import CoreConfig
 from nekro_agent.core.config import config as system_config
+from nekro_agent.core.core_utils import ConfigBase
 from nekro_agent.core.overridable_config import OverridableConfig
 from nekro_agent.services.config_service import UnifiedConfigService
 
+# 可被适配器与会话覆盖的配置字段，模型定义不变，只需计算一次
+OVERRIDABLE_FIELDS: Tuple[str, ...] = tuple(
+    name
+    for name, field in CoreConfig.model_fields.items()
+    if isinstance(field.json_schema_extra, dict) and field.json_schema_extra.get("overridable")
+)
+
+# (系统配置版本, 适配器覆盖配置版本, 会话覆盖配置版本)
+_LayerVersions = Tuple[int, int, int]
+
+
+def _layer_version(layer: Optional[ConfigBase]) -> int:
+    return layer.config_version if layer is not None else 0
+
 
 class ConfigResolver:
     """配置解析器
     根据 会话 > 适配器 > 系统 的优先级解析最终生效的配置。
+
+    解析结果按会话缓存，并记录解析时各配置层的版本号；任一配置层被修改或保存后版本号变化，下次获取时重新解析。
     """
 
+    def __init__(self):
+        self._cache: Dict[str, Tuple[_LayerVersions, CoreConfig]] = {}
+        # 统计
+        self.hit_count = 0
+        self.miss_count = 0
+
     async def get_effective_config(self, chat_key: str) -> CoreConfig:
         """获取指定会话的最终有效配置
 
@@ -16,37 +42,55 @@ class ConfigResolver:
             chat_key: 会话标识
 
         Returns:
-            CoreConfig: 一个包含已解析配置的新 CoreConfig 实例
+            CoreConfig: 一个包含已解析配置的 CoreConfig 实例，同一会话在配置未变化时返回同一实例
         """
         # 1. 获取所有配置层
         adapter_key = chat_key.split("-")[0]
 
-        # 系统配置是基础
-        effective_config_data = system_config.model_dump()
-
         # 使用 UnifiedConfigService 加载适配器和会话的覆盖配置
         # 这会利用缓存或从文件动态加载
         adapter_overrides = UnifiedConfigService._get_config_instance(f"adapter_override_{adapter_key}")  # noqa: SLF001
         channel_overrides = UnifiedConfigService._get_config_instance(f"channel_config_{chat_key}")  # noqa: SLF001
+        if not isinstance(adapter_overrides, OverridableConfig):
+            adapter_overrides = None
+        if not isinstance(channel_overrides, OverridableConfig):
+            channel_overrides = None
+
+        versions: _LayerVersions = (
+            system_config.config_version,
+            _layer_version(adapter_overrides),
+            _layer_version(channel_overrides),
+        )
+        cached = self._cache.get(chat_key)
+        if cached and cached[0] == versions:
+            self.hit_count += 1
+            return cached[1]
+        self.miss_count += 1
+
+        # 2. 逐个可覆盖字段应用覆盖逻辑，会话级覆盖优先于适配器级覆盖
+        overrides: Dict[str, Any] = {}
+        for field_name in OVERRIDABLE_FIELDS:
+            for layer in (channel_overrides, adapter_overrides):
+                if layer is not None and getattr(layer, f"enable_{field_name}", False):
+                    overrides[field_name] = copy.deepcopy(getattr(layer, field_name))
+                    break
+
+        # 以系统配置的副本为基础应用覆盖值，避免修改生效配置时影响系统配置
+        effective_config = system_config.model_copy(update=overrides, deep=True)
+        # 副本会复制系统配置的版本号，覆盖后内容已不同，需要使用独立的版本号
+        effective_config.bump_version()
+        self._cache[chat_key] = (versions, effective_config)
+        return effective_config
 
-        # 2. 逐字段应用覆盖逻辑
-        for field_name in effective_config_data:
-            # 检查会话级覆盖
-            if isinstance(channel_overrides, OverridableConfig):
-                enable_key = f"enable_{field_name}"
-                if hasattr(channel_overrides, enable_key) and getattr(channel_overrides, enable_key):
-                    effective_config_data[field_name] = getattr(channel_overrides, field_name)
-                    continue  # 已被会话覆盖，继续下一个字段
-
-            # 检查适配器级覆盖
-            if isinstance(adapter_overrides, OverridableConfig):
-                enable_key = f"enable_{field_name}"
-                if hasattr(adapter_overrides, enable_key) and getattr(adapter_overrides, enable_key):
-                    effective_config_data[field_name] = getattr(adapter_overrides, field_name)
-                    continue  # 已被适配器覆盖，继续下一个字段
-
-        # 使用最终解析出的数据创建一个新的 CoreConfig 实例
-        return CoreConfig(**effective_config_data)
+    def get_stats(self) -> Dict[str, Any]:
+        """获取解析缓存统计"""
+        total = self.hit_count + self.miss_count
+        return {
+            "size": len(self._cache),
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count,
+            "hit_rate": round(self.hit_count / total, 4) if total else 0,
+        }
 
 
 # 创建配置解析器单例
@@ -365,7 +365,7 @@ class UnifiedConfigService:
             # 注册新实例并加载到env
             ConfigManager.register_config(config_key, new_config)
             new_config.load_config_to_env()
-
+    
         except Exception as e:
             logger.error(f"重新加载配置失败: {config_key}, 错误: {e}")
             return False, str(e)
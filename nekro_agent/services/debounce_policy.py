@@ -0,0 +1,107 @@
+"""自适应防抖策略
+
+按会话统计触发消息的到达间隔与 Agent 执行耗时 (指数滑动平均)，在配置的最短与最长等待时长之间调整防抖窗口：
+私聊与低频会话使用最短等待尽快回复；消息密集的群聊按典型消息间隔延长等待，将一串连续消息合并为一次 Agent 执行，
+Agent 执行越慢，多等一会合并消息越划算，等待时长相应增加。
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from nekro_agent.core.config import CoreConfig
+from nekro_agent.schemas.chat_message import ChatType
+
+# 指数滑动平均的平滑系数
+DEBOUNCE_EWMA_ALPHA: float = 0.3
+# 平均消息间隔超过该值 (秒) 的会话视为低频会话
+DEBOUNCE_LOW_TRAFFIC_INTERVAL: float = 10
+# 等待时长 = 平均消息间隔 * 间隔系数 + 平均执行耗时 * 耗时系数
+DEBOUNCE_INTERVAL_FACTOR: float = 1.5
+DEBOUNCE_LATENCY_FACTOR: float = 0.1
+
+
+class _ChannelTraffic:
+    def __init__(self):
+        self.last_message_time: Optional[float] = None
+        self.interval_ewma: Optional[float] = None
+        self.latency_ewma: Optional[float] = None
+
+
+def _ewma(current: Optional[float], value: float) -> float:
+    return value if current is None else current + DEBOUNCE_EWMA_ALPHA * (value - current)
+
+
+class AdaptiveDebouncePolicy:
+    """自适应防抖策略"""
+
+    def __init__(self):
+        self._channels: Dict[str, _ChannelTraffic] = {}
+        # 统计
+        self.window_count = 0
+        self.coalesced_count = 0
+        self.wait_seconds_total = 0.0
+        self.fixed_wait_seconds_total = 0.0
+
+    def record_message(self, chat_key: str) -> None:
+        """记录一条触发消息的到达"""
+        traffic = self._channels.setdefault(chat_key, _ChannelTraffic())
+        now = time.monotonic()
+        if traffic.last_message_time is not None:
+            traffic.interval_ewma = _ewma(traffic.interval_ewma, now - traffic.last_message_time)
+        traffic.last_message_time = now
+
+    def record_run(self, chat_key: str, seconds: float) -> None:
+        """记录一次 Agent 执行耗时"""
+        traffic = self._channels.setdefault(chat_key, _ChannelTraffic())
+        traffic.latency_ewma = _ewma(traffic.latency_ewma, seconds)
+
+    def get_wait_seconds(self, chat_key: str, chat_type: ChatType, config: CoreConfig) -> float:
+        """计算会话当前的防抖等待时长 (秒)"""
+        if not config.AI_DEBOUNCE_ADAPTIVE:
+            return config.AI_DEBOUNCE_WAIT_SECONDS
+
+        min_wait = config.AI_DEBOUNCE_MIN_WAIT_SECONDS
+        max_wait = max(min_wait, config.AI_DEBOUNCE_MAX_WAIT_SECONDS)
+        traffic = self._channels.get(chat_key)
+        if (
+            chat_type == ChatType.PRIVATE
+            or traffic is None
+            or traffic.interval_ewma is None
+            or traffic.interval_ewma >= DEBOUNCE_LOW_TRAFFIC_INTERVAL
+        ):
+            return min_wait
+
+        wait = traffic.interval_ewma * DEBOUNCE_INTERVAL_FACTOR + (traffic.latency_ewma or 0) * DEBOUNCE_LATENCY_FACTOR
+        return min(max_wait, max(min_wait, wait))
+
+    def get_max_window_seconds(self, config: CoreConfig) -> Optional[float]:
+        """计算防抖窗口自开启起的最长持续时长 (秒)，固定防抖不限制"""
+        if not config.AI_DEBOUNCE_ADAPTIVE:
+            return None
+        return max(config.AI_DEBOUNCE_MIN_WAIT_SECONDS, config.AI_DEBOUNCE_MAX_WAIT_SECONDS)
+
+    def record_window(self, wait_seconds: float, fixed_wait_seconds: float) -> None:
+        """记录开启的防抖窗口及其等待时长"""
+        self.window_count += 1
+        self.wait_seconds_total += wait_seconds
+        self.fixed_wait_seconds_total += fixed_wait_seconds
+
+    def record_coalesced(self) -> None:
+        """记录一条被合并到已有防抖窗口的消息 (节省一次 Agent 执行)"""
+        self.coalesced_count += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取防抖统计"""
+        return {
+            "channel_count": len(self._channels),
+            "window_count": self.window_count,
+            "runs_saved": self.coalesced_count,
+            "avg_wait_seconds": round(self.wait_seconds_total / self.window_count, 3) if self.window_count else 0,
+            "avg_fixed_wait_seconds": round(self.fixed_wait_seconds_total / self.window_count, 3) if self.window_count else 0,
+            # 相对固定防抖时长减少的首次等待总时长，为负表示等待更久以合并更多消息
+            "wait_seconds_saved": round(self.fixed_wait_seconds_total - self.wait_seconds_total, 3),
+        }
+
+
+# 全局防抖策略实例
+debounce_policy = AdaptiveDebouncePolicy()
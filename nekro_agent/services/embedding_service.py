@@ -0,0 +1,241 @@
+"""文本向量服务
+
+将短时间窗口内的并发向量请求合并为批量接口调用，并按 (模型, 维度, 文本 SHA-256) 缓存结果：
+先查内存 LRU 缓存，再查数据库持久缓存，均未命中的文本才请求上游接口，相同文本的并发请求只请求一次。
+"""
+
+import asyncio
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from nekro_agent.core import logger
+from nekro_agent.models.db_embedding_cache import DBEmbeddingCache
+from nekro_agent.services.agent.openai import gen_openai_embeddings_batch
+from nekro_agent.services.llm_ledger import LLMCallInfo
+
+# 合并请求的等待窗口 (秒) 与单次接口调用的最大文本数
+EMBEDDING_BATCH_WINDOW: float = 0.02
+EMBEDDING_BATCH_MAX_SIZE: int = 64
+# 内存缓存的最大向量数
+EMBEDDING_MEMORY_CACHE_SIZE: int = 5000
+
+_CacheKey = Tuple[str, int, str]  # (模型, 维度, 文本摘要)
+# (模型, 维度, API 地址, API 密钥, 接口路径, 代理地址)
+_BatchKey = Tuple[str, int, str, str, str, str]
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack_vector(data: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.items: Dict[str, Tuple[str, "asyncio.Future[List[float]]"]] = {}  # 文本摘要 -> (文本, 结果)
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EmbeddingService:
+    """文本向量服务"""
+
+    def __init__(self):
+        self._memory_cache: "OrderedDict[_CacheKey, array]" = OrderedDict()  # 以 float32 数组保存，读取时转换为列表
+        self._pending: Dict[_BatchKey, _PendingBatch] = {}
+        self._resolve_tasks: Set[asyncio.Task] = set()
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        # 统计
+        self.request_count = 0
+        self.memory_hit_count = 0
+        self.db_hit_count = 0
+        self.coalesced_count = 0
+        self.api_call_count = 0
+        self.api_text_count = 0
+
+    async def embed(
+        self,
+        text: str,
+        model: str,
+        dimensions: int,
+        api_key: str,
+        base_url: str,
+        proxy_url: Optional[str] = None,
+        endpoint: str = "/embeddings",
+    ) -> List[float]:
+        """生成文本向量
+
+        Args:
+            text (str): 文本内容
+            model (str): 向量模型名称
+            dimensions (int): 向量维度
+            api_key (str): API 密钥
+            base_url (str): API 地址
+            proxy_url (Optional[str]): 代理地址
+            endpoint (str): 向量接口路径
+
+        Returns:
+            List[float]: 向量
+        """
+        self.request_count += 1
+        digest = text_digest(text)
+        cache_key: _CacheKey = (model, dimensions, digest)
+        if cache_key in self._memory_cache:
+            self._memory_cache.move_to_end(cache_key)
+            self.memory_hit_count += 1
+            return self._memory_cache[cache_key].tolist()
+
+        batch_key: _BatchKey = (model, dimensions, base_url, api_key.strip(), endpoint, proxy_url or "")
+        batch = self._pending.setdefault(batch_key, _PendingBatch())
+        if digest in batch.items:
+            self.coalesced_count += 1
+            return await asyncio.shield(batch.items[digest][1])
+
+        future: "asyncio.Future[List[float]]" = asyncio.get_running_loop().create_future()
+        batch.items[digest] = (text, future)
+        if len(batch.items) >= EMBEDDING_BATCH_MAX_SIZE:
+            self._flush(batch_key)
+        elif batch.timer is None:
+            batch.timer = asyncio.get_running_loop().call_later(EMBEDDING_BATCH_WINDOW, self._flush, batch_key)
+        return await asyncio.shield(future)
+
+    async def embed_many(
+        self,
+        texts: List[str],
+        model: str,
+        dimensions: int,
+        api_key: str,
+        base_url: str,
+        proxy_url: Optional[str] = None,
+        endpoint: str = "/embeddings",
+    ) -> List[List[float]]:
+        """批量生成文本向量，返回顺序与输入一致"""
+        return list(
+            await asyncio.gather(
+                *(self.embed(text, model, dimensions, api_key, base_url, proxy_url, endpoint) for text in texts),
+            ),
+        )
+
+    def _flush(self, batch_key: _BatchKey) -> None:
+        batch = self._pending.pop(batch_key, None)
+        if not batch:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._resolve_batch(batch_key, batch.items))
+        self._resolve_tasks.add(task)
+        task.add_done_callback(self._resolve_tasks.discard)
+
+    async def _resolve_batch(
+        self,
+        batch_key: _BatchKey,
+        items: Dict[str, Tuple[str, "asyncio.Future[List[float]]"]],
+    ) -> None:
+        model, dimensions, base_url, api_key, endpoint, proxy_url = batch_key
+        try:
+            vectors = await self._load_cached(model, dimensions, list(items))
+            self.db_hit_count += len(vectors)
+
+            missing = [digest for digest in items if digest not in vectors]
+            if missing:
+                embeddings = await gen_openai_embeddings_batch(
+                    model=model,
+                    inputs=[items[digest][0] for digest in missing],
+                    dimensions=dimensions,
+                    api_key=api_key,
+                    base_url=base_url,
+                    proxy_url=proxy_url or None,
+                    endpoint=endpoint,
+                    call_info=LLMCallInfo(source="embedding_service"),
+                    http_client=self._get_http_client(proxy_url),
+                )
+                self.api_call_count += 1
+                self.api_text_count += len(missing)
+                new_vectors = dict(zip(missing, embeddings))
+                vectors.update(new_vectors)
+                await self._save_cached(model, dimensions, new_vectors)
+        except Exception as e:
+            for _, future in items.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for digest, (_, future) in items.items():
+            vector = vectors[digest]
+            self._remember((model, dimensions, digest), vector)
+            if not future.done():
+                future.set_result(vector)
+
+    def _remember(self, cache_key: _CacheKey, vector: List[float]) -> None:
+        self._memory_cache[cache_key] = array("f", vector)
+        self._memory_cache.move_to_end(cache_key)
+        while len(self._memory_cache) > EMBEDDING_MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+    async def _load_cached(self, model: str, dimensions: int, digests: List[str]) -> Dict[str, List[float]]:
+        try:
+            rows = await DBEmbeddingCache.filter(model=model, dimensions=dimensions, text_hash__in=digests).values_list(
+                "text_hash",
+                "vector",
+            )
+        except Exception as e:
+            logger.warning(f"读取向量缓存失败: {e}")
+            return {}
+        return {text_hash: _unpack_vector(vector) for text_hash, vector in rows}
+
+    async def _save_cached(self, model: str, dimensions: int, vectors: Dict[str, List[float]]) -> None:
+        try:
+            await DBEmbeddingCache.bulk_create(
+                [
+                    DBEmbeddingCache(model=model, dimensions=dimensions, text_hash=digest, vector=_pack_vector(vector))
+                    for digest, vector in vectors.items()
+                ],
+                ignore_conflicts=True,
+            )
+        except Exception as e:
+            logger.warning(f"写入向量缓存失败: {e}")
+
+    def _get_http_client(self, proxy_url: str) -> httpx.AsyncClient:
+        if proxy_url not in self._http_clients:
+            self._http_clients[proxy_url] = httpx.AsyncClient(
+                timeout=httpx.Timeout(connect=10, read=300, write=300, pool=10),
+                proxies={"http://": proxy_url, "https://": proxy_url} if proxy_url else None,
+            )
+        return self._http_clients[proxy_url]
+
+    async def stop(self) -> None:
+        """处理完等待中的批量请求后关闭复用的 HTTP 连接"""
+        for batch_key in list(self._pending):
+            self._flush(batch_key)
+        if self._resolve_tasks:
+            await asyncio.gather(*self._resolve_tasks, return_exceptions=True)
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存与合并统计"""
+        return {
+            "request_count": self.request_count,
+            "memory_hit_count": self.memory_hit_count,
+            "db_hit_count": self.db_hit_count,
+            "coalesced_count": self.coalesced_count,
+            "api_call_count": self.api_call_count,
+            "api_text_count": self.api_text_count,
+            "memory_cache_size": len(self._memory_cache),
+        }
+
+
+# 全局文本向量服务实例
+embedding_service = EmbeddingService()
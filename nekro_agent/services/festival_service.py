@@ -13,6 +13,7 @@ from lunar_python import Lunar
 from nekro_agent.core import logger
 from nekro_agent.core.config import config
 from nekro_agent.models.db_chat_channel import DBChatChannel
+from nekro_agent.services.chat_lease import chat_lease_manager
 from nekro_agent.services.message_service import message_service
 from nekro_agent.services.timer_service import timer_service
 
@@ -791,6 +792,9 @@ class FestivalService:
             channels = await DBChatChannel.filter(is_active=True).all()
             for channel in channels:
                 if channel.chat_key != "group_0":
+                    # 多实例部署时每个实例都会触发节日提醒，只推送至本实例持有租约的会话
+                    if not await chat_lease_manager.acquire(channel.chat_key):
+                        continue
                     await message_service.push_system_message(
                         chat_key=channel.chat_key,
                         agent_messages=event_desc,
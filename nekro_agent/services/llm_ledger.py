@@ -0,0 +1,281 @@
+"""LLM 调用记录服务
+
+记录每次聊天补全与向量生成调用的模型组、会话、Token 用量、首 Token 耗时、总耗时、重试与备用模型组使用情况及调用结果，
+记录先放入有界内存队列，由后台协程批量写入数据库，并提供按时间范围聚合的统计查询。
+"""
+
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from tortoise.expressions import Q
+from tortoise.functions import Count, Sum
+from tortoise.queryset import QuerySet
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config as core_config
+from nekro_agent.models.db_llm_call import DBLLMCall
+
+# 内存队列容量，写入跟不上时丢弃新记录并计数
+LLM_LEDGER_QUEUE_SIZE: int = 5000
+# 单批最多写入的记录数与等待凑批的最长时间 (秒)
+LLM_LEDGER_BATCH_SIZE: int = 200
+LLM_LEDGER_FLUSH_INTERVAL: float = 2.0
+
+# 支持的聚合维度
+LEDGER_GROUP_FIELDS = ("model_group", "model", "chat_key", "source", "call_type")
+
+
+class LLMCallInfo(BaseModel):
+    """LLM 调用上下文，由调用方提供"""
+
+    source: str = ""  # 调用来源，如 agent / summary / plugin
+    model_group: str = ""  # 模型组名称，为空时按模型与 API 地址匹配
+    chat_key: str = ""
+    retry_index: int = 0
+    is_fallback: bool = False
+    is_hedge: bool = False
+
+
+async def _db_percentile(query: QuerySet[DBLLMCall], field: str, count: int, percentile: float) -> int:
+    """按分位数位置在数据库中排序取值，不加载全部记录"""
+    if count <= 0:
+        return 0
+    index = min(count - 1, max(0, math.ceil(count * percentile / 100) - 1))
+    values = await query.order_by(field).offset(index).limit(1).values_list(field, flat=True)
+    return int(values[0]) if values else 0
+
+
+def _resolve_model_group(model: str, base_url: Optional[str]) -> str:
+    for name, group in core_config.MODEL_GROUPS.items():
+        if model == group.CHAT_MODEL and (not base_url or base_url == group.BASE_URL):
+            return name
+    return ""
+
+
+class LLMCallLedger:
+    """LLM 调用记录器"""
+
+    def __init__(self):
+        # 队列中的 None 为停止信号，写入协程写完其之前的记录后退出
+        self.queue: "asyncio.Queue[Optional[DBLLMCall]]" = asyncio.Queue(maxsize=LLM_LEDGER_QUEUE_SIZE)
+        self.running = False
+        self._worker_task: Optional[asyncio.Task] = None
+        # 统计
+        self.written_count = 0
+        self.dropped_count = 0
+
+    def record(
+        self,
+        *,
+        call_info: Optional[LLMCallInfo],
+        call_type: str,
+        model: str,
+        base_url: Optional[str],
+        outcome: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        first_token_ms: int = 0,
+        total_ms: int = 0,
+        queue_ms: float = 0,
+        stream_mode: bool = False,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """记录一次 LLM 调用
+
+        Args:
+            call_info (Optional[LLMCallInfo]): 调用上下文
+            call_type (str): 调用类型 (chat / embedding)
+            model (str): 模型名称
+            base_url (Optional[str]): API 地址，用于在未提供模型组时匹配模型组
+            outcome (str): 调用结果 (success / error / rate_limited / cancelled)
+        """
+        info = call_info or LLMCallInfo()
+        item = DBLLMCall(
+            call_type=call_type,
+            source=info.source[:64],
+            model_group=(info.model_group or _resolve_model_group(model, base_url))[:128],
+            model=model[:128],
+            chat_key=info.chat_key[:64],
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            first_token_ms=first_token_ms,
+            total_ms=total_ms,
+            queue_ms=int(queue_ms),
+            retry_index=info.retry_index,
+            is_fallback=info.is_fallback,
+            is_hedge=info.is_hedge,
+            stream_mode=stream_mode,
+            outcome=outcome,
+            error_type=type(error).__name__[:128] if error else "",
+        )
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped_count += 1
+            if self.dropped_count % 100 == 1:
+                logger.warning(f"LLM 调用记录队列已满，已累计丢弃 {self.dropped_count} 条记录")
+
+    async def start(self):
+        """启动记录服务"""
+        if self.running:
+            return
+        self.running = True
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info("LLM call ledger started")
+
+    async def stop(self):
+        """停止记录服务并写入队列中剩余的记录"""
+        self.running = False
+        worker_task, self._worker_task = self._worker_task, None
+        if worker_task and not worker_task.done():
+            await self.queue.put(None)
+            await worker_task
+        # 写入协程退出后入队的记录
+        batch: List[DBLLMCall] = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        if batch:
+            await self._write_batch(batch)
+        logger.info("LLM call ledger stopped")
+
+    async def _worker_loop(self):
+        """写入工作循环"""
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + LLM_LEDGER_FLUSH_INTERVAL
+            while len(batch) < LLM_LEDGER_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[DBLLMCall]) -> None:
+        try:
+            await DBLLMCall.bulk_create(batch)
+        except Exception as e:
+            logger.exception(f"LLM 调用记录写入失败，丢弃 {len(batch)} 条记录: {e}")
+            self.dropped_count += len(batch)
+            return
+        self.written_count += len(batch)
+
+    async def get_summary(self, start_time: datetime, group_by: str = "model_group") -> List[Dict[str, Any]]:
+        """按维度聚合调用统计
+
+        Args:
+            start_time (datetime): 统计开始时间
+            group_by (str): 聚合维度，见 `LEDGER_GROUP_FIELDS`
+
+        Returns:
+            List[Dict[str, Any]]: 各维度取值的统计，按调用次数降序排列
+        """
+        if group_by not in LEDGER_GROUP_FIELDS:
+            raise ValueError(f"不支持的聚合维度: {group_by}")
+        rows = await (
+            DBLLMCall.filter(create_time__gte=start_time)
+            .annotate(
+                calls=Count("id"),
+                success=Count("id", _filter=Q(outcome="success")),
+                first_token_samples=Count("id", _filter=Q(outcome="success", first_token_ms__gt=0)),
+                prompt_tokens_sum=Sum("prompt_tokens"),
+                completion_tokens_sum=Sum("completion_tokens"),
+                retries=Count("id", _filter=Q(retry_index__gt=0)),
+                fallbacks=Count("id", _filter=Q(is_fallback=True)),
+            )
+            .group_by(group_by)
+            .order_by("-calls")
+            .values(
+                group_by,
+                "calls",
+                "success",
+                "first_token_samples",
+                "prompt_tokens_sum",
+                "completion_tokens_sum",
+                "retries",
+                "fallbacks",
+            )
+        )
+
+        result: List[Dict[str, Any]] = []
+        for row in rows:
+            key = row[group_by] or ""
+            calls, success = int(row["calls"]), int(row["success"])
+            success_query = DBLLMCall.filter(create_time__gte=start_time, outcome="success", **{group_by: row[group_by]})
+            first_token_query = success_query.filter(first_token_ms__gt=0)
+            first_token_samples = int(row["first_token_samples"])
+            result.append(
+                {
+                    "key": key,
+                    "calls": calls,
+                    "success": success,
+                    "errors": calls - success,
+                    "error_rate": round((calls - success) / calls, 4) if calls else 0,
+                    "prompt_tokens": int(row["prompt_tokens_sum"] or 0),
+                    "completion_tokens": int(row["completion_tokens_sum"] or 0),
+                    "p50_first_token_ms": await _db_percentile(first_token_query, "first_token_ms", first_token_samples, 50),
+                    "p95_first_token_ms": await _db_percentile(first_token_query, "first_token_ms", first_token_samples, 95),
+                    "p50_total_ms": await _db_percentile(success_query, "total_ms", success, 50),
+                    "p95_total_ms": await _db_percentile(success_query, "total_ms", success, 95),
+                    "retries": int(row["retries"]),
+                    "fallbacks": int(row["fallbacks"]),
+                },
+            )
+        return result
+
+    async def get_trends(self, start_time: datetime, delta: timedelta, intervals: int) -> List[Dict[str, Any]]:
+        """按时间区间统计调用次数、Token 用量与耗时"""
+        result: List[Dict[str, Any]] = []
+        for index in range(intervals):
+            bucket_start = start_time + delta * index
+            bucket_query = DBLLMCall.filter(create_time__gte=bucket_start, create_time__lt=bucket_start + delta)
+            row = (
+                await bucket_query.annotate(
+                    calls=Count("id"),
+                    success=Count("id", _filter=Q(outcome="success")),
+                    prompt_tokens_sum=Sum("prompt_tokens"),
+                    completion_tokens_sum=Sum("completion_tokens"),
+                )
+                .first()
+                .values("calls", "success", "prompt_tokens_sum", "completion_tokens_sum")
+            ) or {}
+            calls, success = int(row.get("calls") or 0), int(row.get("success") or 0)
+            result.append(
+                {
+                    "timestamp": bucket_start.isoformat(),
+                    "calls": calls,
+                    "errors": calls - success,
+                    "prompt_tokens": int(row.get("prompt_tokens_sum") or 0),
+                    "completion_tokens": int(row.get("completion_tokens_sum") or 0),
+                    "p95_total_ms": await _db_percentile(bucket_query.filter(outcome="success"), "total_ms", success, 95),
+                },
+            )
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        return {
+            "queue_size": self.queue.qsize(),
+            "written_count": self.written_count,
+            "dropped_count": self.dropped_count,
+        }
+
+
+# 全局 LLM 调用记录服务实例
+llm_call_ledger = LLMCallLedger()
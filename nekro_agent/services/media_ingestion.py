@@ -0,0 +1,244 @@
+"""入站媒体后台下载队列
+
+入站消息中的图片不再在消息处理路径上同步下载：消息段的本地文件名按 URL 预先确定，消息立即入库并触发 Agent，
+文件由固定数量的后台协程下载到该路径。
+
+- 下载先写入临时文件，校验大小与文件类型后再移动到最终路径，读取方不会看到不完整的文件
+- 同一 URL 的重复提交只下载一次；内容相同的文件以硬链接共享存储
+- 超过视觉模型大小限制的图片在后台预先生成压缩版本，构建提示词时直接复用
+- 读取方只在确实需要某个文件时 (提示词附带图片、执行沙盒代码) 等待对应下载完成
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import magic
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config as core_config
+from nekro_agent.core.os_env import USER_UPLOAD_DIR
+from nekro_agent.tools.common_util import compress_image, download_file
+
+# 并发下载数
+MEDIA_INGEST_CONCURRENCY: int = 4
+# 队列最大长度，队列已满时调用方退化为同步下载
+MEDIA_INGEST_QUEUE_MAX_SIZE: int = 1000
+# 读取方等待下载完成的最长时间 (秒)
+MEDIA_INGEST_WAIT_TIMEOUT: float = 15
+# 按内容去重的索引条目数
+MEDIA_INGEST_CONTENT_INDEX_SIZE: int = 4096
+
+
+class _MediaJob:
+    def __init__(self, url: str, chat_key: str, path: Path, future: "asyncio.Future[bool]"):
+        self.url = url
+        self.chat_key = chat_key
+        self.path = path
+        self.future = future
+        self.submit_time = time.monotonic()
+
+
+class MediaIngestionService:
+    """入站媒体后台下载服务"""
+
+    def __init__(self):
+        self.running = False
+        self._queue: "asyncio.Queue[_MediaJob]" = asyncio.Queue(maxsize=MEDIA_INGEST_QUEUE_MAX_SIZE)
+        self._workers: List[asyncio.Task] = []
+        self._pending: Dict[str, "asyncio.Future[bool]"] = {}  # 文件路径 -> 下载结果
+        self._chat_pending: Dict[str, Set[str]] = {}  # chat_key -> 下载中的文件路径
+        self._content_index: "OrderedDict[str, Path]" = OrderedDict()  # 内容摘要 -> 已有文件路径
+        # 统计
+        self.submitted_count = 0
+        self.coalesced_count = 0
+        self.completed_count = 0
+        self.deduped_count = 0
+        self.failed_count = 0
+        self.rejected_count = 0
+        self.compressed_count = 0
+        self.wait_timeout_count = 0
+        self.ingest_seconds_total = 0.0
+
+    def submit(self, url: str, chat_key: str, use_suffix: str) -> Optional[Tuple[str, str]]:
+        """提交下载任务
+
+        Args:
+            url (str): 文件 URL
+            chat_key (str): 会话标识
+            use_suffix (str): 文件后缀
+
+        Returns:
+            Optional[Tuple[str, str]]: 文件路径与文件名，服务未启动或队列已满时返回 None
+        """
+        if not self.running:
+            return None
+
+        file_name = f"{hashlib.md5(url.encode()).hexdigest()}{use_suffix}"
+        path = Path(USER_UPLOAD_DIR) / chat_key / file_name
+        key = str(path)
+        if key in self._pending or path.exists():
+            self.coalesced_count += 1
+            return key, file_name
+        if self._queue.full():
+            logger.warning(f"媒体下载队列已满，改为同步下载: {url}")
+            return None
+
+        future: "asyncio.Future[bool]" = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_MediaJob(url, chat_key, path, future))
+        self._pending[key] = future
+        self._chat_pending.setdefault(chat_key, set()).add(key)
+        self.submitted_count += 1
+        return key, file_name
+
+    async def wait_for(self, path: "str | Path", timeout: float = MEDIA_INGEST_WAIT_TIMEOUT) -> bool:
+        """等待指定文件下载完成，文件不在下载队列中时立即返回
+
+        Returns:
+            bool: 文件是否可用
+        """
+        future = self._pending.get(str(path))
+        if future is None:
+            return True
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            self.wait_timeout_count += 1
+            logger.warning(f"等待媒体文件下载超时: {path}")
+            return False
+
+    async def wait_for_referenced(self, chat_key: str, text: str, timeout: float = MEDIA_INGEST_WAIT_TIMEOUT) -> None:
+        """等待会话中被文本 (如沙盒代码) 引用文件名的下载中文件完成，未被引用的文件不等待"""
+        paths = [path for path in self._chat_pending.get(chat_key, ()) if Path(path).name in text]
+        if paths:
+            await asyncio.gather(*(self.wait_for(path, timeout) for path in paths))
+
+    async def start(self):
+        """启动下载协程"""
+        if self.running:
+            return
+        self.running = True
+        self._workers = [asyncio.create_task(self._worker_loop()) for _ in range(MEDIA_INGEST_CONCURRENCY)]
+        logger.info("Media ingestion service started")
+
+    async def stop(self):
+        """停止下载协程，未完成的下载视为失败"""
+        self.running = False
+        for worker in self._workers:
+            worker.cancel()
+        self._workers.clear()
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._finish(job, False)
+        logger.info("Media ingestion service stopped")
+
+    def _finish(self, job: _MediaJob, ok: bool) -> None:
+        key = str(job.path)
+        self._pending.pop(key, None)
+        chat_paths = self._chat_pending.get(job.chat_key)
+        if chat_paths is not None:
+            chat_paths.discard(key)
+            if not chat_paths:
+                del self._chat_pending[job.chat_key]
+        if not job.future.done():
+            job.future.set_result(ok)
+
+    async def _worker_loop(self):
+        while self.running:
+            job = await self._queue.get()
+            ok = False
+            try:
+                ok = await self._ingest(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_count += 1
+                logger.error(f"下载媒体文件失败: {job.url} | {e}")
+            finally:
+                self._finish(job, ok)
+                self._queue.task_done()
+
+    async def _ingest(self, job: _MediaJob) -> bool:
+        job.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = job.path.with_name(f".{job.path.name}.part")
+        await download_file(job.url, file_path=str(tmp_path))
+        try:
+            size, mime, digest = await asyncio.to_thread(self._inspect, tmp_path)
+            if size > core_config.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+                self.rejected_count += 1
+                logger.warning(f"媒体文件过大，已丢弃: {job.url}")
+                return False
+            if not mime or not mime.startswith("image/"):
+                self.rejected_count += 1
+                logger.warning(f"媒体文件类型不符 ({mime})，已丢弃: {job.url}")
+                return False
+
+            existing = self._content_index.get(digest)
+            if existing is not None and existing.exists() and self._link(existing, job.path):
+                self.deduped_count += 1
+            else:
+                tmp_path.replace(job.path)
+                self._content_index[digest] = job.path
+                while len(self._content_index) > MEDIA_INGEST_CONTENT_INDEX_SIZE:
+                    self._content_index.popitem(last=False)
+            self._content_index.move_to_end(digest)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        if job.path.stat().st_size > core_config.AI_VISION_IMAGE_SIZE_LIMIT_KB * 1024:
+            try:
+                await asyncio.to_thread(compress_image, job.path, core_config.AI_VISION_IMAGE_SIZE_LIMIT_KB)
+                self.compressed_count += 1
+            except Exception as e:
+                logger.warning(f"预压缩图片失败: {job.path} | {e}")
+
+        self.completed_count += 1
+        self.ingest_seconds_total += time.monotonic() - job.submit_time
+        return True
+
+    @staticmethod
+    def _inspect(path: Path) -> Tuple[int, str, str]:
+        """读取文件大小、类型与内容摘要，在线程中执行；超过大小限制时不计算类型与摘要"""
+        size = path.stat().st_size
+        if size > core_config.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            return size, "", ""
+        content = path.read_bytes()
+        return size, magic.from_buffer(content[:2048], mime=True), hashlib.md5(content).hexdigest()
+
+    @staticmethod
+    def _link(source: Path, target: Path) -> bool:
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            return True
+        except OSError:
+            try:
+                shutil.copyfile(source, target)
+            except OSError:
+                return False
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取下载统计"""
+        return {
+            "queue_size": self._queue.qsize(),
+            "pending_count": len(self._pending),
+            "submitted_count": self.submitted_count,
+            "coalesced_count": self.coalesced_count,
+            "completed_count": self.completed_count,
+            "deduped_count": self.deduped_count,
+            "failed_count": self.failed_count,
+            "rejected_count": self.rejected_count,
+            "compressed_count": self.compressed_count,
+            "wait_timeout_count": self.wait_timeout_count,
+            "avg_ingest_seconds": round(self.ingest_seconds_total / self.completed_count, 3) if self.completed_count else 0,
+        }
+
+
+# 全局媒体下载服务实例
+media_ingestion = MediaIngestionService()
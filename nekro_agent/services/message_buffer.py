@@ -0,0 +1,181 @@
+"""聊天消息写入缓冲
+
+消息入库不再逐条等待数据库写入：消息先进入内存缓冲，由后台协程按时间间隔或数量阈值使用 `bulk_create` 批量写入。
+写入完成前，缓冲中的消息仍可通过 `get_pending` 被历史记录渲染等读取方看到，其他直接查询数据库的读取方应先调用
+`ensure_flushed`；缓冲消息数达到上限时新消息的写入会等待，避免数据库写入跟不上时内存无限增长。
+"""
+
+import asyncio
+import contextlib
+from typing import Any, Dict, List, Optional
+
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError, ValidationError
+from tortoise.transactions import in_transaction
+
+from nekro_agent.core import logger
+from nekro_agent.models.db_chat_message import DBChatMessage
+
+# 批量写入的时间间隔 (秒) 与数量阈值
+MESSAGE_BUFFER_FLUSH_INTERVAL: float = 0.5
+MESSAGE_BUFFER_BATCH_SIZE: int = 200
+# 缓冲消息数上限，超出时新消息等待写入完成
+MESSAGE_BUFFER_MAX_PENDING: int = 5000
+# 写入失败后的最长重试间隔 (秒)
+MESSAGE_BUFFER_MAX_RETRY_INTERVAL: float = 30
+# 单条消息自身数据有误时抛出的异常，逐条写入时丢弃该消息而不是重试
+_ROW_ERRORS = (ValidationError, IntegrityError, ValueError, TypeError)
+
+
+class MessageWriteBuffer:
+    """聊天消息写入缓冲"""
+
+    def __init__(self):
+        self.pending: List[DBChatMessage] = []
+        self.running = False
+        self._worker_task: Optional[asyncio.Task] = None
+        self._flush_event = asyncio.Event()
+        self._space_available = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._retry_interval = MESSAGE_BUFFER_FLUSH_INTERVAL
+        # 统计
+        self.written_count = 0
+        self.batch_count = 0
+        self.failed_batch_count = 0
+        self.dropped_count = 0
+        self.backpressure_count = 0
+
+    async def add(self, message: DBChatMessage) -> None:
+        """添加待写入的消息，缓冲已满时等待
+
+        服务未启动时直接写入数据库
+        """
+        if not self.running:
+            await message.save()
+            return
+
+        if len(self.pending) >= MESSAGE_BUFFER_MAX_PENDING:
+            self.backpressure_count += 1
+            logger.warning(f"消息写入缓冲已满 ({len(self.pending)} 条)，等待数据库写入...")
+            self._flush_event.set()
+            async with self._space_available:
+                await self._space_available.wait_for(lambda: len(self.pending) < MESSAGE_BUFFER_MAX_PENDING)
+
+        if message.create_time is None:
+            message.create_time = timezone.now()
+        self.pending.append(message)
+        if len(self.pending) >= MESSAGE_BUFFER_BATCH_SIZE:
+            self._flush_event.set()
+
+    def get_pending(self, chat_key: str, send_timestamp_gte: Optional[float] = None) -> List[DBChatMessage]:
+        """获取会话中尚未写入数据库的消息 (按写入顺序)"""
+        return [
+            message
+            for message in self.pending
+            if message.chat_key == chat_key and (send_timestamp_gte is None or message.send_timestamp >= send_timestamp_gte)
+        ]
+
+    def find_by_message_id(self, message_id: str) -> Optional[DBChatMessage]:
+        """按消息平台 ID 查找尚未写入数据库的消息"""
+        for message in reversed(self.pending):
+            if message.message_id == message_id:
+                return message
+        return None
+
+    async def ensure_flushed(self) -> None:
+        """确保缓冲中的消息已写入数据库，直接查询数据库的读取方在查询前调用
+
+        写入失败时只记录日志，读取方照常查询数据库
+        """
+        if not self.pending:
+            return
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"读取前写入缓冲消息失败 (缓冲 {len(self.pending)} 条): {e}")
+
+    async def start(self):
+        """启动写入服务"""
+        if self.running:
+            return
+        self.running = True
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info("Message write buffer started")
+
+    async def stop(self):
+        """停止写入服务并写入所有缓冲消息"""
+        # 通知写入协程退出并等待其完成当前写入，避免在事务提交期间取消导致同一批消息重复写入
+        self.running = False
+        self._flush_event.set()
+        worker_task, self._worker_task = self._worker_task, None
+        if worker_task and not worker_task.done():
+            await worker_task
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"停止时写入缓冲消息失败，丢弃 {len(self.pending)} 条消息: {e}")
+        logger.info("Message write buffer stopped")
+
+    async def flush(self) -> None:
+        """将所有缓冲消息写入数据库，写入失败时抛出异常且消息保留在缓冲中"""
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[:MESSAGE_BUFFER_BATCH_SIZE]
+                try:
+                    async with in_transaction():
+                        await DBChatMessage.bulk_create(batch)
+                except Exception as e:
+                    # 批量写入失败时逐条写入，避免单条有问题的消息阻塞整个缓冲
+                    logger.warning(f"批量写入缓冲消息失败，改为逐条写入 ({len(batch)} 条): {e}")
+                    await self._save_rows(batch)
+                else:
+                    # 写入完成后再移出缓冲，保证写入期间读取方仍能看到这些消息
+                    del self.pending[: len(batch)]
+                    self.written_count += len(batch)
+                self.batch_count += 1
+                async with self._space_available:
+                    self._space_available.notify_all()
+
+    async def _save_rows(self, batch: List[DBChatMessage]) -> None:
+        """逐条写入消息，丢弃自身数据有误的消息；数据库不可用等其他错误时抛出异常，未写入的消息保留在缓冲中"""
+        for message in batch:
+            try:
+                await message.save()
+            except _ROW_ERRORS as e:
+                self.dropped_count += 1
+                logger.error(f"缓冲消息写入失败，已丢弃: {message.chat_key} | {message.sender_name[:32]} | {e}")
+            else:
+                self.written_count += 1
+            # 缓冲只在末尾追加，逐条处理的消息总在缓冲头部
+            if self.pending and self.pending[0] is message:
+                del self.pending[0]
+
+    async def _worker_loop(self):
+        """写入工作循环"""
+        while self.running:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self._retry_interval)
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.failed_batch_count += 1
+                self._retry_interval = min(self._retry_interval * 2, MESSAGE_BUFFER_MAX_RETRY_INTERVAL)
+                logger.error(f"写入缓冲消息失败，{self._retry_interval:.1f}s 后重试 (缓冲 {len(self.pending)} 条): {e}")
+            else:
+                self._retry_interval = MESSAGE_BUFFER_FLUSH_INTERVAL
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        return {
+            "pending": len(self.pending),
+            "written_count": self.written_count,
+            "batch_count": self.batch_count,
+            "failed_batch_count": self.failed_batch_count,
+            "dropped_count": self.dropped_count,
+            "backpressure_count": self.backpressure_count,
+        }
+
+
+# 全局消息写入缓冲实例
+message_write_buffer = MessageWriteBuffer()
@@ -11,6 +11,8 @@ from nekro_agent.adapters.interface.schemas.extra import PlatformMessageExt
 from nekro_agent.adapters.interface.schemas.platform import PlatformSendResponse
 from nekro_agent.adapters.utils import adapter_utils
 from nekro_agent.core import logger
+from nekro_agent.core.config import CoreConfig
+from nekro_agent.core.config import config as core_config
 from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_chat_message import DBChatMessage
 from nekro_agent.models.db_user import DBUser
@@ -20,6 +22,12 @@ from nekro_agent.schemas.agent_message import (
     convert_agent_message_to_prompt,
 )
 from nekro_agent.schemas.chat_message import ChatMessage, ChatType
+from nekro_agent.services.agent.admission import AgentRunPriority, agent_admission
+from nekro_agent.services.agent.templates.practice import PRACTICE_ONE_TIME_CODE
+from nekro_agent.services.chat_lease import chat_lease_manager
+from nekro_agent.services.debounce_policy import debounce_policy
+from nekro_agent.services.message_buffer import message_write_buffer
+from nekro_agent.services.summary_service import chat_summary_service
 from nekro_agent.tools.common_util import (
     check_content_trigger,
     check_forbidden_message,
@@ -28,14 +36,39 @@ from nekro_agent.tools.common_util import (
 )
 
 
+class _DebounceWindow:
+    """会话防抖窗口
+
+    新消息只推后截止时间，不重新创建定时器；定时器到期时若截止时间已被推后，则按新的截止时间重新挂起。
+    自适应防抖下截止时间不超过窗口开启时间加最长等待时长，避免持续有消息的会话一直得不到回复
+    """
+
+    def __init__(self, config: CoreConfig, chat_type: ChatType, open_time: float, wait_seconds: float):
+        self.config = config
+        self.chat_type = chat_type
+        self.open_time = open_time
+        max_window_seconds = debounce_policy.get_max_window_seconds(config)
+        self.max_deadline = open_time + max_window_seconds if max_window_seconds is not None else None
+        self.deadline = self._clamp(open_time + wait_seconds)
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+    def _clamp(self, deadline: float) -> float:
+        return min(deadline, self.max_deadline) if self.max_deadline is not None else deadline
+
+    def extend(self, now: float, wait_seconds: float) -> None:
+        """推后截止时间"""
+        self.deadline = self._clamp(now + wait_seconds)
+
+
 class MessageService:
     """消息服务类，处理所有类型的消息推送"""
 
     def __init__(self):
         # 全局状态追踪
         self.running_tasks: Dict[str, asyncio.Task] = {}  # 记录每个会话正在执行的agent任务
-        self.debounce_timers: Dict[str, float] = {}  # 记录每个会话的防抖计时器
+        self.debounce_windows: Dict[str, _DebounceWindow] = {}  # 记录每个会话当前的防抖窗口
         self.pending_messages: Dict[str, ChatMessage] = {}  # 记录每个会话待处理的最新消息
+        self.pending_priorities: Dict[str, AgentRunPriority] = {}  # 记录每个会话待处理消息中的最高优先级
 
     async def _message_validation_check(self, message: ChatMessage) -> bool:
         """消息校验"""
@@ -47,6 +80,8 @@ class MessageService:
             is_fake_message = True
         if re.match(r"<.{4,12}\|messageseperator>", plaint_text):
             is_fake_message = True
+        if f"<{PRACTICE_ONE_TIME_CODE.lower()}|" in plaint_text:
+            is_fake_message = True
 
         if "message" in plaint_text and "(id:" in plaint_text:
             is_fake_message = True
@@ -59,7 +94,17 @@ class MessageService:
 
         return True
 
-    async def schedule_agent_task(self, chat_key: Optional[str] = None, message: Optional[ChatMessage] = None):
+    def is_chat_busy(self, chat_key: str) -> bool:
+        """会话是否有正在执行的 Agent 任务或未到期的防抖窗口"""
+        task = self.running_tasks.get(chat_key)
+        return (task is not None and not task.done()) or chat_key in self.debounce_windows
+
+    async def schedule_agent_task(
+        self,
+        chat_key: Optional[str] = None,
+        message: Optional[ChatMessage] = None,
+        priority: AgentRunPriority = AgentRunPriority.NORMAL,
+    ):
         """调度 agent 任务，实现防抖和任务控制"""
         if not message:
             if not chat_key:
@@ -68,59 +113,114 @@ class MessageService:
             message = ChatMessage.create_empty(chat_key)
         chat_key = message.chat_key
 
-        current_time = time.time()
-
-        # 更新待处理消息和防抖计时器
+        # 更新待处理消息
         self.pending_messages[chat_key] = message
-        self.debounce_timers[chat_key] = current_time
+        self.pending_priorities[chat_key] = min(priority, self.pending_priorities.get(chat_key, AgentRunPriority.RANDOM))
+        if not message.is_empty():
+            debounce_policy.record_message(chat_key)
 
-        # 如果已有正在执行的任务，直接返回
+        # 如果已有正在执行的任务，直接返回，任务结束后会处理最新的待处理消息
         if chat_key in self.running_tasks and not self.running_tasks[chat_key].done():
             return
 
-        # 创建防抖任务
-        asyncio.create_task(self._debounce_task(chat_key, current_time))
+        loop = asyncio.get_running_loop()
+        window = self.debounce_windows.get(chat_key)
+        if not window:
+            # 多实例部署时会话由持有租约的实例执行，其他实例只转交触发
+            if not await chat_lease_manager.acquire(chat_key):
+                self.pending_messages.pop(chat_key, None)
+                self.pending_priorities.pop(chat_key, None)
+                await chat_lease_manager.hand_off(chat_key)
+                return
+            # 每个防抖窗口只解析一次会话配置
+            db_chat_channel = await DBChatChannel.get_channel(chat_key=chat_key)
+            config = await db_chat_channel.get_effective_config()
+            window = self.debounce_windows.get(chat_key)
+            if not window:  # 解析配置期间可能已有其他消息开启了防抖窗口
+                wait_seconds = debounce_policy.get_wait_seconds(chat_key, db_chat_channel.chat_type, config)
+                debounce_policy.record_window(wait_seconds, config.AI_DEBOUNCE_WAIT_SECONDS)
+                window = _DebounceWindow(config, db_chat_channel.chat_type, loop.time(), wait_seconds)
+                window.handle = loop.call_at(window.deadline, self._on_debounce_timeout, chat_key)
+                self.debounce_windows[chat_key] = window
+                return
+
+        # 防抖期间的新消息合并到当前窗口，只推后截止时间
+        debounce_policy.record_coalesced()
+        window.extend(loop.time(), debounce_policy.get_wait_seconds(chat_key, window.chat_type, window.config))
 
-    async def _debounce_task(self, chat_key: str, start_time: float):
-        """防抖任务处理
+    def _on_debounce_timeout(self, chat_key: str):
+        """防抖定时器到期回调
 
         Args:
             chat_key (str): 会话标识
-            start_time (float): 任务开始时间
         """
-        db_chat_channel = await DBChatChannel.get(chat_key=chat_key)
-        config = await db_chat_channel.get_effective_config()
-        # 等待防抖时间
-        await asyncio.sleep(config.AI_DEBOUNCE_WAIT_SECONDS)
+        window = self.debounce_windows.get(chat_key)
+        if not window:
+            return
 
         # 检查是否在防抖期间有新消息
-        if start_time != self.debounce_timers[chat_key]:
+        loop = asyncio.get_running_loop()
+        if window.deadline > loop.time():
+            window.handle = loop.call_at(window.deadline, self._on_debounce_timeout, chat_key)
+            return
+        del self.debounce_windows[chat_key]
+
+        # 防抖期间已有任务开始执行时，待处理消息由该任务结束后处理
+        if chat_key in self.running_tasks and not self.running_tasks[chat_key].done():
             return
 
         # 获取最终要处理的消息
         final_message = self.pending_messages.pop(chat_key, None)
+        priority = self.pending_priorities.pop(chat_key, AgentRunPriority.NORMAL)
         if not final_message:
             return
 
         # 创建新的agent任务
         task = asyncio.create_task(
-            self._run_chat_agent_task(chat_key=chat_key, message=final_message if not final_message.is_empty() else None),
+            self._run_chat_agent_task(
+                chat_key=chat_key,
+                message=final_message if not final_message.is_empty() else None,
+                priority=priority,
+            ),
         )
         self.running_tasks[chat_key] = task
 
-    async def _run_chat_agent_task(self, chat_key: str, message: Optional[ChatMessage] = None):
+    async def _run_chat_agent_task(
+        self,
+        chat_key: str,
+        message: Optional[ChatMessage] = None,
+        priority: AgentRunPriority = AgentRunPriority.NORMAL,
+    ):
         """执行agent任务"""
         from nekro_agent.services.agent.run_agent import run_agent
+        from nekro_agent.services.chat.universal_chat_service import (
+            universal_chat_service,
+        )
 
         adapter = await adapter_utils.get_adapter_for_chat(chat_key)
+        notify_overload = priority == AgentRunPriority.DIRECT
 
-        logger.info(f"Message From {chat_key} is ToMe, Running Chat Agent...")
+        admitted = False
+        start_time = time.monotonic()
+        try:
+            # 获取全局执行许可，负载过高时排队或被丢弃
+            admitted = agent_admission.try_acquire()
+            if not admitted:
+                if notify_overload and core_config.AI_AGENT_QUEUED_NOTICE:
+                    await universal_chat_service.send_operation_message(chat_key, core_config.AI_AGENT_QUEUED_NOTICE)
+                admitted = await agent_admission.acquire(chat_key, priority)
+            if not admitted:
+                if notify_overload and core_config.AI_AGENT_SHED_NOTICE:
+                    await universal_chat_service.send_operation_message(chat_key, core_config.AI_AGENT_SHED_NOTICE)
+                return
 
-        # 设置处理emoji
-        if message and adapter.config.SESSION_PROCESSING_WITH_EMOJI and message.message_id:
-            await adapter.set_message_reaction(message.message_id, True)
+            logger.info(f"Message From {chat_key} is ToMe, Running Chat Agent...")
 
-        try:
+            # 设置处理emoji
+            if message and adapter.config.SESSION_PROCESSING_WITH_EMOJI and message.message_id:
+                await adapter.set_message_reaction(message.message_id, True)
+
+            start_time = time.monotonic()
             for _i in range(3):
                 try:
                     await run_agent(chat_key=chat_key, chat_message=message)
@@ -131,20 +231,28 @@ class MessageService:
             else:
                 logger.error("Failed to Run Chat Agent.")
         finally:
+            if admitted:
+                agent_admission.release()
+                debounce_policy.record_run(chat_key, time.monotonic() - start_time)
             # 清理任务状态
             if chat_key in self.running_tasks:
                 del self.running_tasks[chat_key]
 
             final_message = self.pending_messages.pop(chat_key, None)
-            self.debounce_timers.pop(chat_key, None)
+            final_priority = self.pending_priorities.pop(chat_key, AgentRunPriority.NORMAL)
+            window = self.debounce_windows.pop(chat_key, None)
+            if window and window.handle:
+                window.handle.cancel()
 
             # 取消处理emoji（如果设置过）
-            if adapter.config.SESSION_PROCESSING_WITH_EMOJI and message and message.message_id:
+            if admitted and adapter.config.SESSION_PROCESSING_WITH_EMOJI and message and message.message_id:
                 await adapter.set_message_reaction(message.message_id, False)
 
             # 如果有待处理消息，创建新的任务处理最后一条消息
             if final_message:
-                new_task = asyncio.create_task(self._run_chat_agent_task(chat_key=chat_key, message=final_message))
+                new_task = asyncio.create_task(
+                    self._run_chat_agent_task(chat_key=chat_key, message=final_message, priority=final_priority),
+                )
                 self.running_tasks[chat_key] = new_task
 
     async def push_human_message(
@@ -170,41 +278,44 @@ class MessageService:
             return
 
         # 添加聊天记录
-        await DBChatMessage.create(
-            message_id=message.message_id,
-            sender_id=message.sender_id,
-            sender_name=message.sender_name,
-            sender_nickname=message.sender_nickname,
-            adapter_key=message.adapter_key,
-            platform_userid=message.platform_userid,
-            is_tome=message.is_tome,
-            is_recalled=message.is_recalled,
-            chat_key=message.chat_key,
-            chat_type=message.chat_type,
-            content_text=message.content_text,
-            content_data=json.dumps(content_data, ensure_ascii=False),
-            raw_cq_code=message.raw_cq_code,
-            ext_data=json.dumps(message.ext_data, ensure_ascii=False),
-            send_timestamp=int(time.time()),  # 使用处理后的时间戳
+        await message_write_buffer.add(
+            DBChatMessage(
+                message_id=message.message_id,
+                sender_id=message.sender_id,
+                sender_name=message.sender_name,
+                sender_nickname=message.sender_nickname,
+                adapter_key=message.adapter_key,
+                platform_userid=message.platform_userid,
+                is_tome=message.is_tome,
+                is_recalled=message.is_recalled,
+                chat_key=message.chat_key,
+                chat_type=message.chat_type,
+                content_text=message.content_text,
+                content_data=json.dumps(content_data, ensure_ascii=False),
+                raw_cq_code=message.raw_cq_code,
+                ext_data=json.dumps(message.ext_data, ensure_ascii=False),
+                send_timestamp=int(time.time()),  # 使用处理后的时间戳
+            ),
         )
+        chat_summary_service.notify_message(message.chat_key, message.content_text)
 
         should_ignore = (user and user.is_prevent_trigger) or (user and not user.is_active)
 
-        # 检查是否需要触发回复
-        should_trigger = (
-            trigger_agent
-            or preset.name in message.content_text
-            or message.is_tome
-            or random_chat_check(config)
-            or check_content_trigger(message.content_text, config)
-        )
+        # 检查是否需要触发回复，并按触发方式确定执行优先级
+        priority: Optional[AgentRunPriority] = None
+        if trigger_agent or preset.name in message.content_text or message.is_tome:
+            priority = AgentRunPriority.DIRECT
+        elif check_content_trigger(message.content_text, config):
+            priority = AgentRunPriority.NORMAL
+        elif random_chat_check(config):
+            priority = AgentRunPriority.RANDOM
 
-        if not should_ignore and should_trigger:
+        if not should_ignore and priority is not None:
             if not db_chat_channel.is_active:
                 logger.info(f"聊天频道 {message.chat_key} 已被禁用，跳过本次处理...")
                 return
 
-            await self.schedule_agent_task(message=message)
+            await self.schedule_agent_task(message=message, priority=priority)
 
     async def push_bot_message(
         self,
@@ -257,23 +368,26 @@ class MessageService:
                 )
 
         adapter = adapter_utils.get_adapter(db_chat_channel.adapter_key)
-        await DBChatMessage.create(
-            message_id=plt_response.message_id if plt_response and plt_response.message_id else "",
-            sender_id=-1,
-            sender_name=preset.name,
-            sender_nickname=preset.name,
-            adapter_key=db_chat_channel.adapter_key,
-            platform_userid=(await adapter.get_self_info()).user_id,
-            is_tome=0,
-            is_recalled=False,
-            chat_key=chat_key,
-            chat_type=db_chat_channel.chat_type,
-            content_text=content_text,
-            content_data=json.dumps(content_data, ensure_ascii=False),
-            raw_cq_code="",
-            ext_data=json.dumps(PlatformMessageExt(ref_msg_id=ref_msg_id or "").model_dump(), ensure_ascii=False),
-            send_timestamp=int(time.time()),
+        await message_write_buffer.add(
+            DBChatMessage(
+                message_id=plt_response.message_id if plt_response and plt_response.message_id else "",
+                sender_id=-1,
+                sender_name=preset.name,
+                sender_nickname=preset.name,
+                adapter_key=db_chat_channel.adapter_key,
+                platform_userid=(await adapter.get_cached_self_info()).user_id,
+                is_tome=0,
+                is_recalled=False,
+                chat_key=chat_key,
+                chat_type=db_chat_channel.chat_type,
+                content_text=content_text,
+                content_data=json.dumps(content_data, ensure_ascii=False),
+                raw_cq_code="",
+                ext_data=json.dumps(PlatformMessageExt(ref_msg_id=ref_msg_id or "").model_dump(), ensure_ascii=False),
+                send_timestamp=int(time.time()),
+            ),
         )
+        chat_summary_service.notify_message(chat_key, content_text)
 
     async def push_system_message(
         self,
@@ -291,22 +405,24 @@ class MessageService:
 
         content_text = convert_agent_message_to_prompt(agent_messages)
 
-        await DBChatMessage.create(
-            message_id="",
-            sender_id=-1,
-            sender_name="SYSTEM",
-            sender_nickname="SYSTEM",
-            adapter_key=db_chat_channel.adapter_key,
-            platform_userid="0",
-            is_tome=1 if trigger_agent else 0,
-            is_recalled=False,
-            chat_key=chat_key,
-            chat_type=db_chat_channel.chat_type,
-            content_text=content_text,
-            content_data=json.dumps([], ensure_ascii=False),
-            raw_cq_code="",
-            ext_data={},
-            send_timestamp=int(time.time()),
+        await message_write_buffer.add(
+            DBChatMessage(
+                message_id="",
+                sender_id=-1,
+                sender_name="SYSTEM",
+                sender_nickname="SYSTEM",
+                adapter_key=db_chat_channel.adapter_key,
+                platform_userid="0",
+                is_tome=1 if trigger_agent else 0,
+                is_recalled=False,
+                chat_key=chat_key,
+                chat_type=db_chat_channel.chat_type,
+                content_text=content_text,
+                content_data=json.dumps([], ensure_ascii=False),
+                raw_cq_code="",
+                ext_data={},
+                send_timestamp=int(time.time()),
+            ),
         )
 
         if trigger_agent:
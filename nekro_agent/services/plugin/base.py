@@ -22,12 +22,16 @@ from nekro_agent.core.core_utils import ConfigBase
 from nekro_agent.core.os_env import OsEnv
 from nekro_agent.models.db_plugin_data import DBPluginData
 from nekro_agent.schemas.agent_ctx import AgentCtx
+from nekro_agent.services.channel_cache import TTLCache
 
 from .schema import PromptInjectMethod, SandboxMethod, SandboxMethodType, WebhookMethod
 
 T = TypeVar("T", bound=ConfigBase)
 CollectMethodsFunc = Callable[[AgentCtx], Coroutine[Any, Any, List[SandboxMethod]]]
 
+# 每个插件按会话缓存提示注入内容的最大条目数，超出时淘汰最久未使用的会话
+INJECT_PROMPT_CACHE_MAX_SIZE: int = 1000
+
 
 class NekroPlugin:
     """Nekro 插件基类
@@ -70,6 +74,7 @@ class NekroPlugin:
         self._is_builtin: bool = is_builtin  # 标记是否为内置插件
         self._is_package: bool = is_package  # 标记是否为包
         self._module: Optional["ModuleType"] = None  # 模块对象
+        self._inject_prompt_cache: TTLCache[str] = TTLCache("inject_prompt", 0, INJECT_PROMPT_CACHE_MAX_SIZE)  # chat_key -> 注入内容
 
         # 路由相关
         self._router_func: Optional[Callable[[], APIRouter]] = None
@@ -83,6 +88,7 @@ class NekroPlugin:
         self.init_method = None
         self.cleanup_method = None
         self.prompt_inject_method = None
+        self._inject_prompt_cache.clear()
         self.on_reset_method = None
         self.sandbox_methods = []
         self.webhook_methods = {}
@@ -247,6 +253,7 @@ class NekroPlugin:
         self,
         name: str,
         description: str = "",
+        cache_ttl: float = 0,
     ) -> Callable[[Callable[[AgentCtx], Coroutine[Any, Any, str]]], Callable[[AgentCtx], Coroutine[Any, Any, str]]]:
         """挂载提示注入方法
 
@@ -255,13 +262,16 @@ class NekroPlugin:
         Args:
             name (str): 挂载的提示注入方法的名称
             description (str): 挂载的提示注入方法的描述
+            cache_ttl (float): 注入内容按会话缓存的有效期 (秒)，0 表示不缓存；
+                缓存期内内容发生变化时可调用 `invalidate_inject_prompt_cache` 主动失效
 
         Returns:
             装饰器函数
         """
 
         def decorator(func: Callable[[AgentCtx], Coroutine[Any, Any, str]]) -> Callable[[AgentCtx], Coroutine[Any, Any, str]]:
-            self.prompt_inject_method = PromptInjectMethod(name, description, func)
+            self.prompt_inject_method = PromptInjectMethod(name, description, func, cache_ttl=cache_ttl)
+            self._inject_prompt_cache = TTLCache("inject_prompt", cache_ttl, INJECT_PROMPT_CACHE_MAX_SIZE)
             return func
 
         return decorator
@@ -398,9 +408,33 @@ class NekroPlugin:
         Returns:
             str: 插件提示
         """
-        if self.prompt_inject_method:
+        if not self.prompt_inject_method:
+            return ""
+
+        cache_ttl = self.prompt_inject_method.cache_ttl
+        if cache_ttl <= 0:
             return await self.prompt_inject_method.func(ctx)
-        return ""
+
+        cache_key = ctx.from_chat_key or ""
+        cached = self._inject_prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        version = self._inject_prompt_cache.version
+        prompt = await self.prompt_inject_method.func(ctx)
+        self._inject_prompt_cache.set(cache_key, prompt, version)
+        return prompt
+
+    def invalidate_inject_prompt_cache(self, chat_key: Optional[str] = None) -> None:
+        """使提示注入缓存失效
+
+        Args:
+            chat_key (Optional[str]): 会话标识，为空时清空所有会话的缓存
+        """
+        if chat_key is None:
+            self._inject_prompt_cache.clear()
+        else:
+            self._inject_prompt_cache.invalidate(chat_key)
 
     async def render_sandbox_methods_prompt(self, ctx: AgentCtx) -> str:
         """渲染沙盒方法提示词
@@ -54,7 +54,14 @@ class SandboxMethod:
 class PromptInjectMethod:
     """提示注入方法"""
 
-    def __init__(self, name: str, description: str, func: Callable[..., Coroutine[Any, Any, str]]):
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        func: Callable[..., Coroutine[Any, Any, str]],
+        cache_ttl: float = 0,
+    ):
         self.name = name
         self.description = description
         self.func = func
+        self.cache_ttl = cache_ttl
@@ -0,0 +1,259 @@
+"""提示词日志批量写入服务
+
+将 LLM 请求日志放入有界内存队列，由后台协程批量追加到 gzip 压缩的 JSONL 分段文件中，按大小或时间轮转；
+每批记录写为一个独立的 gzip 成员，并在同名 `.idx` 索引文件中记录各请求所在的成员偏移，按请求 ID 查询时只需解压对应成员。
+"""
+
+import asyncio
+import gzip
+import json
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import config
+from nekro_agent.core.os_env import PROMPT_LOG_DIR
+
+# 日志引用前缀，用于在 `log_path` 中区分批量日志记录与普通日志文件
+PROMPT_LOG_REF_PREFIX = "prompt_log:"
+
+# 内存队列容量，写入跟不上时丢弃新日志并计数
+PROMPT_LOG_QUEUE_SIZE: int = 1000
+# 单批最多写入的记录数与等待凑批的最长时间 (秒)
+PROMPT_LOG_BATCH_SIZE: int = 100
+PROMPT_LOG_FLUSH_INTERVAL: float = 1.0
+# 内存中保留的最近记录索引数
+PROMPT_LOG_INDEX_CACHE_SIZE: int = 10000
+# 停止时等待写入协程写完队列中日志的最长时间 (秒)
+PROMPT_LOG_STOP_TIMEOUT: float = 10
+
+_SEGMENT_SUFFIX = ".jsonl.gz"
+_INDEX_SUFFIX = ".idx"
+
+
+def _default(o: Any) -> Any:
+    return str(o)
+
+
+def _index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name.removesuffix(_SEGMENT_SUFFIX) + _INDEX_SUFFIX)
+
+
+def _segment_path(index_path: Path) -> Path:
+    return index_path.with_name(index_path.name.removesuffix(_INDEX_SUFFIX) + _SEGMENT_SUFFIX)
+
+
+class PromptLogWriter:
+    """提示词日志批量写入器"""
+
+    def __init__(self, log_dir: str = PROMPT_LOG_DIR):
+        self.log_dir = Path(log_dir)
+        # 队列中的 None 为停止信号，写入协程写完其之前的日志后退出
+        self.queue: "asyncio.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = asyncio.Queue(maxsize=PROMPT_LOG_QUEUE_SIZE)
+        self.running = False
+        self._worker_task: Optional[asyncio.Task] = None
+        self._segment_path: Optional[Path] = None
+        self._segment_created_at: float = 0
+        self._index_cache: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # 请求 ID -> (分段文件名, 成员偏移)
+        # 统计
+        self.written_count = 0
+        self.dropped_count = 0
+        self.batch_count = 0
+
+    @staticmethod
+    def new_ref() -> str:
+        """生成新的日志引用"""
+        return f"{PROMPT_LOG_REF_PREFIX}{uuid.uuid4().hex}"
+
+    @staticmethod
+    def is_ref(log_path: Any) -> bool:
+        return isinstance(log_path, str) and log_path.startswith(PROMPT_LOG_REF_PREFIX)
+
+    def enqueue(self, log_ref: str, record: Dict[str, Any]) -> bool:
+        """将日志记录放入写入队列
+
+        Args:
+            log_ref (str): 日志引用
+            record (Dict[str, Any]): 日志内容
+
+        Returns:
+            bool: 是否成功入队，队列已满时丢弃并返回 False
+        """
+        try:
+            self.queue.put_nowait((log_ref.removeprefix(PROMPT_LOG_REF_PREFIX), record))
+        except asyncio.QueueFull:
+            self.dropped_count += 1
+            if self.dropped_count % 100 == 1:
+                logger.warning(f"提示词日志写入队列已满，已累计丢弃 {self.dropped_count} 条日志")
+            return False
+        return True
+
+    async def start(self):
+        """启动写入服务"""
+        if self.running:
+            return
+        self.running = True
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info("Prompt log writer started")
+
+    async def stop(self):
+        """停止写入服务并写入队列中剩余的日志"""
+        self.running = False
+        worker_task, self._worker_task = self._worker_task, None
+        worker_running = False
+        if worker_task and not worker_task.done():
+            await self.queue.put(None)
+            try:
+                # 超时时不取消写入协程，其线程中进行中的写入无法中断
+                await asyncio.wait_for(asyncio.shield(worker_task), timeout=PROMPT_LOG_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                worker_running = True
+                logger.warning("等待提示词日志写入超时，剩余日志将写入新的分段")
+        # 写入协程未处理的日志
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        if worker_running:
+            # 写入协程完成当前写入后退出；剩余日志写入新的分段，避免与其同时写入同一文件
+            self.queue.put_nowait(None)
+        if batch:
+            await asyncio.to_thread(self._write_batch, batch, worker_running)
+        logger.info("Prompt log writer stopped")
+
+    async def _worker_loop(self):
+        """写入工作循环"""
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + PROMPT_LOG_FLUSH_INTERVAL
+            while len(batch) < PROMPT_LOG_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                logger.exception(f"提示词日志写入失败，丢弃 {len(batch)} 条日志: {e}")
+                self.dropped_count += len(batch)
+
+    def _new_segment_path(self) -> Path:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        return self.log_dir / f"prompts_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{_SEGMENT_SUFFIX}"
+
+    def _get_segment(self) -> Path:
+        """获取当前分段文件，超过大小或时间限制时轮转"""
+        now = time.time()
+        if self._segment_path is not None:
+            too_large = self._segment_path.exists() and self._segment_path.stat().st_size >= config.PROMPT_LOG_SEGMENT_MAX_MB * 1024 * 1024
+            too_old = now - self._segment_created_at >= config.PROMPT_LOG_SEGMENT_MAX_HOURS * 3600
+            if not too_large and not too_old:
+                return self._segment_path
+
+        self._segment_path = self._new_segment_path()
+        self._segment_created_at = now
+        self._cleanup_segments()
+        return self._segment_path
+
+    def _cleanup_segments(self) -> None:
+        """删除超出保留数量的旧分段"""
+        if config.PROMPT_LOG_MAX_SEGMENTS <= 0:
+            return
+        segments = sorted(self.log_dir.glob(f"prompts_*{_SEGMENT_SUFFIX}"))
+        for segment in segments[: max(0, len(segments) - config.PROMPT_LOG_MAX_SEGMENTS)]:
+            segment.unlink(missing_ok=True)
+            _index_path(segment).unlink(missing_ok=True)
+
+    def _write_batch(self, batch: List[Tuple[str, Dict[str, Any]]], new_segment: bool = False) -> None:
+        """将一批记录写为分段文件中的一个 gzip 成员，`new_segment` 为真时写入单独的新分段 (不作为后续写入的当前分段)"""
+        segment = self._new_segment_path() if new_segment else self._get_segment()
+        payload = "".join(
+            json.dumps({"id": record_id, **record}, ensure_ascii=False, default=_default) + "\n" for record_id, record in batch
+        ).encode("utf-8")
+        with segment.open("ab") as f:
+            offset = f.tell()
+            f.write(gzip.compress(payload))
+        with _index_path(segment).open("a", encoding="utf-8") as f:
+            f.writelines(f"{record_id}\t{offset}\n" for record_id, _ in batch)
+
+        for record_id, _ in batch:
+            self._index_cache[record_id] = (segment.name, offset)
+        while len(self._index_cache) > PROMPT_LOG_INDEX_CACHE_SIZE:
+            self._index_cache.popitem(last=False)
+        self.written_count += len(batch)
+        self.batch_count += 1
+
+    def _find_location(self, record_id: str) -> Optional[Tuple[str, int]]:
+        if record_id in self._index_cache:
+            return self._index_cache[record_id]
+        for index_path in sorted(self.log_dir.glob(f"prompts_*{_INDEX_SUFFIX}"), reverse=True):
+            with index_path.open(encoding="utf-8") as f:
+                for line in f:
+                    line_id, _, offset = line.rstrip("\n").partition("\t")
+                    if line_id == record_id:
+                        return _segment_path(index_path).name, int(offset)
+        return None
+
+    def read_record(self, log_ref: str) -> Optional[Dict[str, Any]]:
+        """按日志引用读取记录
+
+        Args:
+            log_ref (str): 日志引用或请求 ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 日志内容，不存在 (尚未写入或已被清理) 时返回 None
+        """
+        record_id = log_ref.removeprefix(PROMPT_LOG_REF_PREFIX)
+        location = self._find_location(record_id)
+        if not location:
+            return None
+        segment_name, offset = location
+        segment = self.log_dir / segment_name
+        if not segment.exists():
+            return None
+
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        data = b""
+        with segment.open("rb") as f:
+            f.seek(offset)
+            while not decompressor.eof:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                data += decompressor.decompress(chunk)
+        for line in data.decode("utf-8").splitlines():
+            record = json.loads(line)
+            if record.get("id") == record_id:
+                return record
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        return {
+            "queue_size": self.queue.qsize(),
+            "written_count": self.written_count,
+            "dropped_count": self.dropped_count,
+            "batch_count": self.batch_count,
+            "current_segment": self._segment_path.name if self._segment_path else None,
+        }
+
+
+# 全局提示词日志写入服务实例
+prompt_log_writer = PromptLogWriter()
@@ -24,6 +24,7 @@ from nekro_agent.schemas.chat_message import ChatMessage
 from nekro_agent.schemas.sandbox import SandboxCodeExtData
 from nekro_agent.services.agent.openai import OpenAIResponse
 from nekro_agent.services.agent.resolver import ParsedCodeRunData
+from nekro_agent.services.media_ingestion import media_ingestion
 from nekro_agent.tools.common_util import limited_text_output
 
 from .ext_caller import CODE_PREAMBLE, get_api_caller_code
@@ -140,6 +141,9 @@ async def run_code_in_sandbox(
 ) -> Tuple[str, str, int]:
     """在沙盒容器中运行代码并获取输出"""
 
+    # 代码引用的上传文件可能仍在后台下载
+    await media_ingestion.wait_for_referenced(from_chat_key, code_run_data.code_content)
+
     # 记录开始时间
     start_time = time.time()
 
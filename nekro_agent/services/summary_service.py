@@ -0,0 +1,211 @@
+import asyncio
+import datetime
+from typing import Dict, List, Optional, Set
+
+from nekro_agent.core import logger
+from nekro_agent.core.config import CoreConfig, ModelConfigGroup
+from nekro_agent.core.config import config as core_config
+from nekro_agent.models.db_chat_channel import DBChatChannel
+from nekro_agent.models.db_chat_message import (
+    DBChatMessage,
+    convert_raw_msg_data_json_to_msg_prompt,
+)
+from nekro_agent.models.db_chat_summary import DBChatSummary
+from nekro_agent.services.agent.creator import OpenAIChatMessage
+from nekro_agent.services.agent.openai import gen_openai_chat_response
+from nekro_agent.services.agent.rate_limiter import RequestPriority
+from nekro_agent.services.agent.templates.summary import (
+    SummarySystemPrompt,
+    SummaryUserPrompt,
+)
+from nekro_agent.services.llm_ledger import LLMCallInfo
+from nekro_agent.tools.common_util import estimate_token_count, limited_text_output
+
+# 单次摘要最多处理的消息条数
+SUMMARY_BATCH_SIZE: int = 200
+
+
+class ChatSummaryService:
+    """会话滚动摘要服务
+
+    在后台为会话维护滚动摘要，消息入库时只做计数，摘要生成完全在独立的工作协程中完成，不占用回复流程。
+    """
+
+    def __init__(self):
+        self.pending_message_counts: Dict[str, int] = {}  # 会话自上次触发后新增的消息条数
+        self.pending_token_counts: Dict[str, int] = {}  # 会话自上次触发后新增的估算 Token 数
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self.queued_chat_keys: Set[str] = set()
+        self.running = False
+        self._worker_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """启动摘要服务"""
+        if self.running:
+            return
+        self.running = True
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info("Chat summary service started")
+
+    async def stop(self):
+        """停止摘要服务"""
+        self.running = False
+        if self._worker_task and not self._worker_task.done():
+            self._worker_task.cancel()
+        self._worker_task = None
+        logger.info("Chat summary service stopped")
+
+    def notify_message(self, chat_key: str, content_text: str) -> None:
+        """记录新消息，达到阈值时将会话加入摘要队列
+
+        Args:
+            chat_key (str): 会话标识
+            content_text (str): 消息文本
+        """
+        if not core_config.AI_SUMMARY_ENABLED:
+            return
+
+        message_count = self.pending_message_counts.get(chat_key, 0) + 1
+        token_count = self.pending_token_counts.get(chat_key, 0) + estimate_token_count(content_text)
+        if message_count < core_config.AI_SUMMARY_TRIGGER_MESSAGES and token_count < core_config.AI_SUMMARY_TRIGGER_TOKENS:
+            self.pending_message_counts[chat_key] = message_count
+            self.pending_token_counts[chat_key] = token_count
+            return
+
+        self.pending_message_counts.pop(chat_key, None)
+        self.pending_token_counts.pop(chat_key, None)
+        if chat_key not in self.queued_chat_keys:
+            self.queued_chat_keys.add(chat_key)
+            self.queue.put_nowait(chat_key)
+
+    async def reset_channel(self, chat_key: str) -> None:
+        """清除会话摘要"""
+        self.pending_message_counts.pop(chat_key, None)
+        self.pending_token_counts.pop(chat_key, None)
+        await DBChatSummary.filter(chat_key=chat_key).delete()
+
+    async def get_summary(self, db_chat_channel: DBChatChannel) -> str:
+        """获取会话在当前对话周期内的摘要"""
+        summary = await DBChatSummary.get_or_none(chat_key=db_chat_channel.chat_key)
+        if not summary or summary.last_message_timestamp < db_chat_channel.conversation_start_time.timestamp():
+            return ""
+        return summary.summary
+
+    async def _worker_loop(self):
+        """摘要工作循环"""
+        while self.running:
+            chat_key = await self.queue.get()
+            self.queued_chat_keys.discard(chat_key)
+            try:
+                await self.summarize_channel(chat_key)
+            except Exception as e:
+                logger.exception(f"会话摘要生成失败: {chat_key} | {e}")
+
+    async def summarize_channel(self, chat_key: str) -> bool:
+        """将超出上下文窗口的新消息合并到会话摘要中
+
+        Args:
+            chat_key (str): 会话标识
+
+        Returns:
+            bool: 是否更新了摘要
+        """
+        db_chat_channel = await DBChatChannel.get_or_none(chat_key=chat_key)
+        if not db_chat_channel:
+            return False
+        config = await db_chat_channel.get_effective_config()
+        summary = await DBChatSummary.get_or_none(chat_key=chat_key)
+        conversation_start_timestamp = int(db_chat_channel.conversation_start_time.timestamp())
+        if summary and summary.last_message_timestamp < conversation_start_timestamp:
+            summary.summary, summary.last_message_db_id, summary.summarized_count = "", 0, 0
+
+        # 仅摘要已离开实时上下文窗口的消息：窗口边缘之外最新的一条消息即为本轮摘要的边界
+        boundary_ids: List[int] = await (
+            DBChatMessage.filter(chat_key=chat_key, send_timestamp__gte=conversation_start_timestamp)
+            .order_by("-id")
+            .offset(config.AI_CHAT_CONTEXT_MAX_LENGTH)
+            .limit(1)
+            .values_list("id", flat=True)
+        )
+        if not boundary_ids:
+            return False
+        boundary_id = boundary_ids[0]
+
+        # 从上次摘要位置起按时间顺序分批追赶，直到边界
+        updated = False
+        while True:
+            new_messages: List[DBChatMessage] = await (
+                DBChatMessage.filter(
+                    chat_key=chat_key,
+                    id__gt=summary.last_message_db_id if summary else 0,
+                    id__lte=boundary_id,
+                    send_timestamp__gte=conversation_start_timestamp,
+                )
+                .order_by("id")
+                .limit(SUMMARY_BATCH_SIZE)
+            )
+            if not new_messages:
+                break
+            summary = await self._summarize_batch(chat_key, config, summary, new_messages)
+            updated = True
+            if len(new_messages) < SUMMARY_BATCH_SIZE:
+                break
+        return updated
+
+    async def _summarize_batch(
+        self,
+        chat_key: str,
+        config: CoreConfig,
+        summary: Optional[DBChatSummary],
+        new_messages: List[DBChatMessage],
+    ) -> DBChatSummary:
+        """将一批消息合并到会话摘要中"""
+        message_lines: List[str] = []
+        for db_message in new_messages:
+            content = convert_raw_msg_data_json_to_msg_prompt(db_message.content_data, "", travel_mode=True)
+            content = limited_text_output(content or db_message.content_text, config.AI_CONTEXT_LENGTH_PER_MESSAGE)
+            time_str = datetime.datetime.fromtimestamp(db_message.send_timestamp).strftime("%m-%d %H:%M")
+            message_lines.append(f"[{time_str} id:{db_message.platform_userid}] {db_message.sender_nickname}: {content}")
+
+        model_group: ModelConfigGroup = config.get_model_group_info(core_config.AI_SUMMARY_MODEL_GROUP)
+        llm_response = await gen_openai_chat_response(
+            model=model_group.CHAT_MODEL,
+            messages=[
+                OpenAIChatMessage.from_template("system", SummarySystemPrompt(max_length=core_config.AI_SUMMARY_MAX_LENGTH)),
+                OpenAIChatMessage.from_template(
+                    "user",
+                    SummaryUserPrompt(
+                        previous_summary=summary.summary if summary else "",
+                        new_messages="\n".join(message_lines),
+                    ),
+                ),
+            ],
+            base_url=model_group.BASE_URL,
+            api_key=model_group.API_KEY,
+            proxy_url=model_group.CHAT_PROXY,
+            max_wait_time=config.AI_GENERATE_TIMEOUT,
+            priority=RequestPriority.LOW,
+            call_info=LLMCallInfo(source="summary", model_group=core_config.AI_SUMMARY_MODEL_GROUP, chat_key=chat_key),
+        )
+        summary_text = llm_response.response_content.strip()[: core_config.AI_SUMMARY_MAX_LENGTH]
+
+        if summary:
+            summary.summary = summary_text
+            summary.last_message_db_id = new_messages[-1].id
+            summary.last_message_timestamp = new_messages[-1].send_timestamp
+            summary.summarized_count += len(new_messages)
+            await summary.save()
+        else:
+            summary = await DBChatSummary.create(
+                chat_key=chat_key,
+                summary=summary_text,
+                last_message_db_id=new_messages[-1].id,
+                last_message_timestamp=new_messages[-1].send_timestamp,
+                summarized_count=len(new_messages),
+            )
+        logger.info(f"会话摘要已更新: {chat_key} | 新增 {len(new_messages)} 条消息 | 摘要长度 {len(summary_text)}")
+        return summary
+
+
+# 全局会话摘要服务实例
+chat_summary_service = ChatSummaryService()
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional
 
+from tortoise.exceptions import IntegrityError
+
 from nekro_agent.core import config, logger
 from nekro_agent.core.os_env import OsEnv
 from nekro_agent.models.db_user import DBUser
@@ -24,7 +26,7 @@ async def user_register(data: UserCreate) -> Ret:
     logger.info(f"正在注册用户 {data.username} ...")
     if data.username == "admin":
         return Ret.fail("注册失败，管理员保留用户名无法注册")
-    if await DBUser.get_or_none(adapter_key=data.adapter_key, platform_userid=data.platform_userid):
+    if await DBUser.get_by_union_id(adapter_key=data.adapter_key, platform_userid=data.platform_userid):
         return Ret.fail("注册失败，用户已存在")
     try:
         await DBUser.create(
@@ -36,6 +38,9 @@ async def user_register(data: UserCreate) -> Ret:
             login_time=datetime.now(),
         )
         return Ret.success("注册成功")
+    except IntegrityError:
+        # 同一用户的多条首条消息并发注册时，由唯一约束保证只创建一条记录
+        return Ret.fail("注册失败，用户已存在")
     except Exception as e:
         logger.error(f"注册用户时发生错误: {e}")
         return Ret.fail("注册失败，请稍后再试。")
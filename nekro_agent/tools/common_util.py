@@ -4,6 +4,8 @@ import hashlib
 import mimetypes
 import random
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple
 
@@ -16,6 +18,7 @@ from PIL import Image
 from nekro_agent.core import logger
 from nekro_agent.core.config import CoreConfig
 from nekro_agent.core.os_env import USER_UPLOAD_DIR
+from nekro_agent.tools.content_matcher import ContentMatcher
 from nekro_agent.tools.path_convertor import is_url_path
 
 _APP_VERSION: str = ""
@@ -185,6 +188,41 @@ def random_chat_check(config: CoreConfig) -> bool:
     return random.random() < config.AI_CHAT_RANDOM_REPLY_PROBABILITY
 
 
+# 按配置版本号缓存的匹配器数量
+_CONTENT_MATCHER_CACHE_SIZE: int = 256
+_content_matchers: "OrderedDict[int, ContentMatcher]" = OrderedDict()
+
+
+@lru_cache(maxsize=_CONTENT_MATCHER_CACHE_SIZE)
+def _build_content_matcher(
+    trigger_patterns: Tuple[str, ...],
+    ignore_patterns: Tuple[str, ...],
+    ignored_prefixes: Tuple[str, ...],
+) -> ContentMatcher:
+    matcher = ContentMatcher(trigger_patterns, ignore_patterns, ignored_prefixes)
+    for pattern, error in matcher.errors:
+        logger.warning(f'无效的正则表达式已被忽略: "{pattern}" - {error}')
+    return matcher
+
+
+def get_content_matcher(config: CoreConfig) -> ContentMatcher:
+    """获取配置对应的消息触发 / 忽略匹配器
+
+    匹配器按配置版本号缓存，配置被修改后重新构建；表达式相同的配置共用同一个匹配器
+    """
+    matcher = _content_matchers.get(config.config_version)
+    if matcher is None:
+        matcher = _build_content_matcher(
+            tuple(config.AI_CHAT_TRIGGER_REGEX),
+            tuple(config.AI_CHAT_IGNORE_REGEX),
+            tuple(config.AI_IGNORED_PREFIXES),
+        )
+        _content_matchers[config.config_version] = matcher
+        while len(_content_matchers) > _CONTENT_MATCHER_CACHE_SIZE:
+            _content_matchers.popitem(last=False)
+    return matcher
+
+
 def check_content_trigger(content: str, config: CoreConfig) -> bool:
     """内容触发检测
 
@@ -195,11 +233,7 @@ def check_content_trigger(content: str, config: CoreConfig) -> bool:
         bool: 是否触发
     """
 
-    for reg_text in config.AI_CHAT_TRIGGER_REGEX:
-        reg = re.compile(reg_text)
-        if reg.search(content):
-            return True
-    return False
+    return get_content_matcher(config).trigger.is_match(content)
 
 
 def check_forbidden_message(content: str, config: CoreConfig) -> bool:
@@ -212,12 +246,11 @@ def check_forbidden_message(content: str, config: CoreConfig) -> bool:
         bool: 是否忽略
     """
 
-    for reg_text in config.AI_CHAT_IGNORE_REGEX:
-        reg = re.compile(reg_text)
-        _r = reg.search(content)
-        if _r:
-            logger.info(f'忽略消息: "{content}" - 命中正则: "{reg_text}" 匹配内容: "{_r.group(0)}"')
-            return True
+    matched = get_content_matcher(config).ignore.search(content)
+    if matched:
+        reg_text, matched_text = matched
+        logger.info(f'忽略消息: "{content}" - 命中正则: "{reg_text}" 匹配内容: "{matched_text}"')
+        return True
     return False
 
 
@@ -325,3 +358,18 @@ def calculate_text_similarity(text1: str, text2: str, min_length: int = 12) -> f
     if len(text1) < min_length or len(text2) < min_length:
         return 0
     return difflib.SequenceMatcher(None, text1, text2).ratio()
+
+
+def estimate_token_count(text: str) -> int:
+    """粗略估算文本 Token 数量
+
+    中日韩字符按每字 1 Token 计算，其余字符按每 4 字符 1 Token 计算
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: 估算的 Token 数量
+    """
+    cjk_count = len(re.findall(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]", text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
@@ -0,0 +1,134 @@
+"""消息内容匹配器
+
+将一组用户配置的正则表达式预编译为单个匹配器：不含正则元字符的表达式视为字面量关键词，合并为按前缀树展开的正则，
+扫描一次即可匹配全部关键词；可安全合并的正则表达式与关键词组合为一个交替表达式；包含反向引用或全局内联标志、
+合并后语义会改变的表达式单独编译。无法编译的表达式会被跳过并记录在 `errors` 中，不影响其他表达式生效。
+
+本模块不依赖项目其他模块，可单独加载用于基准测试。
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+_REGEX_META_CHARS = frozenset(".^$*+?{}[]\\|()")
+# 合并后语义会改变的写法: 数字 / 命名反向引用、条件分组、出现在表达式开头的全局内联标志
+_UNSAFE_TO_COMBINE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)")
+
+
+def is_literal_pattern(pattern: str) -> bool:
+    """判断表达式是否不含正则元字符 (可按字面量匹配)"""
+    return not any(char in _REGEX_META_CHARS for char in pattern)
+
+
+def build_trie_regex(words: Sequence[str]) -> str:
+    """将关键词列表构造为前缀树形式的正则表达式
+
+    公共前缀只展开一次，匹配时每个位置按字符逐层分支，而不是依次尝试每个关键词
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _render(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + _render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            # 当前位置已能构成完整关键词，后续分支可选
+            return f"(?:{body})?"
+        return body
+
+    return _render(trie)
+
+
+class PatternSet:
+    """预编译的正则表达式集合"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self.errors: List[Tuple[str, str]] = []  # (表达式, 错误信息)
+        self.literals: List[str] = []
+        self._compiled: List[Tuple[str, Pattern[str]]] = []
+        self._separate: List[Pattern[str]] = []
+
+        combinable: List[str] = []
+        for pattern in dict.fromkeys(patterns):
+            if not pattern:
+                continue
+            try:
+                compiled = re.compile(pattern)
+            except re.error as e:
+                self.errors.append((pattern, str(e)))
+                continue
+            self._compiled.append((pattern, compiled))
+            if is_literal_pattern(pattern):
+                self.literals.append(pattern)
+            elif _UNSAFE_TO_COMBINE.search(pattern):
+                self._separate.append(compiled)
+            else:
+                combinable.append(pattern)
+
+        alternatives = [f"(?:{pattern})" for pattern in combinable]
+        if self.literals:
+            alternatives.insert(0, build_trie_regex(self.literals))
+        self._combined: Optional[Pattern[str]] = None
+        if alternatives:
+            try:
+                self._combined = re.compile("|".join(alternatives))
+            except re.error:
+                # 合并失败时退化为逐个匹配
+                self._separate.extend(re.compile(pattern) for pattern in combinable)
+                if self.literals:
+                    self._combined = re.compile(alternatives[0])
+
+    def __bool__(self) -> bool:
+        return bool(self._compiled)
+
+    def is_match(self, content: str) -> bool:
+        """内容是否命中任一表达式"""
+        if self._combined is not None and self._combined.search(content):
+            return True
+        return any(reg.search(content) for reg in self._separate)
+
+    def search(self, content: str) -> Optional[Tuple[str, str]]:
+        """查找命中的表达式
+
+        Returns:
+            Optional[Tuple[str, str]]: (命中的原始表达式, 匹配内容)，未命中时返回 None
+        """
+        if not self.is_match(content):
+            return None
+        for pattern, reg in self._compiled:
+            matched = reg.search(content)
+            if matched:
+                return pattern, matched.group(0)
+        return None
+
+
+class ContentMatcher:
+    """消息触发 / 忽略匹配器"""
+
+    def __init__(
+        self,
+        trigger_patterns: Sequence[str] = (),
+        ignore_patterns: Sequence[str] = (),
+        ignored_prefixes: Sequence[str] = (),
+    ):
+        self.trigger = PatternSet(trigger_patterns)
+        self.ignore = PatternSet(ignore_patterns)
+        self.ignored_prefixes: Tuple[str, ...] = tuple(prefix for prefix in ignored_prefixes if prefix)
+
+    @property
+    def errors(self) -> List[Tuple[str, str]]:
+        return self.trigger.errors + self.ignore.errors
+
+    def has_ignored_prefix(self, content: str) -> bool:
+        """内容是否以忽略前缀开头"""
+        return bool(self.ignored_prefixes) and content.startswith(self.ignored_prefixes)
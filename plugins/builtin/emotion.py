@@ -54,7 +54,7 @@ from nekro_agent.api.core import ModelConfigGroup, get_qdrant_client, logger
 from nekro_agent.api.core import config as core_config
 from nekro_agent.api.plugin import ConfigBase, NekroPlugin, SandboxMethodType
 from nekro_agent.services.agent.creator import ContentSegment, OpenAIChatMessage
-from nekro_agent.services.agent.openai import gen_openai_embeddings
+from nekro_agent.services.embedding_service import embedding_service
 from nekro_agent.services.message_service import message_service
 from nekro_agent.tools.common_util import copy_to_upload_dir
 from nekro_agent.tools.path_convertor import (
@@ -220,9 +220,9 @@ async def generate_embedding(text: str) -> List[float]:
     """生成文本嵌入向量"""
     model_group: ModelConfigGroup = core_config.get_model_group_info(emotion_config.EMBEDDING_MODEL)
 
-    embedding_vector = await gen_openai_embeddings(
+    embedding_vector = await embedding_service.embed(
+        text,
         model=model_group.CHAT_MODEL,
-        input=text,
         dimensions=emotion_config.EMBEDDING_DIMENSION,
         api_key=model_group.API_KEY,
         base_url=model_group.BASE_URL,
@@ -543,27 +543,34 @@ async def _(matcher: Matcher, event: MessageEvent, bot: Bot, arg: Message = Comm
 
     # 批处理相关变量
     batch_size = 50  # 每批处理的表情包数量
-    current_batch = []
 
     # 时间跟踪变量
     last_progress_time = time.time()
     progress_interval = 60  # 进度报告间隔，单位秒（1分钟）
 
-    # 处理每个表情包
+    valid_emotions: List[Tuple[str, EmotionMetadata]] = []
     for emotion_id, metadata in emotion_store.emotions.items():
-        try:
-            # 检查文件是否存在
-            file_path = Path(metadata.file_path)
-            if not file_path.exists():
-                logger.warning(f"表情包文件不存在: {emotion_id}, {file_path}")
-                missing_file_count += 1
-                continue
-
-            # 生成嵌入向量
-            embedding_text = f"{metadata.description} {' '.join(metadata.tags)}"
-            embedding = await generate_embedding(embedding_text)
+        # 检查文件是否存在
+        if not Path(metadata.file_path).exists():
+            logger.warning(f"表情包文件不存在: {emotion_id}, {metadata.file_path}")
+            missing_file_count += 1
+            continue
+        valid_emotions.append((emotion_id, metadata))
+
+    # 按批并发生成嵌入向量，由向量服务合并为批量请求，已缓存的文本不再请求接口
+    for batch_start in range(0, len(valid_emotions), batch_size):
+        batch = valid_emotions[batch_start : batch_start + batch_size]
+        embeddings = await asyncio.gather(
+            *(generate_embedding(f"{metadata.description} {' '.join(metadata.tags)}") for _, metadata in batch),
+            return_exceptions=True,
+        )
 
-            # 添加到当前批次
+        current_batch = []
+        for (emotion_id, metadata), embedding in zip(batch, embeddings):
+            if isinstance(embedding, BaseException):
+                logger.error(f"处理表情包失败: {emotion_id}, 错误: {embedding}")
+                error_count += 1
+                continue
             current_batch.append(
                 qdrant_models.PointStruct(
                     id=int(emotion_id, 16),  # 将十六进制字符串转换为整数
@@ -576,28 +583,23 @@ async def _(matcher: Matcher, event: MessageEvent, bot: Bot, arg: Message = Comm
                 ),
             )
 
-            # 如果达到批处理大小或是最后一个，则提交批次
-            if len(current_batch) >= batch_size or emotion_id == list(emotion_store.emotions.keys())[-1]:
+        if current_batch:
+            try:
                 await client.upsert(
                     collection_name=collection_name,
                     points=current_batch,
                 )
-                # 清空当前批次
-                current_batch = []
-
-            success_count += 1
-
-            # 按时间间隔更新进度（每1分钟一次）
-            current_time = time.time()
-            if current_time - last_progress_time >= progress_interval:
-                await matcher.send(f"喵~ 已成功处理 {success_count}/{total_emotions} 个表情包...")
-                last_progress_time = current_time
-
-            await asyncio.sleep(0.1)
+            except Exception as e:
+                logger.error(f"写入表情包索引失败: {e}")
+                error_count += len(current_batch)
+                continue
+        success_count += len(current_batch)
 
-        except Exception as e:
-            logger.error(f"处理表情包失败: {emotion_id}, 错误: {e}")
-            error_count += 1
+        # 按时间间隔更新进度（每1分钟一次）
+        current_time = time.time()
+        if current_time - last_progress_time >= progress_interval:
+            await matcher.send(f"喵~ 已成功处理 {success_count}/{total_emotions} 个表情包...")
+            last_progress_time = current_time
 
     # 最终统计
     message = f"喵~ 表情包索引重建完成！\n总计: {total_emotions} 个\n成功: {success_count} 个\n失败: {error_count} 个\n文件缺失: {missing_file_count} 个"
@@ -31,6 +31,7 @@ from nekro_agent.api.plugin import ConfigBase, NekroPlugin, SandboxMethodType
 from nekro_agent.core.logger import logger
 from nekro_agent.models.db_chat_channel import DBChatChannel
 from nekro_agent.models.db_chat_message import DBChatMessage
+from nekro_agent.services.message_buffer import message_write_buffer
 
 plugin = NekroPlugin(
     name="漫游历史记录",
@@ -95,6 +96,9 @@ async def find_history_travel(_ctx: schemas.AgentCtx, chat_key: str, keywords: L
     conversation_start_time: datetime.datetime = db_chat_channel.conversation_start_time
     conversation_start_timestamp = int(conversation_start_time.timestamp())
 
+    # 确保刚收到的消息已写入数据库
+    await message_write_buffer.ensure_flushed()
+
     # 安全地获取上下文截止时间点
     # 首先获取最近的消息总数
     total_messages = await DBChatMessage.filter(chat_key=chat_key).count()
@@ -253,6 +257,7 @@ async def find_history_travel_range(
     if not db_chat_channel:
         raise ValueError("未找到会话")
 
+    await message_write_buffer.ensure_flushed()  # 基准消息可能刚刚展示给 AI，尚在写入缓冲中
     base_message = await DBChatMessage.get_or_none(message_id=base_msg_id)
     if not base_message:
         raise ValueError("未找到消息")
@@ -83,7 +83,7 @@ async def set_bot_group_card(ctx: schemas.AgentCtx, card_name: str) -> None:
             logger.warning("无法获取bot实例")
             return
 
-        user_id = int((await ctx.adapter.get_self_info()).user_id)
+        user_id = int((await ctx.adapter.get_cached_self_info()).user_id)
         final_card = f"{config.NICKNAME_PREFIX}{card_name}"
 
         await bot.set_group_card(
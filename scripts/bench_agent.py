@@ -0,0 +1,202 @@
+"""Agent 全流程吞吐基准测试
+
+通过 SSE 适配器向运行中的 Nekro Agent 实例发送消息，完整经过 `MessageService` → `run_agent` → 沙盒执行 → 回复推送的链路，
+统计每条消息从发送到收到回复的延迟与整体吞吐。配合 `scripts.mock_llm_server` 使用时无需网络与付费服务。
+
+准备:
+    1. 启动模拟服务: python -m scripts.mock_llm_server --port 9190
+    2. 在实例中新建模型组，API 地址设为 http://127.0.0.1:9190/v1，并设为当前使用的模型组
+    3. 确保 SSE 适配器已启用
+
+用法:
+    python -m scripts.bench_agent --server http://127.0.0.1:8021 --channels 4 --messages 10 --mock-url http://127.0.0.1:9190
+    python -m scripts.bench_agent --max-p95-ms 15000 --output bench.json  # p95 超出阈值时以非零状态退出，可用于 CI
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+_SDK_DIR = Path(__file__).resolve().parent.parent / "nekro_agent" / "adapters" / "sse" / "sdk"
+
+
+def _load_sse_sdk():
+    """按路径加载 SSE 客户端 SDK
+
+    SDK 不依赖 nekro_agent 的其他模块，直接加载可避免导入 nekro_agent 包时初始化 NoneBot 插件
+    """
+    spec = importlib.util.spec_from_file_location("nekro_sse_sdk", _SDK_DIR / "__init__.py", submodule_search_locations=[str(_SDK_DIR)])
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sdk = _load_sse_sdk()
+from nekro_sse_sdk.models import (  # noqa: E402
+    ReceiveMessage,
+    SendMessageRequest,
+    SendMessageResponse,
+    text,
+)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0
+    sorted_values = sorted(values)
+    index = min(len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * p / 100) - 1))
+    return sorted_values[index]
+
+
+class BenchClient(sdk.SSEClient):
+    """记录机器人回复时间的 SSE 客户端"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters: Dict[str, "asyncio.Future[float]"] = {}
+        self.reply_count = 0
+
+    async def _handle_send_message(self, _event_type: str, data: SendMessageRequest) -> SendMessageResponse:
+        self.reply_count += 1
+        waiter = self.waiters.pop(data.channel_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(time.monotonic())
+        return SendMessageResponse(message_id=f"bench_{uuid.uuid4().hex[:8]}", success=True)
+
+    def expect_reply(self, channel_id: str) -> "asyncio.Future[float]":
+        future: "asyncio.Future[float]" = asyncio.get_running_loop().create_future()
+        self.waiters[channel_id] = future
+        return future
+
+
+async def run_channel(client: BenchClient, channel_id: str, args: argparse.Namespace, latencies: List[float]) -> int:
+    """在单个频道中依次发送消息并等待回复，返回超时次数"""
+    timeouts = 0
+    for index in range(args.messages):
+        reply = client.expect_reply(channel_id)
+        message = ReceiveMessage(
+            msg_id=f"bench_{uuid.uuid4().hex[:12]}",
+            from_id=f"bench_user_{index % 3}",
+            from_name=f"bench_user_{index % 3}",
+            is_to_me=True,
+            channel_id=channel_id,
+            channel_name=channel_id,
+            platform_name="bench",
+            segments=[text(f"{args.text} #{index}")],
+        )
+        start_time = time.monotonic()
+        if not await client.send_message(channel_id, message):
+            timeouts += 1
+            continue
+        try:
+            latencies.append((await asyncio.wait_for(reply, timeout=args.timeout) - start_time) * 1000)
+        except asyncio.TimeoutError:
+            timeouts += 1
+            client.waiters.pop(channel_id, None)
+        if args.interval > 0:
+            await asyncio.sleep(args.interval)
+    return timeouts
+
+
+async def fetch_mock_stats(mock_url: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with aiohttp.ClientSession() as session, session.get(f"{mock_url.rstrip('/')}/stats") as response:
+            return await response.json()
+    except Exception:
+        return None
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    client = BenchClient(
+        server_url=args.server,
+        platform="bench",
+        client_name=f"bench-{uuid.uuid4().hex[:6]}",
+        client_version="1.0.0",
+        access_key=args.access_key or None,
+        auto_reconnect=False,
+    )
+    await client.start()
+    if not client.running:
+        print("SSE 客户端启动失败，请确认实例地址与 SSE 适配器配置")
+        return 2
+
+    channel_ids = [f"group_bench_{index}" for index in range(args.channels)]
+    await client.subscribe_channel(channel_ids)
+    mock_stats_before = await fetch_mock_stats(args.mock_url) if args.mock_url else None
+
+    latencies: List[float] = []
+    start_time = time.monotonic()
+    try:
+        timeouts = sum(await asyncio.gather(*(run_channel(client, channel_id, args, latencies) for channel_id in channel_ids)))
+    finally:
+        await client.stop()
+    elapsed = time.monotonic() - start_time
+
+    total = args.channels * args.messages
+    result: Dict[str, Any] = {
+        "channels": args.channels,
+        "messages": total,
+        "replied": len(latencies),
+        "timeouts": timeouts,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_msg_per_s": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0,
+        "latency_ms": {
+            "avg": round(sum(latencies) / len(latencies), 1) if latencies else 0,
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0,
+        },
+    }
+    if mock_stats_before is not None:
+        mock_stats_after = await fetch_mock_stats(args.mock_url)
+        if mock_stats_after:
+            llm_requests = mock_stats_after["request_count"] - mock_stats_before["request_count"]
+            result["llm_requests"] = llm_requests
+            result["llm_requests_per_reply"] = round(llm_requests / len(latencies), 2) if latencies else 0
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if timeouts and not args.allow_timeouts:
+        return 1
+    if args.max_p95_ms and result["latency_ms"]["p95"] > args.max_p95_ms:
+        print(f"p95 延迟 {result['latency_ms']['p95']}ms 超过阈值 {args.max_p95_ms}ms")
+        return 1
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agent 全流程吞吐基准测试")
+    parser.add_argument("--server", default="http://127.0.0.1:8021", help="Nekro Agent 实例地址")
+    parser.add_argument("--access-key", default="", help="SSE 适配器访问密钥")
+    parser.add_argument("--channels", type=int, default=4, help="并发频道数")
+    parser.add_argument("--messages", type=int, default=10, help="每个频道发送的消息数")
+    parser.add_argument("--interval", type=float, default=0, help="同一频道收到回复后到发送下一条消息的间隔 (秒)")
+    parser.add_argument("--timeout", type=float, default=120, help="等待单条回复的超时时间 (秒)")
+    parser.add_argument("--text", default="你好，这是一条基准测试消息", help="消息内容")
+    parser.add_argument("--mock-url", default="", help="模拟服务地址，设置后统计 LLM 请求数")
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="p95 延迟阈值 (毫秒)，超出时以非零状态退出")
+    parser.add_argument("--allow-timeouts", action="store_true", help="存在超时时不以非零状态退出")
+    parser.add_argument("--output", default="", help="结果输出文件 (JSON)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    sys.exit(asyncio.run(main_async(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
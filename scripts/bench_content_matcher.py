@@ -0,0 +1,106 @@
+"""消息触发 / 忽略匹配基准测试
+
+对比逐条编译并依次匹配正则表达式的旧实现与预编译的 `ContentMatcher`，并校验两者的匹配结果一致。
+
+用法:
+    python -m scripts.bench_content_matcher --keywords 500 --regexes 20 --messages 20000
+"""
+
+import argparse
+import importlib.util
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+_MODULE_PATH = Path(__file__).resolve().parent.parent / "nekro_agent" / "tools" / "content_matcher.py"
+
+
+def _load_content_matcher():
+    """按路径加载匹配器模块，避免导入 nekro_agent 包时初始化 NoneBot 插件"""
+    spec = importlib.util.spec_from_file_location("nekro_content_matcher", _MODULE_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+content_matcher = _load_content_matcher()
+
+_CJK_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+
+
+def random_word(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+    return "".join(rng.choices(_CJK_CHARS, k=rng.randint(2, 4)))
+
+
+def gen_regexes(rng: random.Random, count: int) -> List[str]:
+    templates = [r"{w}\d+", r"^{w}", r"{w}.*{w2}", r"(?i){w}", r"({w}|{w2})!", r"{w}\s*{w2}"]
+    return [rng.choice(templates).format(w=random_word(rng), w2=random_word(rng)) for _ in range(count)]
+
+
+def gen_messages(rng: random.Random, count: int, keywords: List[str], hit_rate: float) -> List[str]:
+    messages: List[str] = []
+    for _ in range(count):
+        words = [random_word(rng) for _ in range(rng.randint(3, 12))]
+        if keywords and rng.random() < hit_rate:
+            words.insert(rng.randint(0, len(words)), rng.choice(keywords))
+        messages.append(" ".join(words))
+    return messages
+
+
+def legacy_match(patterns: List[str]) -> Callable[[str], bool]:
+    """旧实现: 每次调用逐条编译并匹配"""
+
+    def _match(content: str) -> bool:
+        for reg_text in patterns:
+            reg = re.compile(reg_text)
+            if reg.search(content):
+                return True
+        return False
+
+    return _match
+
+
+def bench(name: str, func: Callable[[str], bool], messages: List[str]) -> List[bool]:
+    start_time = time.perf_counter()
+    results = [func(message) for message in messages]
+    elapsed = time.perf_counter() - start_time
+    print(f"{name:<12} {elapsed * 1000:>9.1f} ms  {elapsed / len(messages) * 1e6:>8.2f} us/msg  命中 {sum(results)}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="消息触发 / 忽略匹配基准测试")
+    parser.add_argument("--keywords", type=int, default=500, help="字面量关键词数量")
+    parser.add_argument("--regexes", type=int, default=20, help="正则表达式数量")
+    parser.add_argument("--messages", type=int, default=20000, help="测试消息数量")
+    parser.add_argument("--hit-rate", type=float, default=0.05, help="消息包含关键词的比例")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    keywords = list(dict.fromkeys(random_word(rng) for _ in range(args.keywords)))
+    patterns = keywords + gen_regexes(rng, args.regexes)
+    messages = gen_messages(rng, args.messages, keywords, args.hit_rate)
+
+    start_time = time.perf_counter()
+    pattern_set = content_matcher.PatternSet(patterns)
+    print(f"表达式 {len(patterns)} 条 (关键词 {len(pattern_set.literals)} 条)，构建耗时 {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    legacy_results = bench("legacy", legacy_match(patterns), messages)
+    matcher_results = bench("matcher", pattern_set.is_match, messages)
+    mismatches = sum(1 for a, b in zip(legacy_results, matcher_results) if a != b)
+    if mismatches:
+        print(f"匹配结果不一致: {mismatches} 条")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
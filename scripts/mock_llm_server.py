@@ -0,0 +1,261 @@
+"""本地 OpenAI 兼容模拟服务
+
+实现项目使用的 `/v1/chat/completions` (流式与非流式) 与 `/v1/embeddings` 接口，用于在无网络、不调用付费服务的情况下压测 Agent 流程。
+
+- 合成模式 (默认): 按配置的首 Token 延迟分布与输出速率返回固定的 `send_msg_text` 代码响应
+- 回放模式: 从提示词日志 (`prompts_*.jsonl.gz` 分段或单个 `.json` 日志文件) 中加载已记录的响应，
+  按请求消息内容匹配，未匹配时按顺序轮流返回
+- 错误注入: 按比例返回指定的 HTTP 错误状态码 (429 响应附带 Retry-After)
+
+用法:
+    python -m scripts.mock_llm_server --port 9190 --latency lognormal --ttft-ms 800 --tokens-per-second 60
+    python -m scripts.mock_llm_server --replay-dir data/logs/prompts --error-rate 0.05 --error-status 429,500
+
+将模型组的 API 地址设置为 `http://127.0.0.1:9190/v1` 即可使用。
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_RESPONSE = '```python\nsend_msg_text(_ck, "[mock] 收到消息啦~")\n```'
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 Token 数"""
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def messages_digest(messages: List[Dict[str, Any]]) -> str:
+    """计算请求消息的摘要，用于回放匹配"""
+    return hashlib.sha256(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def messages_text(messages: List[Dict[str, Any]]) -> str:
+    texts: List[str] = []
+    for msg in messages:
+        content = msg.get("content", "")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(item.get("text", "") for item in content if item.get("type") == "text")
+    return "\n".join(texts)
+
+
+class ReplayStore:
+    """已记录的 LLM 响应"""
+
+    def __init__(self, replay_dir: Path):
+        self.responses: Dict[str, str] = {}
+        self.ordered: List[str] = []
+        for record in self._load_records(replay_dir):
+            content = (record.get("response") or {}).get("content")
+            messages = (record.get("request") or {}).get("messages")
+            if not content:
+                continue
+            self.ordered.append(content)
+            if messages:
+                self.responses[messages_digest(messages)] = content
+        self._cycle = itertools.cycle(self.ordered) if self.ordered else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _load_records(replay_dir: Path) -> Iterator[Dict[str, Any]]:
+        for path in sorted(replay_dir.glob("prompts_*.jsonl.gz")):
+            # 每个分段由多个 gzip 成员拼接而成，gzip.open 会依次读取全部成员
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        for path in sorted(replay_dir.glob("*.json")):
+            try:
+                yield json.loads(path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+    def get(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        content = self.responses.get(messages_digest(messages))
+        if content is not None:
+            self.hits += 1
+            return content
+        self.misses += 1
+        return next(self._cycle) if self._cycle else None
+
+
+class MockLLMServer:
+    """模拟服务"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.replay = ReplayStore(Path(args.replay_dir)) if args.replay_dir else None
+        self.error_statuses = [int(status) for status in args.error_status.split(",") if status.strip()]
+        self.request_count = 0
+        self.error_count = 0
+        self.app = FastAPI(title="Mock LLM Server")
+        self.app.post("/v1/chat/completions")(self.chat_completions)
+        self.app.post("/v1/embeddings")(self.embeddings)
+        self.app.get("/v1/models")(self.models)
+        self.app.get("/stats")(self.stats)
+
+    def sample_ttft(self) -> float:
+        """按配置的分布采样首 Token 延迟 (秒)"""
+        median = self.args.ttft_ms / 1000
+        if self.args.latency == "uniform":
+            return max(0.0, self.rng.uniform(median - self.args.ttft_jitter_ms / 1000, median + self.args.ttft_jitter_ms / 1000))
+        if self.args.latency == "lognormal":
+            return self.rng.lognormvariate(0, self.args.ttft_sigma) * median
+        return median
+
+    def maybe_error(self) -> Optional[JSONResponse]:
+        if not self.error_statuses or self.rng.random() >= self.args.error_rate:
+            return None
+        self.error_count += 1
+        status = self.rng.choice(self.error_statuses)
+        headers = {"retry-after": str(self.args.retry_after)} if status == 429 else None
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": f"mock injected error {status}", "type": "mock_error", "code": status}},
+            headers=headers,
+        )
+
+    def pick_response(self, messages: List[Dict[str, Any]]) -> str:
+        if self.replay:
+            content = self.replay.get(messages)
+            if content is not None:
+                return content
+        return self.args.response or DEFAULT_RESPONSE
+
+    async def chat_completions(self, request: Request):
+        self.request_count += 1
+        body = await request.json()
+        model: str = body.get("model", "mock")
+        messages: List[Dict[str, Any]] = body.get("messages", [])
+
+        await asyncio.sleep(self.sample_ttft())
+        error_response = self.maybe_error()
+        if error_response:
+            return error_response
+
+        content = self.pick_response(messages)
+        usage = {
+            "prompt_tokens": estimate_tokens(messages_text(messages)),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+        if body.get("stream"):
+            return StreamingResponse(self._stream(completion_id, model, content, usage), media_type="text/event-stream")
+
+        await asyncio.sleep(usage["completion_tokens"] / self.args.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    async def _stream(self, completion_id: str, model: str, content: str, usage: Dict[str, int]) -> AsyncGenerator[str, None]:
+        chunk_size = max(1, self.args.chunk_chars)
+        pieces = [content[i : i + chunk_size] for i in range(0, len(content), chunk_size)] or [""]
+        delay = estimate_tokens(content) / self.args.tokens_per_second / len(pieces)
+        for index, piece in enumerate(pieces):
+            is_last = index == len(pieces) - 1
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": "stop" if is_last else None}],
+                # 用量随最后一个数据块返回，与上游服务开启 include_usage 时一致
+                "usage": usage if is_last else None,
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            if not is_last:
+                await asyncio.sleep(delay)
+        yield "data: [DONE]\n\n"
+
+    async def embeddings(self, request: Request):
+        self.request_count += 1
+        body = await request.json()
+        await asyncio.sleep(self.sample_ttft() * self.args.embedding_latency_ratio)
+        error_response = self.maybe_error()
+        if error_response:
+            return error_response
+
+        inputs = body.get("input", "")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dimensions: int = body.get("dimensions") or 1024
+        data = []
+        for index, item in enumerate(inputs):
+            text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+            # 相同输入返回相同向量
+            item_rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+            data.append({"object": "embedding", "index": index, "embedding": [item_rng.uniform(-1, 1) for _ in range(dimensions)]})
+        prompt_tokens = sum(estimate_tokens(item if isinstance(item, str) else str(item)) for item in inputs)
+        return {
+            "object": "list",
+            "model": body.get("model", "mock"),
+            "data": data,
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        }
+
+    async def models(self):
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    async def stats(self):
+        return {
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "replay_hits": self.replay.hits if self.replay else 0,
+            "replay_misses": self.replay.misses if self.replay else 0,
+            "replay_records": len(self.replay.ordered) if self.replay else 0,
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9190)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="fixed", help="首 Token 延迟分布")
+    parser.add_argument("--ttft-ms", type=float, default=500, help="首 Token 延迟中位数 (毫秒)")
+    parser.add_argument("--ttft-jitter-ms", type=float, default=200, help="uniform 分布的延迟抖动范围 (毫秒)")
+    parser.add_argument("--ttft-sigma", type=float, default=0.5, help="lognormal 分布的 sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="输出速率 (Token/秒)")
+    parser.add_argument("--chunk-chars", type=int, default=8, help="流式响应每个数据块的字符数")
+    parser.add_argument("--embedding-latency-ratio", type=float, default=0.2, help="向量接口延迟相对首 Token 延迟的比例")
+    parser.add_argument("--error-rate", type=float, default=0, help="错误注入比例 (0-1)")
+    parser.add_argument("--error-status", default="500", help="注入的 HTTP 状态码，逗号分隔，如 429,500,503")
+    parser.add_argument("--retry-after", type=float, default=1, help="429 响应的 Retry-After (秒)")
+    parser.add_argument("--replay-dir", default="", help="提示词日志目录，设置后按记录回放响应")
+    parser.add_argument("--response", default="", help="合成模式下返回的响应内容")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    server = MockLLMServer(args)
+    if server.replay:
+        print(f"已加载 {len(server.replay.ordered)} 条回放记录")
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()